@@ -1,7 +1,12 @@
 """
 Script principal para obtener reseñas de la película F1.
 Guarda los datos en data/raw/
+
+Cada fuente se mide como un paso (tiempo, comentarios/segundo y, con
+--trace-memory, memoria) y el perfil de la ejecución se guarda en
+output/profiles/. Opciones: --profile, --trace-memory (ver src/profiling.py).
 """
+import argparse
 import json
 import os
 from datetime import datetime
@@ -23,6 +28,7 @@ from src.scrapers import (
     save_youtube,
     F1_VIDEO_IDS,
 )
+from src.profiling import add_profiling_arguments, profiled_run, span
 
 DATA_DIR = Path(__file__).parent / "data" / "raw"
 
@@ -55,21 +61,27 @@ def main():
 
     # IMDB
     print("1. Obteniendo reseñas de IMDB...")
-    imdb_reviews = get_imdb_reviews(max_reviews=100)
+    with span("imdb") as sp:
+        imdb_reviews = get_imdb_reviews(max_reviews=100)
+        sp.records = len(imdb_reviews)
     if imdb_reviews:
         save_imdb(imdb_reviews, str(DATA_DIR / "reviews_imdb.json"))
     print()
 
     # Rotten Tomatoes
     print("2. Obteniendo reseñas de Rotten Tomatoes...")
-    rt_reviews = get_rottentomatoes_reviews(max_reviews=100)
+    with span("rottentomatoes") as sp:
+        rt_reviews = get_rottentomatoes_reviews(max_reviews=100)
+        sp.records = len(rt_reviews)
     if rt_reviews:
         save_rt(rt_reviews, str(DATA_DIR / "reviews_rottentomatoes.json"))
     print()
 
     # Instagram
     print("3. Obteniendo comentarios de Instagram (Steady API)...")
-    instagram_comments = get_instagram_comments(post_code=F1_POST_SHORTCODE)
+    with span("instagram") as sp:
+        instagram_comments = get_instagram_comments(post_code=F1_POST_SHORTCODE)
+        sp.records = len(instagram_comments)
     if instagram_comments:
         save_instagram(instagram_comments, str(DATA_DIR / "reviews_instagram.json"))
     else:
@@ -78,7 +90,9 @@ def main():
 
     # Reddit
     print("4. Obteniendo comentarios de Reddit (Steady API)...")
-    reddit_comments = get_reddit_comments(subreddit=F1_SUBREDDIT)
+    with span("reddit") as sp:
+        reddit_comments = get_reddit_comments(subreddit=F1_SUBREDDIT)
+        sp.records = len(reddit_comments)
     if reddit_comments:
         save_reddit(reddit_comments, str(DATA_DIR / "reviews_reddit.json"))
     else:
@@ -87,7 +101,9 @@ def main():
 
     # YouTube (varios vídeos F1 unificados)
     print("5. Obteniendo comentarios de YouTube (vídeos F1)...")
-    youtube_comments = get_youtube_comments_from_videos(video_ids=F1_VIDEO_IDS)
+    with span("youtube") as sp:
+        youtube_comments = get_youtube_comments_from_videos(video_ids=F1_VIDEO_IDS)
+        sp.records = len(youtube_comments)
     if youtube_comments:
         save_youtube(youtube_comments, str(DATA_DIR / "reviews_youtube.json"))
     else:
@@ -141,4 +157,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run("scraper", cprofile=args.profile, trace_memory=args.trace_memory):
+        main()
@@ -2,21 +2,169 @@
 """
 Ejecuta el análisis de insights, sentimiento y temático (para marketing).
 Requiere datos crudos en data/raw/
+
+Solo se relanzan las etapas cuyas entradas, código o configuración cambiaron
+desde la última ejecución (ver src/dag.py). Opciones: --force, --only ETAPA.
 """
+from functools import partial
+
+from src.profiling import profiled_run
+from src.dag import Stage, build_arg_parser, package_version, run_stages
 from src.analysis.insights import run_insights_analysis
 from src.analysis.sentiment import run_sentiment_analysis
 from src.analysis.thematic import run_thematic_analysis
-from src.analysis.sentiment_sources_report import run_full_report
+from src.analysis.sentiment_sources_report import figure_extension, run_full_report
+from src.analysis.timeline import run_timeline_analysis
+from src.analysis import distinctive, heavy_hitters, ngrams, topics
+from src.analysis.context import AnalysisContext
+
+CLEAN = "data/clean/reviews_f1_clean.json"
+INSIGHTS = "output/insights"
+FIGURES = f"{INSIGHTS}/figures"
+# Scores de la etapa de sentimiento, que reutilizan temático e informe por fuente
+ENRICHED = f"{INSIGHTS}/reviews_con_sentimiento.json"
+# Cubo fuente × vídeo × etiqueta de la etapa de sentimiento (ver src/analysis/cube.py)
+CUBE = f"{INSIGHTS}/aggregate_cube.json"
+SENTIMENT_CONFIG = {"vaderSentiment": package_version("vaderSentiment")}
+# Modo de los top-N y método de términos distintivos (cambian las salidas)
+TERMS_CONFIG = {
+    "top_terms_mode": heavy_hitters.DEFAULT_MODE,
+    "top_terms_epsilon": heavy_hitters.DEFAULT_EPSILON,
+    "distinctive_method": distinctive.DEFAULT_METHOD,
+    "topics_k": topics.N_TOPICS,
+    "topics_model_version": topics.MODEL_VERSION,
+    "collocation_method": ngrams.DEFAULT_METHOD,
+}
+# Formato de las gráficas del informe por fuente (FIGURE_FORMAT: png, svg, vega)
+FIGURE_EXT = figure_extension()
+PLOT_CONFIG = {
+    "matplotlib": package_version("matplotlib"),
+    "wordcloud": package_version("wordcloud"),
+    "figure_ext": FIGURE_EXT,
+}
+
+# Dataset, scores, cubo y tokens se cargan una vez y los comparten las
+# etapas que se ejecuten (ver src/analysis/context.py)
+CONTEXT = AnalysisContext()
+
+STAGES = [
+    Stage(
+        "insights",
+        partial(run_insights_analysis, ctx=CONTEXT),
+        title="Insights básicos (requiere data/clean/)",
+        inputs=[CLEAN, CUBE],
+        outputs=[f"{INSIGHTS}/insights_basicos.json"],
+        deps=["sentiment"],
+        code=[
+            "src/analysis/insights.py",
+            "src/analysis/context.py",
+            "src/analysis/cube.py",
+            "src/analysis/aggregates.py",
+        ],
+    ),
+    Stage(
+        "sentiment",
+        partial(run_sentiment_analysis, ctx=CONTEXT),
+        title="Análisis de sentimiento",
+        inputs=[CLEAN],
+        outputs=[
+            f"{INSIGHTS}/insights_sentimiento.json",
+            ENRICHED,
+            CUBE,
+        ],
+        code=[
+            "src/analysis/sentiment.py",
+            "src/analysis/context.py",
+            "src/analysis/fast_vader.py",
+            "src/analysis/aggregates.py",
+            "src/analysis/cube.py",
+            "src/cleaning/pipeline.py",
+        ],
+        config=SENTIMENT_CONFIG,
+    ),
+    Stage(
+        "thematic",
+        partial(run_thematic_analysis, ctx=CONTEXT),
+        title="Análisis temático para marketing",
+        inputs=[CLEAN, ENRICHED, CUBE],
+        outputs=[
+            f"{INSIGHTS}/analisis_tematico_marketing.json",
+            f"{INSIGHTS}/reporte_marketing.md",
+        ],
+        deps=["sentiment"],
+        code=[
+            "src/analysis/thematic.py",
+            "src/analysis/context.py",
+            "src/analysis/themes.py",
+            "src/analysis/aggregates.py",
+            "src/analysis/cube.py",
+            "src/analysis/sentiment.py",
+            "src/analysis/fast_vader.py",
+            "src/analysis/stopwords_social.py",
+            "src/analysis/corpus.py",
+            "src/analysis/dtm.py",
+            "src/analysis/heavy_hitters.py",
+            "src/analysis/ngrams.py",
+            "src/analysis/distinctive.py",
+            "src/analysis/topics.py",
+            "src/cleaning/pipeline.py",
+        ],
+        config={**SENTIMENT_CONFIG, **TERMS_CONFIG},
+    ),
+    Stage(
+        "report",
+        partial(run_full_report, ctx=CONTEXT),
+        title="Análisis de sentimiento por fuente + gráficas para marketing",
+        inputs=[CLEAN, ENRICHED, CUBE, "data/raw/reviews_f1_combined.json"],
+        outputs=[
+            f"{INSIGHTS}/sentiment_by_source.json",
+            f"{INSIGHTS}/reporte_sentimiento_por_fuente.md",
+            f"{FIGURES}/sentiment_distribution_by_source{FIGURE_EXT}",
+            f"{FIGURES}/avg_compound_by_source{FIGURE_EXT}",
+            f"{FIGURES}/engagement_by_source{FIGURE_EXT}",
+            f"{FIGURES}/top_words_by_source{FIGURE_EXT}",
+            f"{FIGURES}/compound_boxplot_by_source{FIGURE_EXT}",
+        ],
+        deps=["sentiment"],
+        code=[
+            "src/analysis/sentiment_sources_report.py",
+            "src/analysis/context.py",
+            "src/analysis/figures.py",
+            "src/analysis/vector_charts.py",
+            "src/analysis/sentiment.py",
+            "src/analysis/fast_vader.py",
+            "src/analysis/aggregates.py",
+            "src/analysis/cube.py",
+            "src/analysis/stopwords_social.py",
+            "src/analysis/corpus.py",
+            "src/analysis/dtm.py",
+            "src/analysis/heavy_hitters.py",
+            "src/analysis/ngrams.py",
+        ],
+        config={**SENTIMENT_CONFIG, **TERMS_CONFIG, **PLOT_CONFIG},
+    ),
+    Stage(
+        "timeline",
+        partial(run_timeline_analysis, ctx=CONTEXT),
+        title="Series temporales de sentimiento y engagement (timing)",
+        inputs=[CLEAN, ENRICHED],
+        outputs=[f"{INSIGHTS}/sentiment_timeline.json"],
+        deps=["sentiment"],
+        code=[
+            "src/analysis/timeline.py",
+            "src/analysis/context.py",
+            "src/analysis/sentiment.py",
+            "src/analysis/fast_vader.py",
+            "src/analysis/cube.py",
+            "src/cleaning/pipeline.py",
+        ],
+        config=SENTIMENT_CONFIG,
+    ),
+]
 
 if __name__ == "__main__":
-    print("1. Insights básicos (requiere data/clean/)...")
-    run_insights_analysis()
-    print()
-    print("2. Análisis de sentimiento...")
-    run_sentiment_analysis()
-    print()
-    print("3. Análisis temático para marketing...")
-    run_thematic_analysis()
-    print()
-    print("4. Análisis de sentimiento por fuente + gráficas para marketing...")
-    run_full_report()
+    args = build_arg_parser(STAGES, description=__doc__).parse_args()
+    # --force también descarta el modelo de tópicos guardado (ver topics.py)
+    CONTEXT.retrain_models = args.force
+    with profiled_run("analysis", cprofile=args.profile, trace_memory=args.trace_memory):
+        run_stages(STAGES, force=args.force, only=args.only)
@@ -2,8 +2,34 @@
 """
 Ejecuta el pipeline de limpieza de datos.
 Lee de data/raw/ y guarda en data/clean/
+
+Si los datos crudos y el código de limpieza no cambiaron desde la última
+ejecución, no se relanza (ver src/dag.py). Usa --force para forzarla.
 """
+from src.profiling import profiled_run
+from src.dag import Stage, build_arg_parser, run_stages
 from src.cleaning.pipeline import run_cleaning_pipeline
 
+STAGES = [
+    Stage(
+        "cleaning",
+        run_cleaning_pipeline,
+        title="Limpieza de datos (data/raw/ → data/clean/)",
+        inputs=[
+            "data/raw/reviews_imdb.json",
+            "data/raw/reviews_rottentomatoes.json",
+            "data/raw/reviews_instagram.json",
+            "data/raw/reviews_reddit.json",
+            "data/raw/reviews_youtube.json",
+            "data/raw/reviews_f1_combined.json",
+            "data/raw/reviews_live.jsonl",
+        ],
+        outputs=["data/clean/reviews_f1_clean.json", "data/clean/live_ledger_offset.json"],
+        code=["src/cleaning/pipeline.py"],
+    ),
+]
+
 if __name__ == "__main__":
-    run_cleaning_pipeline()
+    args = build_arg_parser(STAGES, description=__doc__).parse_args()
+    with profiled_run("cleaning", cprofile=args.profile, trace_memory=args.trace_memory):
+        run_stages(STAGES, force=args.force, only=args.only)
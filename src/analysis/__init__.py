@@ -1,7 +1,34 @@
-"""Análisis e extracción de insights."""
+"""
+Análisis e extracción de insights.
+
+Los módulos de análisis (y NumPy, VADER, matplotlib...) se importan al
+pedir el nombre por primera vez (PEP 562), no al importar el paquete.
+"""
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "run_insights_analysis": ("src.analysis.insights", "run_insights_analysis"),
+    "load_clean_data": ("src.analysis.insights", "load_clean_data"),
+    "basic_insights": ("src.analysis.insights", "basic_insights"),
+    "run_sentiment_analysis": ("src.analysis.sentiment", "run_sentiment_analysis"),
+    "sentiment_insights": ("src.analysis.sentiment", "sentiment_insights"),
+    "analyze_sentiment": ("src.analysis.sentiment", "analyze_sentiment"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(import_module(module), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
-from src.analysis.insights import run_insights_analysis, load_clean_data, basic_insights
-from src.analysis.sentiment import run_sentiment_analysis, sentiment_insights, analyze_sentiment
 
 __all__ = [
     "run_insights_analysis",
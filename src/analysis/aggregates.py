@@ -0,0 +1,287 @@
+"""
+Agregados de sentimiento en streaming (memoria constante por grupo).
+
+En lugar de guardar la lista de todos los compound de una fuente, cada grupo
+lleva un SentimentAggregate con:
+  - conteo, suma, mínimo y máximo
+  - media y varianza con el algoritmo de Welford
+  - conteo por etiqueta (positive / neutral / negative)
+  - sumas ponderadas por engagement (likes / helpful_votes)
+  - un t-digest para mediana y percentiles (boxplots incluidos)
+
+Los agregados se combinan con merge(): los resultados parciales de varios
+procesos, shards o ejecuciones dan el mismo resumen que procesarlo todo junto
+(salvo la pequeña aproximación de los percentiles). to_dict()/from_dict()
+permiten guardarlos en JSON y retomarlos más tarde.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+LABELS = ("positive", "neutral", "negative")
+
+
+class TDigest:
+    """
+    t-digest "merging" (Dunning) con función de escala k1: los centroides son
+    pequeños en las colas y grandes en el centro, así que los percentiles
+    extremos son precisos. Memoria ~O(compression).
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = float(compression)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: List[Tuple[float, float]] = []  # (media, peso), ordenados
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, x: float, w: float = 1.0) -> None:
+        self._buffer.append((x, w))
+        self.count += w
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Incorpora otro digest (in-place) y devuelve self."""
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inv(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in items)
+        merged: List[Tuple[float, float]] = []
+        cur_m, cur_w = items[0]
+        done = 0.0
+        q_limit = self._k_inv(self._k(0.0) + 1)
+        for m, w in items[1:]:
+            if (done + cur_w + w) / total <= q_limit:
+                cur_m += (m - cur_m) * w / (cur_w + w)
+                cur_w += w
+            else:
+                merged.append((cur_m, cur_w))
+                done += cur_w
+                q_limit = self._k_inv(self._k(min(done / total, 1.0)) + 1)
+                cur_m, cur_w = m, w
+        merged.append((cur_m, cur_w))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Percentil q (0-1) aproximado; None si el digest está vacío."""
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+        target = min(max(q, 0.0), 1.0) * self.count
+        # Se interpola entre los puntos medios de centroides consecutivos;
+        # los extremos se anclan en el mínimo y el máximo reales
+        prev_x, prev_t = self.min, 0.0
+        cum = 0.0
+        for m, w in self._centroids:
+            mid = cum + w / 2
+            if target < mid:
+                if mid == prev_t:
+                    return m
+                return prev_x + (m - prev_x) * (target - prev_t) / (mid - prev_t)
+            prev_x, prev_t = m, mid
+            cum += w
+        if self.count == prev_t:
+            return self.max
+        return prev_x + (self.max - prev_x) * (target - prev_t) / (self.count - prev_t)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "centroids": [[m, w] for m, w in self._centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TDigest":
+        digest = cls(d.get("compression", 100.0))
+        digest.count = float(d.get("count", 0.0))
+        if digest.count:
+            digest.min = d["min"]
+            digest.max = d["max"]
+        digest._centroids = [(m, w) for m, w in d.get("centroids", [])]
+        return digest
+
+
+class SentimentAggregate:
+    """Resumen mergeable de los compound de un grupo de reseñas."""
+
+    def __init__(self, compression: float = 100.0):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # suma de cuadrados de desviaciones (Welford)
+        self.min = math.inf
+        self.max = -math.inf
+        self.labels = {label: 0 for label in LABELS}
+        self.engagement_sum = 0
+        self.engagement_by_label = {label: 0 for label in LABELS}
+        # Media ponderada por engagement: peso = 1 + likes (como en sentiment.py)
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+        self.digest = TDigest(compression)
+
+    def add(self, compound: float, label: str, engagement: int = 0) -> None:
+        """Añade una reseña ya puntuada."""
+        self.count += 1
+        self.sum += compound
+        delta = compound - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (compound - self.mean)
+        if compound < self.min:
+            self.min = compound
+        if compound > self.max:
+            self.max = compound
+        self.labels[label] = self.labels.get(label, 0) + 1
+        self.engagement_sum += engagement
+        self.engagement_by_label[label] = self.engagement_by_label.get(label, 0) + engagement
+        wgt = 1 + engagement
+        self.weighted_sum += compound * wgt
+        self.weight_total += wgt
+        self.digest.add(compound)
+
+    def merge(self, other: "SentimentAggregate") -> "SentimentAggregate":
+        """Combina otro agregado (in-place, fórmula de Chan) y devuelve self."""
+        if not other.count:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for label, c in other.labels.items():
+            self.labels[label] = self.labels.get(label, 0) + c
+        for label, e in other.engagement_by_label.items():
+            self.engagement_by_label[label] = self.engagement_by_label.get(label, 0) + e
+        self.engagement_sum += other.engagement_sum
+        self.weighted_sum += other.weighted_sum
+        self.weight_total += other.weight_total
+        self.digest.merge(other.digest)
+        return self
+
+    @classmethod
+    def merged(cls, aggregates: Iterable["SentimentAggregate"]) -> "SentimentAggregate":
+        """Nuevo agregado con la combinación de varios."""
+        out = cls()
+        for agg in aggregates:
+            out.merge(agg)
+        return out
+
+    @property
+    def variance(self) -> float:
+        """Varianza muestral (n - 1)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def weighted_mean(self) -> float:
+        """Compound medio ponderado por engagement (1 + likes)."""
+        return self.weighted_sum / self.weight_total if self.weight_total > 0 else self.mean
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.digest.quantile(q)
+
+    def boxplot_stats(self) -> Dict[str, Any]:
+        """Cuartiles y bigotes (1.5 IQR, acotados al mínimo y máximo) desde el t-digest."""
+        if not self.count:
+            return {}
+        q1, med, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        whislo = max(self.min, q1 - 1.5 * iqr)
+        whishi = min(self.max, q3 + 1.5 * iqr)
+        fliers = []
+        if self.min < whislo:
+            fliers.append(self.min)
+        if self.max > whishi:
+            fliers.append(self.max)
+        return {"q1": q1, "med": med, "q3": q3, "whislo": whislo, "whishi": whishi, "fliers": fliers}
+
+    def summary(self, ndigits: int = 3) -> Dict[str, Any]:
+        """Resumen para JSON: media, dispersión, percentiles y caja del boxplot."""
+        if not self.count:
+            return {"count": 0}
+        box = self.boxplot_stats()
+        # + 0.0: un percentil interpolado a un lado de 0 no debe salir como -0.0
+        r = lambda x: round(x, ndigits) + 0.0  # noqa: E731
+        return {
+            "count": self.count,
+            "mean": r(self.mean),
+            "std": r(self.std),
+            "min": r(self.min),
+            "p10": r(self.quantile(0.10)),
+            "p25": r(box["q1"]),
+            "median": r(box["med"]),
+            "p75": r(box["q3"]),
+            "p90": r(self.quantile(0.90)),
+            "max": r(self.max),
+            "whisker_low": r(box["whislo"]),
+            "whisker_high": r(box["whishi"]),
+            "mean_weighted_engagement": r(self.weighted_mean),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Estado completo (para guardar y volver a combinar más tarde)."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "labels": dict(self.labels),
+            "engagement_sum": self.engagement_sum,
+            "engagement_by_label": dict(self.engagement_by_label),
+            "weighted_sum": self.weighted_sum,
+            "weight_total": self.weight_total,
+            "digest": self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "SentimentAggregate":
+        agg = cls()
+        agg.count = int(d.get("count", 0))
+        agg.sum = float(d.get("sum", 0.0))
+        agg.mean = float(d.get("mean", 0.0))
+        agg.m2 = float(d.get("m2", 0.0))
+        if agg.count:
+            agg.min = d["min"]
+            agg.max = d["max"]
+        agg.labels.update(d.get("labels", {}))
+        agg.engagement_sum = d.get("engagement_sum", 0)
+        agg.engagement_by_label.update(d.get("engagement_by_label", {}))
+        agg.weighted_sum = float(d.get("weighted_sum", 0.0))
+        agg.weight_total = float(d.get("weight_total", 0.0))
+        if "digest" in d:
+            agg.digest = TDigest.from_dict(d["digest"])
+        return agg
@@ -0,0 +1,102 @@
+"""
+Contexto compartido de una ejecución de run_analysis.py.
+
+Cada etapa (insights, sentimiento, temático, informe por fuente, series
+temporales) cargaba por su cuenta el dataset limpio y, para reutilizar los
+scores, también reviews_con_sentimiento.json: en datasets grandes se iba
+más tiempo en parsear JSON que en analizar. AnalysisContext carga cada cosa
+una sola vez, al pedirla, y la comparte entre etapas:
+
+  - data: el dataset limpio (o los datos crudos si no hay data/clean/)
+  - scored(): el mismo dataset con el sentimiento de cada reseña; si la
+    etapa de sentimiento ya corrió en esta ejecución no se lee nada más
+  - cube: el cubo de agregados (cube.py) que dejó la etapa de sentimiento
+    o el guardado, si corresponde al dataset actual
+  - corpus_for(reviews): tokens de esas reseñas (corpus.py), una vez por
+    conjunto de textos
+  - retrain_models: con --force, los modelos guardados entre ejecuciones
+    (tópicos NMF, topics.py) se entrenan desde cero
+
+Todas las funciones run_* aceptan ctx=None y entonces cargan sus datos
+como antes, así que siguen pudiendo ejecutarse por separado.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.analysis.cube import AggregateCube, load_cube
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CLEAN_PATH = PROJECT_ROOT / "data" / "clean" / "reviews_f1_clean.json"
+
+
+class AnalysisContext:
+    """Datos y estructuras derivadas compartidos por las etapas de análisis."""
+
+    def __init__(self, clean_path: Path = CLEAN_PATH, retrain_models: bool = False):
+        self.clean_path = clean_path
+        self.retrain_models = retrain_models
+        self._data: Optional[Dict[str, Any]] = None
+        self._scored = False
+        self._load_stats: Dict[str, int] = {}
+        self._cube: Optional[AggregateCube] = None
+        self._corpora: Dict[str, Any] = {}
+
+    @property
+    def has_clean_data(self) -> bool:
+        return self.clean_path.exists()
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Dataset limpio (los datos crudos si no existe), leído una vez."""
+        if self._data is None:
+            if self.has_clean_data:
+                with open(self.clean_path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            else:
+                from src.cleaning.pipeline import load_raw_data
+
+                self._data = load_raw_data()
+        return self._data
+
+    @property
+    def reviews(self) -> List[Dict]:
+        return self.data.get("reviews", [])
+
+    def scored(self) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        (data, {"scored": n, "reused": m}) con sentiment en todas las reseñas,
+        como load_scored_reviews(); la primera llamada reutiliza los scores
+        guardados y las siguientes no leen ni puntúan nada.
+        """
+        if not self._scored:
+            from src.analysis.sentiment import attach_scores
+
+            self._load_stats = attach_scores(self.data)
+            self._scored = True
+        return self.data, self._load_stats
+
+    def set_scored(self, cube: Optional[AggregateCube] = None) -> None:
+        """Lo llama la etapa de sentimiento tras puntuar todas las reseñas de data."""
+        self._scored = True
+        self._load_stats = {"scored": 0, "reused": len(self.reviews)}
+        if cube is not None:
+            self._cube = cube
+
+    @property
+    def cube(self) -> AggregateCube:
+        """Cubo de la etapa de sentimiento, el guardado si está al día o uno nuevo."""
+        if self._cube is None:
+            self._cube = load_cube(lambda: self.scored()[0])
+        return self._cube
+
+    def corpus_for(self, reviews: Sequence[Dict]):
+        """TokenCorpus del content de reviews (corpus.py), memorizado por textos."""
+        from src.analysis.corpus import corpus_key, load_or_build
+
+        texts = [r.get("content") or "" for r in reviews]
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        key = corpus_key(texts)
+        if key not in self._corpora:
+            self._corpora[key] = load_or_build(texts)
+        return self._corpora[key]
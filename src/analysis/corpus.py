@@ -0,0 +1,158 @@
+"""
+Corpus pre-tokenizado compartido (vocabulario + IDs int32 + offsets).
+
+thematic.py y sentiment_sources_report.py tokenizaban el mismo texto varias
+veces (palabras, bigramas, por fuente, wordclouds) con las mismas regex.
+Aquí cada reseña se tokeniza una sola vez:
+
+    vocab    lista de términos; el ID de un término es su posición
+    ids      int32, los tokens de todos los textos seguidos
+    offsets  int64, los tokens del texto i son ids[offsets[i]:offsets[i + 1]]
+
+El artefacto se guarda en .cache/corpus/tokens_<clave>.npz. La clave es un
+hash de los textos y de la versión del tokenizador (regex + stopwords): si
+no cambia nada, la siguiente ejecución lo carga sin pasar ninguna regex.
+"""
+import hashlib
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.stopwords_social import SOCIAL_STOP_WORDS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CORPUS_DIR = PROJECT_ROOT / ".cache" / "corpus"
+# Artefactos que se conservan (los más recientes)
+MAX_ARTIFACTS = 8
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+|\b\w+\.(?:com|org|net)\b", re.I)
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^\)]+\)")
+_WORD_RE = re.compile(r"\b[a-zA-Z]{3,}\b")
+_NUMERIC_RE = re.compile(r"^\d+$")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Palabras relevantes de un texto: ≥3 letras, en minúsculas, sin URLs ni
+    stopwords (EN/ES/cine, ver stopwords_social.py).
+    """
+    if not text or not isinstance(text, str):
+        return []
+    text = _URL_RE.sub(" ", text)
+    text = _MD_LINK_RE.sub(r"\1", text)
+    words = _WORD_RE.findall(text.lower())
+    return [w for w in words if w not in SOCIAL_STOP_WORDS and not _NUMERIC_RE.match(w)]
+
+
+def tokenizer_version() -> str:
+    """Cambia si cambian las regex o las stopwords."""
+    payload = "|".join(
+        [_URL_RE.pattern, _MD_LINK_RE.pattern, _WORD_RE.pattern, _NUMERIC_RE.pattern]
+        + sorted(SOCIAL_STOP_WORDS)
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class TokenCorpus:
+    """Textos tokenizados en forma compacta; el índice i es el del texto i."""
+
+    def __init__(self, vocab: List[str], ids: np.ndarray, offsets: np.ndarray):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self._vocab_arr = np.array(vocab, dtype=object)
+        self._index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def term_index(self) -> Dict[str, int]:
+        """Término -> ID."""
+        if self._index is None:
+            self._index = {t: i for i, t in enumerate(self.vocab)}
+        return self._index
+
+    def doc_ids(self, i: int) -> np.ndarray:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def tokens(self, i: int) -> List[str]:
+        """Tokens del texto i (mismo resultado que tokenize(texto))."""
+        return self._vocab_arr[self.doc_ids(i)].tolist()
+
+    def bigrams(self, i: int) -> List[Tuple[str, str]]:
+        """Pares de tokens consecutivos del texto i."""
+        toks = self.tokens(i)
+        return list(zip(toks, toks[1:]))
+
+    def iter_tokens(self) -> Iterator[List[str]]:
+        for i in range(len(self)):
+            yield self.tokens(i)
+
+    @classmethod
+    def build(cls, texts: Sequence[str]) -> "TokenCorpus":
+        vocab: List[str] = []
+        index: Dict[str, int] = {}
+        ids = array("i")
+        offsets = array("q", [0])
+        for text in texts:
+            for w in tokenize(text):
+                j = index.get(w)
+                if j is None:
+                    j = index[w] = len(vocab)
+                    vocab.append(w)
+                ids.append(j)
+            offsets.append(len(ids))
+        corpus = cls(vocab, np.array(ids, dtype=np.int32), np.array(offsets, dtype=np.int64))
+        corpus._index = index
+        return corpus
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(tmp, vocab=np.array(self.vocab, dtype=str), ids=self.ids, offsets=self.offsets)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TokenCorpus":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["vocab"].tolist(), z["ids"], z["offsets"])
+
+
+def corpus_key(texts: Sequence[str]) -> str:
+    h = hashlib.blake2b(tokenizer_version().encode("utf-8"), digest_size=16)
+    for t in texts:
+        h.update((t or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def load_or_build(texts: Sequence[str], cache_dir: Optional[Path] = None) -> TokenCorpus:
+    """
+    TokenCorpus de los textos dados: desde .cache/corpus/ si ya existe para
+    exactamente estos textos, o tokenizado ahora y guardado.
+    """
+    texts = [t if isinstance(t, str) else "" for t in texts]
+    path = Path(cache_dir or CORPUS_DIR) / f"tokens_{corpus_key(texts)}.npz"
+    if path.exists():
+        try:
+            return TokenCorpus.load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+    corpus = TokenCorpus.build(texts)
+    try:
+        corpus.save(path)
+        old = sorted(path.parent.glob("tokens_*.npz"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in old[MAX_ARTIFACTS:]:
+            stale.unlink(missing_ok=True)
+    except OSError:
+        pass
+    return corpus
+
+
+def corpus_for_reviews(reviews: Sequence[Dict], cache_dir: Optional[Path] = None) -> TokenCorpus:
+    """Corpus del campo content de cada reseña (índice = posición en reviews)."""
+    return load_or_build([r.get("content") or "" for r in reviews], cache_dir)
@@ -0,0 +1,237 @@
+"""
+Cubo de agregados (fuente × vídeo × etiqueta) compartido por los informes.
+
+Los insights básicos, los de sentimiento, el análisis temático y el informe
+por fuente contaban lo mismo (reseñas, etiquetas, compound, engagement por
+fuente) recorriendo cada uno todas las reseñas. El cubo se materializa una
+sola vez, en la etapa de sentimiento, con una celda por combinación
+(fuente, video_id, etiqueta):
+
+  - un SentimentAggregate (conteo, compound medio/varianza, engagement,
+    t-digest para percentiles; ver aggregates.py)
+  - longitud del contenido (suma, mínimo, máximo de las reseñas con texto)
+  - los primeros textos de ejemplo (> 20 caracteres) de la celda
+
+Los informes agrupan celdas con rollup() (por fuente, por etiqueta, por
+fuente + vídeo, ...), que combina los agregados con merge(): son unas pocas
+decenas de celdas en lugar de todas las reseñas. Las medias, conteos y
+sumas son exactos; los percentiles de un grupo salen de combinar los
+t-digest de sus celdas (misma aproximación que el modo incremental).
+
+El cubo se guarda en output/insights/aggregate_cube.json con la huella del
+dataset limpio y de la versión del léxico; load_cube() lo reutiliza si
+corresponde a los datos actuales y si no lo construye en una pasada.
+"""
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.analysis.aggregates import LABELS, SentimentAggregate
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
+OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
+CUBE_PATH = OUTPUT_INSIGHTS / "aggregate_cube.json"
+
+# Textos de ejemplo por celda (informe por fuente: 5 por fuente y etiqueta)
+MAX_SAMPLES = 5
+MIN_SAMPLE_LEN = 20
+SAMPLE_CHARS = 300
+
+CellKey = Tuple[str, str, str]
+
+
+def _get_engagement(r: Dict) -> int:
+    for key in ("likes", "helpful_votes"):
+        v = r.get(key)
+        if v is not None:
+            try:
+                return int(v)
+            except (ValueError, TypeError):
+                pass
+    return 0
+
+
+class CubeCell:
+    """Agregados de un grupo de reseñas: sentimiento, longitudes y textos de ejemplo."""
+
+    def __init__(self):
+        self.sentiment = SentimentAggregate()
+        self.length_sum = 0
+        self.length_count = 0
+        self.length_min = math.inf
+        self.length_max = 0
+        self.samples: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return self.sentiment.count
+
+    @property
+    def engagement(self) -> int:
+        return self.sentiment.engagement_sum
+
+    def add(self, r: Dict) -> None:
+        sent = r.get("sentiment", {})
+        self.sentiment.add(sent.get("compound", 0.0), sent.get("label", "neutral"), _get_engagement(r))
+        if r.get("content"):
+            n = len(str(r["content"]))
+            self.length_sum += n
+            self.length_count += 1
+            self.length_min = min(self.length_min, n)
+            self.length_max = max(self.length_max, n)
+        content = (r.get("content") or "").strip()
+        if len(content) > MIN_SAMPLE_LEN and len(self.samples) < MAX_SAMPLES:
+            self.samples.append(content[:SAMPLE_CHARS])
+
+    def merge(self, other: "CubeCell") -> "CubeCell":
+        """Combina otra celda (in-place); los ejemplos de self van primero."""
+        self.sentiment.merge(other.sentiment)
+        self.length_sum += other.length_sum
+        self.length_count += other.length_count
+        self.length_min = min(self.length_min, other.length_min)
+        self.length_max = max(self.length_max, other.length_max)
+        self.samples.extend(other.samples[: MAX_SAMPLES - len(self.samples)])
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sentiment": self.sentiment.to_dict(),
+            "length": [self.length_sum, self.length_count, self.length_min if self.length_count else None, self.length_max],
+            "samples": self.samples,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CubeCell":
+        cell = cls()
+        cell.sentiment = SentimentAggregate.from_dict(d["sentiment"])
+        cell.length_sum, cell.length_count, length_min, cell.length_max = d["length"]
+        cell.length_min = math.inf if length_min is None else length_min
+        cell.samples = list(d.get("samples", []))
+        return cell
+
+
+class AggregateCube:
+    """
+    Celdas (fuente, video_id, etiqueta) -> CubeCell, en orden de primera
+    aparición (los informes listan las fuentes en ese orden).
+    """
+
+    def __init__(self, fingerprint: Optional[str] = None):
+        self.fingerprint = fingerprint
+        self.total_reviews = 0
+        self.cells: Dict[CellKey, CubeCell] = {}
+
+    @staticmethod
+    def key(r: Dict) -> CellKey:
+        label = (r.get("sentiment") or {}).get("label", "neutral")
+        return r.get("source", "Unknown"), str(r.get("video_id") or ""), label
+
+    def add(self, r: Dict) -> None:
+        key = self.key(r)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = CubeCell()
+        cell.add(r)
+        self.total_reviews += 1
+
+    @classmethod
+    def build(cls, reviews: Iterable[Dict], fingerprint: Optional[str] = None) -> "AggregateCube":
+        """Cubo de reseñas (puntuadas o no: sin sentiment cuentan como neutral) en una pasada."""
+        cube = cls(fingerprint)
+        for r in reviews:
+            cube.add(r)
+        return cube
+
+    def merge(self, other: "AggregateCube") -> "AggregateCube":
+        """Añade las celdas de otro cubo (in-place) y devuelve self."""
+        for key, cell in other.cells.items():
+            if key in self.cells:
+                self.cells[key].merge(cell)
+            else:
+                self.cells[key] = CubeCell().merge(cell)
+        self.total_reviews += other.total_reviews
+        return self
+
+    def rollup(self, key_fn: Callable[[CellKey], Hashable]) -> Dict[Hashable, CubeCell]:
+        """Celdas combinadas por key_fn(clave de celda), en orden de primera aparición."""
+        out: Dict[Hashable, CubeCell] = {}
+        for key, cell in self.cells.items():
+            group = key_fn(key)
+            if group not in out:
+                out[group] = CubeCell()
+            out[group].merge(cell)
+        return out
+
+    def by_source(self) -> Dict[str, CubeCell]:
+        return self.rollup(lambda k: k[0])
+
+    def by_label(self) -> Dict[str, CubeCell]:
+        """Una celda por etiqueta (siempre las tres, aunque estén vacías)."""
+        groups = self.rollup(lambda k: k[2])
+        return {label: groups.get(label, CubeCell()) for label in LABELS}
+
+    def total(self) -> CubeCell:
+        return self.rollup(lambda k: None).get(None, CubeCell())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "total_reviews": self.total_reviews,
+            "cells": [[*key, cell.to_dict()] for key, cell in self.cells.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "AggregateCube":
+        cube = cls(d.get("fingerprint"))
+        cube.total_reviews = int(d.get("total_reviews", 0))
+        cube.cells = {(c[0], c[1], c[2]): CubeCell.from_dict(c[3]) for c in d.get("cells", [])}
+        return cube
+
+    def save(self, path: Path = CUBE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = CUBE_PATH) -> Optional["AggregateCube"]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return None
+
+
+def data_fingerprint(path: Path = DATA_CLEAN / "reviews_f1_clean.json") -> Optional[str]:
+    """Huella del dataset limpio + versión de los scores (léxico y motor; None si no hay dataset)."""
+    from src.analysis.sentiment import scores_version
+    from src.dag import file_digest
+
+    digest = file_digest(path)
+    return None if digest is None else f"{digest}:{scores_version()}"
+
+
+def load_cube(loader: Optional[Callable[[], Dict[str, Any]]] = None) -> AggregateCube:
+    """
+    Cubo guardado por la etapa de sentimiento si corresponde al dataset
+    limpio actual; si no, se construye en una pasada con los datos de
+    loader() (por defecto load_scored_reviews()). loader solo se llama si
+    hace falta.
+    """
+    fingerprint = data_fingerprint()
+    cube = AggregateCube.load()
+    if cube is not None and fingerprint is not None and cube.fingerprint == fingerprint:
+        return cube
+    if loader is None:
+        from src.analysis.sentiment import load_scored_reviews
+
+        data, _ = load_scored_reviews()
+    else:
+        data = loader()
+    return AggregateCube.build(data.get("reviews", []))
@@ -0,0 +1,135 @@
+"""
+Términos distintivos entre cortes del corpus (etiquetas, fuentes, vídeos).
+
+En lugar de restar conjuntos de top-50, se puntúa todo el vocabulario a la
+vez con arrays de NumPy sobre la matriz documento-término (dtm.py):
+
+  - log_odds (por defecto): log-odds ponderado con prior de Dirichlet
+    informativo (Monroe, Colaresi y Quinn, 2008). El prior de cada término
+    es su frecuencia en todo el corpus × PRIOR_SCALE, así que las palabras
+    raras no dominan por azar. La puntuación es el z-score del log-odds:
+
+        δ = log((y_a + α) / (n_a + α0 - y_a - α)) - log((y_b + α) / (n_b + α0 - y_b - α))
+        z = δ / sqrt(1 / (y_a + α) + 1 / (y_b + α))
+
+  - tfidf: diferencia de frecuencias relativas × idf (documentos = reseñas).
+
+Cada comparación es una columna: y_a son las frecuencias del corte (Xᵀ·w
+con su indicador) e y_b las del resto o las de otro corte, de modo que
+"cada fuente frente al resto" es una sola operación sobre una matriz
+términos × fuentes. Ambas puntuaciones son antisimétricas: los términos
+distintivos de B frente a A son los de menor puntuación de A frente a B.
+
+DISTINCTIVE_METHOD=tfidf cambia el método por defecto.
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.dtm import DocumentTermMatrix
+
+DEFAULT_METHOD = os.environ.get("DISTINCTIVE_METHOD", "log_odds")
+# α = frecuencia en todo el corpus × PRIOR_SCALE
+PRIOR_SCALE = 1.0
+# Un término solo se lista si aparece al menos estas veces en el corte
+MIN_COUNT = 3
+TOP_N = 15
+
+
+def log_odds_dirichlet(y_a: np.ndarray, y_b: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """
+    z-score del log-odds con prior de Dirichlet informativo. y_a, y_b:
+    términos (× comparaciones); prior: α por término (> 0).
+    """
+    alpha = prior.reshape(prior.shape[0], *([1] * (y_a.ndim - 1)))
+    alpha0 = prior.sum()
+    n_a = y_a.sum(axis=0)
+    n_b = y_b.sum(axis=0)
+    a = y_a + alpha
+    b = y_b + alpha
+    delta = np.log(a / (n_a + alpha0 - a)) - np.log(b / (n_b + alpha0 - b))
+    return delta / np.sqrt(1.0 / a + 1.0 / b)
+
+
+def tfidf_contrast(y_a: np.ndarray, y_b: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    """(tf_a - tf_b) × idf, con tf = frecuencia relativa dentro del corte."""
+    idf = idf.reshape(idf.shape[0], *([1] * (y_a.ndim - 1)))
+    tf_a = y_a / np.maximum(y_a.sum(axis=0), 1)
+    tf_b = y_b / np.maximum(y_b.sum(axis=0), 1)
+    return (tf_a - tf_b) * idf
+
+
+def document_idf(dtm: DocumentTermMatrix) -> np.ndarray:
+    """idf suavizado: log((1 + N) / (1 + df)) + 1, con df = reseñas que contienen el término."""
+    df = np.bincount(dtm.indices, minlength=dtm.n_terms)
+    return np.log((1 + dtm.n_docs) / (1 + df)) + 1
+
+
+def score(
+    dtm: DocumentTermMatrix,
+    y_a: np.ndarray,
+    y_b: np.ndarray,
+    method: Optional[str] = None,
+    prior_scale: float = PRIOR_SCALE,
+) -> np.ndarray:
+    """Puntuación de todos los términos (y todas las columnas) de A frente a B."""
+    method = method or DEFAULT_METHOD
+    if method == "tfidf":
+        return tfidf_contrast(y_a, y_b, document_idf(dtm))
+    if method != "log_odds":
+        raise ValueError(f"Método desconocido: {method}")
+    background = dtm.frequencies()
+    prior = np.maximum(background * prior_scale, 1e-3)
+    return log_odds_dirichlet(y_a, y_b, prior)
+
+
+def top_terms(
+    dtm: DocumentTermMatrix,
+    scores: np.ndarray,
+    counts: np.ndarray,
+    n: int = TOP_N,
+    min_count: int = MIN_COUNT,
+) -> List[Dict[str, Any]]:
+    """Los n términos con mayor puntuación positiva y al menos min_count apariciones."""
+    cand = np.flatnonzero((counts >= min_count) & (scores > 0))
+    order = cand[np.lexsort((cand, -scores[cand]))][:n]
+    return [
+        {"term": dtm.terms[j], "score": round(float(scores[j]), 3), "count": int(counts[j])}
+        for j in order
+    ]
+
+
+def contrast(
+    dtm: DocumentTermMatrix,
+    mask_a: Sequence[bool],
+    mask_b: Sequence[bool],
+    method: Optional[str] = None,
+    n: int = TOP_N,
+    min_count: int = MIN_COUNT,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Términos distintivos de A frente a B y de B frente a A."""
+    y_a = dtm.frequencies(mask_a)
+    y_b = dtm.frequencies(mask_b)
+    s = score(dtm, y_a, y_b, method)
+    return top_terms(dtm, s, y_a, n, min_count), top_terms(dtm, -s, y_b, n, min_count)
+
+
+def slices_vs_rest(
+    dtm: DocumentTermMatrix,
+    slices: Dict[str, Sequence[bool]],
+    method: Optional[str] = None,
+    n: int = TOP_N,
+    min_count: int = MIN_COUNT,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Cada corte (máscara de documentos) frente al resto del corpus, con una
+    sola matriz términos × cortes.
+    """
+    if not slices:
+        return {}
+    names = list(slices)
+    y = np.column_stack([dtm.frequencies(slices[name]) for name in names])
+    rest = dtm.frequencies()[:, None] - y
+    s = score(dtm, y, rest, method)
+    return {name: top_terms(dtm, s[:, j], y[:, j], n, min_count) for j, name in enumerate(names)}
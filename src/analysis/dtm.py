@@ -0,0 +1,206 @@
+"""
+Matriz documento-término dispersa (CSR) para frecuencias de palabras y bigramas.
+
+Sobre el corpus pre-tokenizado (corpus.py) se construye una matriz X de
+documentos × términos en formato CSR con NumPy:
+
+    indptr   int64, las entradas del documento i son [indptr[i], indptr[i + 1])
+    indices  int32, ID del término de cada entrada
+    data     int32, veces que aparece el término en el documento
+    first    int64, posición del primer token de esa entrada en el corpus
+
+Cualquier frecuencia agregada es un producto matriz-vector Xᵀ·w con un
+vector de pesos por documento: indicador de etiqueta o de fuente, 1 +
+engagement, o el producto de ambos. Un nuevo corte (por vídeo, por fecha...)
+es otro vector, sin más bucles en Python.
+
+top() ordena por frecuencia y desempata por la primera aparición del término
+en los documentos seleccionados, igual que Counter.most_common() al contar
+los documentos en orden. term_matrix() elige entre esta matriz exacta y el
+conteo aproximado con memoria acotada de heavy_hitters.py (TOP_TERMS_MODE).
+"""
+import weakref
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.corpus import TokenCorpus
+
+# Matrices ya construidas por corpus, {clave: DocumentTermMatrix} (se liberan con el corpus)
+_MATRICES: "weakref.WeakKeyDictionary[TokenCorpus, dict]" = weakref.WeakKeyDictionary()
+
+
+class DocumentTermMatrix:
+    """Matriz CSR documentos × términos con la posición de primera aparición."""
+
+    def __init__(
+        self,
+        terms: List[Any],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        first: np.ndarray,
+    ):
+        self.terms = terms
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.first = first
+        self._rows: Optional[np.ndarray] = None
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.terms)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Documento de cada entrada (expansión de indptr)."""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n_docs, dtype=np.int64), np.diff(self.indptr))
+        return self._rows
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, positions: np.ndarray, doc_of: np.ndarray, n_docs: int, terms: List[Any]):
+        """
+        Construye la matriz a partir de ocurrencias: término, posición en el
+        corpus y documento de cada una (ordenadas por posición).
+        """
+        n_terms = max(len(terms), 1)
+        keys = doc_of.astype(np.int64) * n_terms + codes
+        uniq, idx, counts = np.unique(keys, return_index=True, return_counts=True)
+        row = uniq // n_terms
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row, minlength=n_docs), out=indptr[1:])
+        return cls(
+            terms,
+            indptr,
+            (uniq % n_terms).astype(np.int32),
+            counts.astype(np.int32),
+            positions[idx].astype(np.int64),
+        )
+
+    def frequencies(self, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """
+        Xᵀ·w: frecuencia de cada término sumando los documentos con su peso
+        (sin pesos, todos cuentan 1). Con un indicador 0/1 es un conteo por grupo.
+        """
+        if weights is None:
+            vals = self.data
+        else:
+            vals = self.data * np.asarray(weights, dtype=np.float64)[self.rows]
+        return np.bincount(self.indices, weights=vals, minlength=self.n_terms)
+
+    def first_seen(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Primera posición de cada término en los documentos seleccionados (máscara)."""
+        out = np.full(self.n_terms, np.iinfo(np.int64).max, dtype=np.int64)
+        if rows is None:
+            np.minimum.at(out, self.indices, self.first)
+        else:
+            sel = np.asarray(rows, dtype=bool)[self.rows]
+            np.minimum.at(out, self.indices[sel], self.first[sel])
+        return out
+
+    def top(
+        self,
+        freqs: np.ndarray,
+        n: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[Any, float]]:
+        """
+        Los n términos con más frecuencia (todos si n es None), como pares
+        (término, frecuencia). rows: máscara de los documentos que generaron
+        freqs, para desempatar por primera aparición en ellos.
+        """
+        nz = np.flatnonzero(freqs > 0)
+        order = np.lexsort((self.first_seen(rows)[nz], -freqs[nz]))
+        if n is not None:
+            order = order[:n]
+        picked = nz[order]
+        return [(self.terms[j], freqs[j].item()) for j in picked]
+
+    def most_common(self, weights: Optional[Sequence[float]] = None, n: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Como Counter.most_common(n) de los documentos con peso > 0."""
+        rows = None if weights is None else np.asarray(weights, dtype=np.float64) > 0
+        return self.top(self.frequencies(weights), n, rows)
+
+
+def indicator(values: Sequence[Any], *targets: Any) -> np.ndarray:
+    """Vector 0/1 por documento: 1 si su valor está entre targets."""
+    arr = np.asarray(values, dtype=object)
+    mask = np.zeros(len(arr), dtype=bool)
+    for t in targets:
+        mask |= arr == t
+    return mask
+
+
+def _doc_of_positions(corpus: TokenCorpus) -> np.ndarray:
+    return np.repeat(np.arange(len(corpus), dtype=np.int64), np.diff(corpus.offsets))
+
+
+def unigram_matrix(corpus: TokenCorpus) -> DocumentTermMatrix:
+    """Matriz de palabras del corpus (términos = vocabulario del corpus)."""
+    cached = _MATRICES.setdefault(corpus, {})
+    if "unigrams" not in cached:
+        positions = np.arange(len(corpus.ids), dtype=np.int64)
+        cached["unigrams"] = DocumentTermMatrix.from_codes(
+            corpus.ids.astype(np.int64), positions, _doc_of_positions(corpus), len(corpus), list(corpus.vocab)
+        )
+    return cached["unigrams"]
+
+
+def ngram_matrix(corpus: TokenCorpus, n: int = 2, stop_phrases: Iterable[str] = ()) -> DocumentTermMatrix:
+    """
+    Matriz de n-gramas (n palabras consecutivas de la misma reseña) con los
+    IDs empaquetados de ngrams.py; los términos son tuplas de palabras y solo
+    se decodifican al pedirlos. stop_phrases: frases cuyos n-gramas no cuentan.
+    """
+    from src.analysis.ngrams import NgramTerms, index_for
+
+    stop_phrases = tuple(sorted(stop_phrases))
+    cached = _MATRICES.setdefault(corpus, {})
+    key = ("ngrams", n, stop_phrases)
+    if key not in cached:
+        index = index_for(corpus, max(n, 2))
+        gid = index.ids_at(n)
+        valid = gid >= 0
+        if stop_phrases:
+            valid &= ~index.stop_mask(n, stop_phrases)
+        positions = np.flatnonzero(valid)
+        cached[key] = DocumentTermMatrix.from_codes(
+            gid[positions].astype(np.int64), positions, index.doc_of[positions], len(corpus), NgramTerms(index, n)
+        )
+    return cached[key]
+
+
+def bigram_matrix(corpus: TokenCorpus, stop_phrases: Iterable[str] = ()) -> DocumentTermMatrix:
+    """Matriz de bigramas, con términos (palabra1, palabra2)."""
+    return ngram_matrix(corpus, 2, stop_phrases)
+
+
+def term_matrix(
+    corpus: TokenCorpus,
+    ngram: int = 1,
+    stop_phrases: Iterable[str] = (),
+    mode: Optional[str] = None,
+):
+    """
+    Fuente de top-N para palabras (ngram=1) o n-gramas (ngram=2..4), con
+    most_common(weights, n). mode: "exact" (esta matriz) o "approx"
+    (Space-Saving con memoria acotada, ver heavy_hitters.py); por defecto
+    TOP_TERMS_MODE.
+    """
+    from src.analysis.heavy_hitters import DEFAULT_MODE, HeavyHitterTerms
+
+    if (mode or DEFAULT_MODE) == "approx":
+        return HeavyHitterTerms(corpus, ngram, stop_phrases)
+    if ngram == 1:
+        return unigram_matrix(corpus)
+    return ngram_matrix(corpus, ngram, stop_phrases)
@@ -0,0 +1,597 @@
+"""
+Motor vectorizado compatible con VADER (NumPy).
+
+SentimentIntensityAnalyzer.polarity_scores aplica en Python, token a token,
+las reglas de boosters, negaciones, "but", mayúsculas e idioms, y traduce
+emojis carácter a carácter. Este módulo hace lo mismo en dos fases:
+
+1. encode(texts): un único split de todo el lote y conversión de cada token
+   a un ID. Cada token distinto se procesa una sola vez (limpieza de
+   puntuación como SentiText, traducción de emojis) y queda memorizado.
+2. score_encoded(batch): las reglas de VADER se evalúan a la vez sobre los
+   tokens del léxico de todo el lote (vecinos i-1, i-2, i-3 e i+1, i+2
+   leídos del array plano de IDs), y las sumas por texto se hacen con
+   np.bincount.
+
+El léxico (VADER + MOVIE_HYPE_LEXICON) se precompila en arrays indexados por
+ID. Las constantes y reglas se leen del paquete vaderSentiment instalado, así
+que la salida coincide con polarity_scores (ver check_conformance()).
+
+Uso:
+    python -m src.analysis.fast_vader          # conformidad + benchmark sobre data/clean/
+"""
+import math
+import re
+import string
+import time
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+try:
+    from vaderSentiment import vaderSentiment as _vs
+    HAS_VADER = True
+except ImportError:
+    HAS_VADER = False
+
+# Subir con cada cambio que pueda alterar algún score: invalida la caché de
+# scores y el cubo guardado (sentiment.scores_version)
+ENGINE_VERSION = 1
+
+# Separador de textos dentro de un lote (carácter de uso privado) y su ID
+_DOC_SEP = "\ue000"
+_SEP_ID = -2
+# Sustituto del separador si aparece dentro de un texto
+_SEP_ESCAPE = "\ue001"
+# IDs <= _EXP_BASE: tokens con emojis (índice en la tabla de expansiones)
+_EXP_BASE = -3
+
+# Palabras con papel propio en las reglas (se registran siempre en el vocabulario)
+_RULE_WORDS = (
+    "no", "or", "nor", "kind", "of", "least", "at", "very", "never", "so",
+    "this", "without", "doubt", "but",
+)
+
+
+def _char_class_regex(chars) -> "re.Pattern":
+    """Regex [..] con los caracteres agrupados en rangos (mucho más rápida que
+    una clase con miles de literales sueltos)."""
+    runs: List[List[int]] = []
+    for c in sorted(ord(ch) for ch in chars):
+        if runs and c == runs[-1][1] + 1:
+            runs[-1][1] = c
+        else:
+            runs.append([c, c])
+    parts = [
+        re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}"
+        for a, b in runs
+    ]
+    return re.compile("[" + "".join(parts) + "]")
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> List[float]:
+    """
+    round(x, ndigits) de Python para cada valor. np.round coincide salvo
+    cerca de un empate (x * 10**ndigits acabado en ~.5): esos casos se
+    redondean con round().
+    """
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    out = np.rint(scaled) / scale
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    for i in np.flatnonzero(frac < 1e-6).tolist():
+        out[i] = round(float(values[i]), ndigits)
+    return out.tolist()
+
+
+class EncodedBatch(NamedTuple):
+    """Lote tokenizado: IDs planos, offsets por texto y signos de puntuación."""
+
+    ids: np.ndarray        # int32, IDs de forma de todos los tokens
+    offsets: np.ndarray    # int64, len = n_textos + 1
+    excl: np.ndarray       # int64, número de "!" por texto
+    quest: np.ndarray      # int64, número de "?" por texto
+
+
+class FastVader:
+    """
+    Analizador vectorizado. Construir con FastVader.from_analyzer(analyzer)
+    para reutilizar el léxico (ya ampliado con MOVIE_HYPE_LEXICON) y los emojis.
+    """
+
+    def __init__(self, lexicon: Dict[str, float], emojis: Dict[str, str]):
+        if not HAS_VADER:
+            raise ImportError("Instala vaderSentiment: pip install vaderSentiment")
+        self.lexicon = dict(lexicon)
+        self.emojis = {k: v for k, v in emojis.items() if len(k) == 1}
+        self._emoji_re = _char_class_regex(self.emojis) if self.emojis else None
+        self._punct = string.punctuation
+
+        # Vocabulario de formas (token tras quitar puntuación, con mayúsculas)
+        self._raw_to_form: Dict[str, int] = {_DOC_SEP: _SEP_ID}
+        self._form_to_id: Dict[str, int] = {}
+        self._form_low: List[int] = []
+        self._form_upper: List[bool] = []
+        # Vocabulario en minúsculas con las propiedades del léxico
+        self._low_to_id: Dict[str, int] = {}
+        self._low_in_lex: List[bool] = []
+        self._low_val: List[float] = []
+        self._low_is_boost: List[bool] = []
+        self._low_boost: List[float] = []
+        self._low_negated: List[bool] = []
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        # Tokens con emojis: se expanden a las formas de su descripción
+        self._exp_ids: List[np.ndarray] = []
+        self._exp_excl: List[int] = []
+        self._exp_quest: List[int] = []
+
+        for w in self.lexicon:
+            self._low_id(w)
+        for w in _vs.BOOSTER_DICT:
+            for part in w.split():
+                self._low_id(part)
+        for phrase in _vs.SPECIAL_CASES:
+            for part in phrase.split():
+                self._low_id(part)
+        for w in _vs.NEGATE:
+            self._low_id(w)
+        for w in _RULE_WORDS:
+            self._low_id(w)
+        self._w = {w: self._low_to_id[w] for w in _RULE_WORDS}
+        self._special = [
+            (tuple(self._low_to_id[p] for p in phrase.split()), val)
+            for phrase, val in _vs.SPECIAL_CASES.items()
+            if " " in phrase
+        ]
+        self._boost_ngrams = [
+            (tuple(self._low_to_id[p] for p in phrase.split()), val)
+            for phrase, val in _vs.BOOSTER_DICT.items()
+            if " " in phrase
+        ]
+
+    @classmethod
+    def from_analyzer(cls, analyzer) -> "FastVader":
+        return cls(analyzer.lexicon, analyzer.emojis)
+
+    # ------------------------------------------------------------------
+    # Vocabulario
+
+    def _low_id(self, low: str) -> int:
+        idx = self._low_to_id.get(low)
+        if idx is None:
+            idx = len(self._low_in_lex)
+            self._low_to_id[low] = idx
+            in_lex = low in self.lexicon
+            self._low_in_lex.append(in_lex)
+            self._low_val.append(self.lexicon[low] if in_lex else 0.0)
+            is_boost = low in _vs.BOOSTER_DICT
+            self._low_is_boost.append(is_boost)
+            self._low_boost.append(_vs.BOOSTER_DICT[low] if is_boost else 0.0)
+            self._low_negated.append(_vs.negated([low]))
+            self._arrays = None
+        return idx
+
+    def _form_id(self, raw: str) -> int:
+        stripped = raw.strip(self._punct)
+        form = raw if len(stripped) <= 2 else stripped
+        idx = self._form_to_id.get(form)
+        if idx is None:
+            idx = len(self._form_low)
+            self._form_to_id[form] = idx
+            self._form_low.append(self._low_id(form.lower()))
+            self._form_upper.append(form.isupper())
+            self._arrays = None
+        self._raw_to_form[raw] = idx
+        return idx
+
+    def _materialize(self) -> Dict[str, np.ndarray]:
+        """Arrays de propiedades; el último elemento es un centinela (ID -1)."""
+        if self._arrays is None:
+            self._arrays = {
+                "form_low": np.array(self._form_low + [-1], dtype=np.int32),
+                "form_upper": np.array(self._form_upper + [False], dtype=bool),
+                "in_lex": np.array(self._low_in_lex + [False], dtype=bool),
+                "val": np.array(self._low_val + [0.0], dtype=np.float64),
+                "is_boost": np.array(self._low_is_boost + [False], dtype=bool),
+                "boost": np.array(self._low_boost + [0.0], dtype=np.float64),
+                "negated": np.array(self._low_negated + [False], dtype=bool),
+            }
+            self._arrays["scored"] = self._arrays["in_lex"] & ~self._arrays["is_boost"]
+        return self._arrays
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self._form_low)
+
+    # ------------------------------------------------------------------
+    # Fase 1: tokenización
+
+    def _translate_emojis(self, raw: str) -> str:
+        # polarity_scores pone un espacio antes de cada descripción (salvo tras
+        # otro espacio) y pega lo que sigue; como se aplica token a token, el
+        # espacio de más no cambia el split posterior.
+        return self._emoji_re.sub(lambda m: " " + self.emojis[m.group(0)], raw)
+
+    def _token_id(self, raw: str) -> int:
+        """ID de un token nuevo; los que llevan emojis se expanden a varias formas."""
+        if raw == _DOC_SEP:
+            return _SEP_ID
+        if self._emoji_re is not None and not raw.isascii() and self._emoji_re.search(raw):
+            translated = self._translate_emojis(raw)
+            code = _EXP_BASE - len(self._exp_ids)
+            self._exp_ids.append(np.array([self._form_id(w) for w in translated.split()], dtype=np.int32))
+            self._exp_excl.append(translated.count("!") - raw.count("!"))
+            self._exp_quest.append(translated.count("?") - raw.count("?"))
+            self._raw_to_form[raw] = code
+            return code
+        return self._form_id(raw)
+
+    def encode(self, texts: Sequence[str]) -> EncodedBatch:
+        """
+        Tokeniza un lote de textos en IDs (como SentiText de VADER).
+
+        Los textos se unen con un separador propio para hacer un único split y
+        un único map sobre el vocabulario. Cada token distinto se procesa
+        (puntuación, emojis) solo la primera vez que aparece.
+        """
+        texts = [t if isinstance(t, str) else str(t) for t in texts]
+        n_docs = len(texts)
+        joined = f" {_DOC_SEP} ".join(texts)
+        if joined.count(_DOC_SEP) != max(n_docs - 1, 0):
+            # Algún texto contiene el separador: se sustituye por otro carácter
+            # de uso privado, que VADER trata igual (ni léxico ni puntuación)
+            texts = [t.replace(_DOC_SEP, _SEP_ESCAPE) for t in texts]
+            joined = f" {_DOC_SEP} ".join(texts)
+
+        tokens = joined.split()
+        ids = list(map(self._raw_to_form.get, tokens))
+        if None in ids:
+            ids = [i if i is not None else self._token_id(t) for i, t in zip(ids, tokens)]
+        raw = np.array(ids, dtype=np.int32)
+
+        is_sep = raw == _SEP_ID
+        doc_of = np.cumsum(is_sep)
+        tok_len = (~is_sep).astype(np.int64)
+        excl = np.array([t.count("!") for t in texts], dtype=np.int64)
+        quest = np.array([t.count("?") for t in texts], dtype=np.int64)
+
+        expanded = np.flatnonzero(raw <= _EXP_BASE)
+        if len(expanded):
+            codes = (_EXP_BASE - raw[expanded]).tolist()
+            parts = [self._exp_ids[c] for c in codes]
+            tok_len[expanded] = [len(p) for p in parts]
+            docs = doc_of[expanded]
+            excl += np.bincount(docs, weights=[self._exp_excl[c] for c in codes], minlength=n_docs).astype(np.int64)
+            quest += np.bincount(docs, weights=[self._exp_quest[c] for c in codes], minlength=n_docs).astype(np.int64)
+
+        flat = np.repeat(raw, tok_len)
+        if len(expanded):
+            starts = np.cumsum(tok_len) - tok_len
+            lens = tok_len[expanded]
+            within = np.arange(int(lens.sum())) - np.repeat(np.cumsum(lens) - lens, lens)
+            flat[np.repeat(starts[expanded], lens) + within] = np.concatenate(parts)
+
+        lengths = np.bincount(doc_of, weights=tok_len, minlength=n_docs).astype(np.int64)
+        offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return EncodedBatch(flat, offsets, excl, quest)
+
+    # ------------------------------------------------------------------
+    # Fase 2: reglas vectorizadas
+
+    def token_valences(self, batch: EncodedBatch) -> np.ndarray:
+        """Valencia de cada token tras todas las reglas de VADER (incluido 'but')."""
+        A = self._materialize()
+        ids, offsets = batch.ids, batch.offsets
+        n = len(ids)
+        sent = np.zeros(n, dtype=np.float64)
+        if n == 0:
+            return sent
+        in_lex, val0 = A["in_lex"], A["val"]
+        is_boost, boost, negw = A["is_boost"], A["boost"], A["negated"]
+        W = self._w
+
+        # Solo los tokens del léxico (que no sean boosters) reciben valencia:
+        # el resto de reglas se evalúa únicamente en esas posiciones
+        low = A["form_low"][ids]
+        upper = A["form_upper"][ids]
+        idx = np.flatnonzero(A["scored"][low])
+        if not len(idx):
+            return sent
+        d = np.searchsorted(offsets, idx, side="right") - 1
+        pos = idx - offsets[d]
+        remaining = offsets[d + 1] - idx - 1  # tokens que quedan detrás
+
+        def prev(arr, k, fill):
+            return np.where(pos >= k, arr[np.maximum(idx - k, 0)], fill)
+
+        def nxt(arr, k, fill):
+            return np.where(remaining >= k, arr[np.minimum(idx + k, n - 1)], fill)
+
+        lw = low[idx]
+        p1, p2, p3 = prev(low, 1, -1), prev(low, 2, -1), prev(low, 3, -1)
+        n1, n2 = nxt(low, 1, -1), nxt(low, 2, -1)
+        ups = {1: prev(upper, 1, False), 2: prev(upper, 2, False), 3: prev(upper, 3, False)}
+        prevs = {1: p1, 2: p2, 3: p3}
+
+        # Mayúsculas solo cuentan si el texto mezcla tokens en mayúsculas y no
+        cum_upper = np.concatenate(([0], np.cumsum(upper)))
+        n_upper = cum_upper[offsets[1:]] - cum_upper[offsets[:-1]]
+        cap_diff = ((n_upper > 0) & (n_upper < np.diff(offsets)))[d]
+
+        # "kind of": "kind" no puntúa si le sigue "of"
+        keep = ~((lw == W["kind"]) & (n1 == W["of"]))
+
+        base = val0[lw]
+        v = base.copy()
+        v = np.where((lw == W["no"]) & in_lex[n1], 0.0, v)
+        no_before = (
+            (p1 == W["no"]) | (p2 == W["no"])
+            | ((p3 == W["no"]) & ((p1 == W["or"]) | (p1 == W["nor"])))
+        )
+        v = np.where(no_before, base * _vs.N_SCALAR, v)
+        caps = upper[idx] & cap_diff
+        v = np.where(caps, np.where(v > 0, v + _vs.C_INCR, v - _vs.C_INCR), v)
+
+        so_this1 = (p1 == W["so"]) | (p1 == W["this"])
+        so_this2 = (p2 == W["so"]) | (p2 == W["this"])
+        for k in (1, 2, 3):
+            pk = prevs[k]
+            has = (pos >= k) & ~in_lex[pk]
+            s = boost[pk]
+            s = np.where(v < 0, -s, s)
+            cap_k = is_boost[pk] & ups[k] & cap_diff
+            s = np.where(cap_k, np.where(v > 0, s + _vs.C_INCR, s - _vs.C_INCR), s)
+            if k == 2:
+                s = np.where(s != 0, s * 0.95, s)
+            elif k == 3:
+                s = np.where(s != 0, s * 0.9, s)
+            v = np.where(has, v + s, v)
+
+            # _negation_check
+            if k == 1:
+                v = np.where(has & negw[p1], v * _vs.N_SCALAR, v)
+            elif k == 2:
+                never = (p2 == W["never"]) & so_this1
+                without = ~never & (p2 == W["without"]) & (p1 == W["doubt"])
+                neg = ~never & ~without & negw[p2]
+                v = np.where(has & never, v * 1.25, v)
+                v = np.where(has & neg, v * _vs.N_SCALAR, v)
+            else:
+                never = ((p3 == W["never"]) & so_this2) | so_this1
+                without = ~never & (p3 == W["without"]) & ((p2 == W["doubt"]) | (p1 == W["doubt"]))
+                neg = ~never & ~without & negw[p3]
+                v = np.where(has & never, v * 1.25, v)
+                v = np.where(has & neg, v * _vs.N_SCALAR, v)
+                v = np.where(has, self._special_idioms(v, lw, p1, p2, p3, n1, n2), v)
+
+        # _least_check
+        least = (pos >= 1) & (p1 == W["least"]) & ~in_lex[p1]
+        least &= (pos == 1) | ((p2 != W["at"]) & (p2 != W["very"]))
+        v = np.where(least, v * _vs.N_SCALAR, v)
+
+        sent[idx] = np.where(keep, v, 0.0)
+        self._but_check(sent, low, offsets)
+        return sent
+
+    def _special_idioms(self, v, low, p1, p2, p3, n1, n2) -> np.ndarray:
+        """_special_idioms_check: la primera secuencia que coincide fija el valor."""
+        sequences = [(p1, low), (p2, p1, low), (p2, p1), (p3, p2, p1), (p3, p2)]
+        out = v.copy()
+        matched = np.zeros(len(v), dtype=bool)
+        for seq in sequences:
+            for key, val in self._special:
+                if len(key) != len(seq):
+                    continue
+                m = ~matched
+                for arr, kid in zip(seq, key):
+                    m &= arr == kid
+                out = np.where(m, val, out)
+                matched |= m
+        for seq in [(low, n1), (low, n1, n2)]:
+            for key, val in self._special:
+                if len(key) != len(seq):
+                    continue
+                m = np.ones(len(v), dtype=bool)
+                for arr, kid in zip(seq, key):
+                    m &= arr == kid
+                out = np.where(m, val, out)
+        for seq in [(p3, p2, p1), (p3, p2), (p2, p1)]:
+            for key, val in self._boost_ngrams:
+                if len(key) != len(seq):
+                    continue
+                m = np.ones(len(v), dtype=bool)
+                for arr, kid in zip(seq, key):
+                    m &= arr == kid
+                out = np.where(m, out + val, out)
+        return out
+
+    def _but_check(self, sent: np.ndarray, low: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        _but_check en los textos que contienen 'but' (in-place). Se reproduce
+        el recorrido original (list.index sobre los valores) solo sobre los
+        tokens con valencia != 0: los ceros no cambian al escalarse.
+        """
+        buts = np.flatnonzero(low == self._w["but"])
+        if not len(buts):
+            return
+        for d in np.unique(np.searchsorted(offsets, buts, side="right") - 1).tolist():
+            start, end = int(offsets[d]), int(offsets[d + 1])
+            seg = sent[start:end]
+            nz = np.flatnonzero(seg)
+            if not len(nz):
+                continue
+            bi = int(buts[np.searchsorted(buts, start)]) - start
+            vals = seg[nz].tolist()
+            positions = nz.tolist()
+            for k in range(len(vals)):
+                x = vals[k]
+                si = vals.index(x)
+                if positions[si] < bi:
+                    vals[si] = x * 0.5
+                elif positions[si] > bi:
+                    vals[si] = x * 1.5
+            seg[nz] = vals
+
+    # ------------------------------------------------------------------
+    # Fase 3: agregación por texto
+
+    def score_encoded(self, batch: EncodedBatch) -> Dict[str, List[float]]:
+        """score_valence de VADER para cada texto del lote (mismo redondeo)."""
+        sent = self.token_valences(batch)
+        offsets = batch.offsets
+        lengths = np.diff(offsets)
+        n_docs = len(lengths)
+
+        # Solo los tokens con valencia aportan a las sumas
+        nz = np.flatnonzero(sent)
+        vals = sent[nz]
+        doc = np.searchsorted(offsets, nz, side="right") - 1
+
+        ep = np.minimum(batch.excl, 4) * 0.292
+        qm = batch.quest
+        qm_amp = np.where(qm > 1, np.where(qm <= 3, qm * 0.18, 0.96), 0.0)
+        amp = ep + qm_amp
+
+        sum_s = np.bincount(doc, weights=vals, minlength=n_docs)
+        sum_s = np.where(sum_s > 0, sum_s + amp, np.where(sum_s < 0, sum_s - amp, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+        compound = np.clip(compound, -1.0, 1.0)
+
+        pos_sum = np.bincount(doc, weights=np.where(vals > 0, vals + 1, 0.0), minlength=n_docs)
+        neg_sum = np.bincount(doc, weights=np.where(vals < 0, vals - 1, 0.0), minlength=n_docs)
+        neu_count = lengths - np.bincount(doc, minlength=n_docs)
+        abs_neg = np.abs(neg_sum)
+        more_pos = pos_sum > abs_neg
+        more_neg = pos_sum < abs_neg
+        pos_sum = np.where(more_pos, pos_sum + amp, pos_sum)
+        neg_sum = np.where(more_neg, neg_sum - amp, neg_sum)
+        total = pos_sum + np.abs(neg_sum) + neu_count
+
+        nonempty = lengths > 0
+        safe_total = np.where(nonempty, total, 1.0)
+        pos = np.where(nonempty, np.abs(pos_sum / safe_total), 0.0)
+        neg = np.where(nonempty, np.abs(neg_sum / safe_total), 0.0)
+        neu = np.where(nonempty, np.abs(neu_count / safe_total), 0.0)
+        compound = np.where(nonempty, compound, 0.0)
+
+        return {
+            "neg": _round_like_python(neg, 3),
+            "neu": _round_like_python(neu, 3),
+            "pos": _round_like_python(pos, 3),
+            "compound": _round_like_python(compound, 4),
+        }
+
+    def polarity_scores_batch(self, texts: Sequence[str], chunk: int = 20000) -> Dict[str, List[float]]:
+        """Equivalente a [polarity_scores(t) for t in texts], por columnas."""
+        out: Dict[str, List[float]] = {"neg": [], "neu": [], "pos": [], "compound": []}
+        for i in range(0, len(texts), chunk):
+            part = self.score_encoded(self.encode(texts[i:i + chunk]))
+            for k in out:
+                out[k].extend(part[k])
+        return out
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        """Interfaz de SentimentIntensityAnalyzer para un solo texto."""
+        cols = self.score_encoded(self.encode([text]))
+        return {k: v[0] for k, v in cols.items()}
+
+
+_engine: Optional[FastVader] = None
+
+
+def get_engine() -> Optional[FastVader]:
+    """Motor global, precompilado en el snapshot del léxico."""
+    global _engine
+    if _engine is None:
+        from src.analysis.sentiment import HAS_VADER as _has_vader
+        if not _has_vader:
+            return None
+        # Precompilado en el snapshot del léxico (lexicon_snapshot.py)
+        from src.analysis.lexicon_snapshot import load_engine
+        _engine = load_engine()
+    return _engine
+
+
+def check_conformance(texts: Sequence[str], tolerance: float = 1e-3) -> Dict[str, Any]:
+    """
+    Compara el motor vectorizado con vaderSentiment texto a texto.
+
+    Returns:
+        Resumen con nº de textos, diferencia máxima en compound/neg/neu/pos,
+        textos fuera de tolerancia (hasta 10 ejemplos) y acuerdo de etiquetas.
+    """
+    from src.analysis.sentiment import _get_analyzer, label_sentiment
+
+    analyzer = _get_analyzer()
+    engine = get_engine()
+    fast = engine.polarity_scores_batch(list(texts))
+    max_diff = {k: 0.0 for k in fast}
+    failures = []
+    label_agree = 0
+    for i, t in enumerate(texts):
+        ref = analyzer.polarity_scores(t)
+        worst = 0.0
+        for k in fast:
+            d = abs(ref[k] - fast[k][i])
+            max_diff[k] = max(max_diff[k], d)
+            worst = max(worst, d)
+        if label_sentiment(ref["compound"]) == label_sentiment(fast["compound"][i]):
+            label_agree += 1
+        if worst > tolerance and len(failures) < 10:
+            failures.append({"text": t[:200], "vader": ref, "fast": {k: fast[k][i] for k in fast}})
+    n = len(texts)
+    return {
+        "n_texts": n,
+        "tolerance": tolerance,
+        "max_abs_diff": {k: round(v, 6) for k, v in max_diff.items()},
+        "within_tolerance": all(v <= tolerance for v in max_diff.values()),
+        "label_agreement_pct": round(100 * label_agree / n, 3) if n else 100.0,
+        "failures": failures,
+    }
+
+
+def benchmark(texts: Sequence[str], repeat: int = 3, min_texts: int = 50000) -> Dict[str, Any]:
+    """
+    Throughput (textos/s) de vaderSentiment frente al motor vectorizado.
+
+    El corpus se replica hasta min_texts: con pocos textos domina el coste
+    fijo por llamada y la comparación no es representativa.
+    """
+    from src.analysis.sentiment import _get_analyzer
+
+    analyzer = _get_analyzer()
+    texts = list(texts)
+    if texts and len(texts) < min_texts:
+        texts = texts * math.ceil(min_texts / len(texts))
+    t0 = time.perf_counter()
+    for t in texts:
+        analyzer.polarity_scores(t)
+    vader_s = time.perf_counter() - t0
+
+    engine = get_engine()
+    engine.polarity_scores_batch(texts)  # calienta el vocabulario
+    best = math.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        engine.polarity_scores_batch(texts)
+        best = min(best, time.perf_counter() - t0)
+    n = len(texts)
+    return {
+        "n_texts": n,
+        "vader_texts_per_s": round(n / vader_s, 1) if vader_s else None,
+        "fast_texts_per_s": round(n / best, 1) if best else None,
+        "speedup": round(vader_s / best, 1) if best else None,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from src.analysis.insights import load_clean_data
+
+    corpus = [r.get("content") or "" for r in load_clean_data().get("reviews", [])]
+    report = check_conformance(corpus)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(json.dumps(benchmark(corpus), ensure_ascii=False, indent=2))
+    sys.exit(0 if report["within_tolerance"] else 1)
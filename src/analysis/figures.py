@@ -0,0 +1,190 @@
+"""
+Renderizado de figuras en paralelo, sin pantalla y con caché.
+
+Cada figura es una FigureTask: la función que la dibuja, los datos que
+necesita (agregados pequeños: porcentajes por fuente, frecuencias de un
+word cloud...) y el archivo de salida (PNG, o SVG / Vega-Lite escritos por
+vector_charts.py sin matplotlib). render_figures():
+
+  - si hay PNG pendientes, los workers usan el backend Agg de matplotlib
+    (sin ventana ni servidor gráfico); en el proceso actual se respeta el
+    backend que haya elegido quien llama (p. ej. un notebook). Con solo
+    figuras vectoriales no se importa matplotlib
+  - calcula una clave por figura con el hash de sus datos, del código del
+    módulo que la dibuja (y de vector_charts.py para SVG / Vega-Lite) y de
+    las versiones de matplotlib/wordcloud; si el archivo existe y su clave
+    no cambió (.cache/figures/index.json), se omite; con la caché desactivada
+    se dibuja todo, pero el índice conserva las demás figuras
+  - reparte las figuras pendientes en un pool de procesos (el layout de
+    WordCloud es costoso en CPU)
+
+FIGURE_WORKERS fija el número de procesos (1 = en el proceso actual; por
+defecto hasta 4 según los núcleos). FIGURE_CACHE=0 vuelve a dibujarlo todo.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.profiling import stop_worker_tracing
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_PATH = PROJECT_ROOT / ".cache" / "figures" / "index.json"
+
+DEFAULT_WORKERS = int(os.environ.get("FIGURE_WORKERS", "0")) or min(os.cpu_count() or 1, 4)
+DEFAULT_CACHE = os.environ.get("FIGURE_CACHE", "1") != "0"
+BACKEND = "Agg"
+VECTOR_CHARTS = Path(__file__).resolve().parent / "vector_charts.py"
+
+
+class FigureTask(NamedTuple):
+    """Una figura: func(*args, output) la dibuja y la guarda en output."""
+
+    func: Callable[..., None]
+    args: Tuple[Any, ...]
+    output: Path
+
+
+def _use_headless_backend() -> None:
+    """Backend Agg antes de importar pyplot. Solo en los workers del pool."""
+    os.environ["MPLBACKEND"] = BACKEND
+    try:
+        import matplotlib
+    except ImportError:
+        return
+    matplotlib.use(BACKEND, force=True)
+
+
+def _init_worker(raster: bool) -> None:
+    """Inicializador del pool: sin tracemalloc heredado y, con PNG, backend Agg."""
+    stop_worker_tracing()
+    if raster:
+        _use_headless_backend()
+
+
+def _versions() -> str:
+    out = []
+    for name in ("matplotlib", "wordcloud"):
+        try:
+            out.append(f"{name}={metadata.version(name)}")
+        except metadata.PackageNotFoundError:
+            out.append(f"{name}=none")
+    return ",".join(out)
+
+
+def _is_png(task: FigureTask) -> bool:
+    return task.output.suffix.lower() == ".png"
+
+
+def _file_digest(path: Optional[str]) -> str:
+    if not path:
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _module_digest(func: Callable) -> str:
+    """Hash del código del módulo que define func (cambiar el dibujo invalida la caché)."""
+    return _file_digest(getattr(sys.modules.get(func.__module__), "__file__", None))
+
+
+def task_key(task: FigureTask) -> str:
+    """Clave de caché de una figura: función, código, datos de entrada y versiones."""
+    payload = json.dumps(
+        [
+            f"{task.func.__module__}.{task.func.__qualname__}",
+            _module_digest(task.func),
+            "" if _is_png(task) else _file_digest(str(VECTOR_CHARTS)),
+            task.args,
+            _versions(),
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load_index() -> Dict[str, str]:
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index: Dict[str, str]) -> None:
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, CACHE_PATH)
+
+
+def _render(task: FigureTask) -> str:
+    task.func(*task.args, task.output)
+    return str(task.output)
+
+
+def _pool_context():
+    """fork si está disponible (los workers heredan los módulos ya importados)."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def render_figures(
+    tasks: Sequence[FigureTask],
+    workers: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+) -> Dict[str, int]:
+    """
+    Dibuja las figuras cuya clave cambió (o cuyo archivo no existe).
+
+    Args:
+        tasks: Figuras a generar.
+        workers: Procesos (None = DEFAULT_WORKERS; 1 = en el proceso actual).
+        use_cache: Omitir figuras sin cambios (None = DEFAULT_CACHE).
+
+    Returns:
+        {"rendered": n, "cached": m}
+    """
+    if use_cache is None:
+        use_cache = DEFAULT_CACHE
+    # El índice se carga siempre: sin caché se redibuja todo, pero al guardar
+    # no se pierden las entradas de las demás figuras
+    index = _load_index()
+    keys = {str(t.output): task_key(t) for t in tasks}
+    pending: List[FigureTask] = [
+        t
+        for t in tasks
+        if not (use_cache and t.output.exists() and index.get(str(t.output)) == keys[str(t.output)])
+    ]
+
+    # matplotlib solo se carga si hay algún PNG que dibujar; las figuras
+    # vectoriales son texto y no compensan arrancar el pool
+    raster = any(_is_png(t) for t in pending)
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(pending))) if raster else 1
+    if workers == 1:
+        done = [_render(t) for t in pending]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(raster,),
+            mp_context=_pool_context(),
+        ) as pool:
+            done = list(pool.map(_render, pending))
+
+    # Solo se registran las figuras que llegaron a escribirse
+    for out in done:
+        if Path(out).exists():
+            index[out] = keys[out]
+    if done:
+        _save_index(index)
+    return {"rendered": len(pending), "cached": len(tasks) - len(pending)}
@@ -0,0 +1,201 @@
+"""
+Conteo aproximado de términos frecuentes (heavy hitters) con memoria acotada.
+
+La matriz documento-término (dtm.py) guarda una columna por cada término o
+n-grama distinto: con millones de comentarios el vocabulario de bigramas
+crece sin límite. En modo aproximado (TOP_TERMS_MODE=approx) los top-N
+salen de un resumen Space-Saving (Metwally et al.) que guarda como mucho
+k = ceil(1 / epsilon) contadores:
+
+  - cada término con peso total f > epsilon · N está en el resumen
+    (N = suma de pesos del corte: reseñas o 1 + likes)
+  - el conteo devuelto c cumple f <= c <= f + epsilon · N; el resumen
+    guarda también el error máximo de cada término
+
+El corpus se recorre por bloques de tokens. Cada bloque se cuenta de forma
+exacta con np.unique y se combina con el resumen (Space-Saving mergeable,
+Agarwal et al.), así que la memoria es O(k + tamaño de bloque) sea cual sea
+el tamaño del vocabulario. Dos resúmenes de shards distintos también se
+combinan con merge().
+
+Si hay menos términos distintos que contadores, el resultado es exacto.
+
+Las claves de n-grama son su código en base V mientras V^n quepa en int64;
+con vocabularios mayores (4-gramas a partir de ~55k palabras) son un hash de
+63 bits (ngrams.pack_columns) y el texto se recupera de una tabla que solo
+guarda los n-gramas presentes en el resumen.
+"""
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.corpus import TokenCorpus
+from src.analysis.ngrams import MAX_N, fits_packed, packed_ngrams, packed_stop_mask
+
+# "exact" (matriz documento-término) o "approx" (Space-Saving)
+DEFAULT_MODE = os.environ.get("TOP_TERMS_MODE", "exact")
+# Error relativo máximo de los conteos aproximados (k = 1 / epsilon contadores)
+DEFAULT_EPSILON = float(os.environ.get("TOP_TERMS_EPSILON", "0.0005"))
+# Tokens por bloque al recorrer el corpus
+CHUNK_TOKENS = 1 << 20
+
+
+class SpaceSaving:
+    """Resumen Space-Saving ponderado sobre claves enteras (int64)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(int(capacity), 1)
+        self.total = 0.0
+        # Claves ordenadas, con su conteo (cota superior) y su error máximo
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.float64)
+        self.errors = np.empty(0, dtype=np.float64)
+
+    @classmethod
+    def for_error(cls, epsilon: float = DEFAULT_EPSILON) -> "SpaceSaving":
+        return cls(math.ceil(1.0 / epsilon))
+
+    @property
+    def floor(self) -> float:
+        """Cota del conteo de cualquier clave que no está en el resumen."""
+        return float(self.counts.min()) if len(self.keys) >= self.capacity else 0.0
+
+    @property
+    def error_bound(self) -> float:
+        """Error máximo de cualquier conteo: total / capacidad."""
+        return self.total / self.capacity
+
+    def update(self, keys: Sequence[int], weights: Optional[Sequence[float]] = None) -> None:
+        """Añade un bloque de claves (con pesos opcionales)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(keys):
+            return
+        uniq, inv = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inv, weights=None if weights is None else np.asarray(weights, dtype=np.float64))
+        self.total += float(counts.sum())
+        self._combine(uniq, counts.astype(np.float64), np.zeros(len(uniq)), 0.0)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Combina otro resumen (in-place) y devuelve self."""
+        self.total += other.total
+        self._combine(other.keys, other.counts, other.errors, other.floor)
+        return self
+
+    def _combine(self, keys: np.ndarray, counts: np.ndarray, errors: np.ndarray, floor: float) -> None:
+        # Una clave ausente de un lado puede haber tenido hasta su "floor"
+        own_floor = self.floor
+        union = np.union1d(self.keys, keys)
+        c = np.full(len(union), own_floor + floor)
+        e = np.full(len(union), own_floor + floor)
+        mine = np.searchsorted(union, self.keys)
+        theirs = np.searchsorted(union, keys)
+        c[mine] += self.counts - own_floor
+        e[mine] += self.errors - own_floor
+        c[theirs] += counts - floor
+        e[theirs] += errors - floor
+        if len(union) > self.capacity:
+            keep = np.sort(np.argpartition(-c, self.capacity - 1)[: self.capacity])
+            union, c, e = union[keep], c[keep], e[keep]
+        self.keys, self.counts, self.errors = union, c, e
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[int, float, float]]:
+        """Las n claves con más conteo: (clave, conteo, error máximo)."""
+        order = np.lexsort((self.keys, -self.counts))
+        if n is not None:
+            order = order[:n]
+        return [(int(self.keys[i]), float(self.counts[i]), float(self.errors[i])) for i in order]
+
+
+class HeavyHitterTerms:
+    """
+    Top-N aproximado de palabras (ngram=1) o n-gramas (ngram=2..4) de un
+    corpus, con la misma interfaz most_common() que dtm.DocumentTermMatrix.
+    """
+
+    def __init__(
+        self,
+        corpus: TokenCorpus,
+        ngram: int = 1,
+        stop_phrases: Iterable[str] = (),
+        epsilon: float = DEFAULT_EPSILON,
+    ):
+        if not 1 <= ngram <= MAX_N:
+            raise ValueError(f"ngram debe estar entre 1 y {MAX_N}")
+        self.corpus = corpus
+        self.ngram = ngram
+        self.epsilon = epsilon
+        self.stop_phrases = tuple(stop_phrases)
+        self._v = max(len(corpus.vocab), 1)
+        self.last_error_bound = 0.0
+        # Con claves hash: código -> IDs de token de los n-gramas del resumen
+        self._hashed = not fits_packed(ngram, self._v)
+        self._grams: Dict[int, Tuple[int, ...]] = {}
+
+    def _decode(self, code: int) -> Any:
+        vocab = self.corpus.vocab
+        if self.ngram == 1:
+            return vocab[code]
+        if self._hashed:
+            return tuple(vocab[i] for i in self._grams[code])
+        words = []
+        for _ in range(self.ngram):
+            code, last = divmod(code, self._v)
+            words.append(vocab[last])
+        return tuple(reversed(words))
+
+    def _chunks(self) -> Iterable[Tuple[int, int]]:
+        """Rangos de documentos [d0, d1) de unos CHUNK_TOKENS tokens."""
+        offsets = self.corpus.offsets
+        n_docs = len(self.corpus)
+        d0 = 0
+        while d0 < n_docs:
+            d1 = int(np.searchsorted(offsets, offsets[d0] + CHUNK_TOKENS, side="right")) - 1
+            d1 = min(max(d1, d0 + 1), n_docs)
+            yield d0, d1
+            d0 = d1
+
+    def summary(self, weights: Optional[Sequence[float]] = None) -> SpaceSaving:
+        """Resumen Space-Saving del corte: documentos con peso > 0."""
+        corpus = self.corpus
+        w_docs = None if weights is None else np.asarray(weights, dtype=np.float64)
+        ss = SpaceSaving.for_error(self.epsilon)
+        for d0, d1 in self._chunks():
+            lo, hi = int(corpus.offsets[d0]), int(corpus.offsets[d1])
+            ids = corpus.ids[lo:hi].astype(np.int64)
+            doc_of = np.repeat(np.arange(d0, d1), np.diff(corpus.offsets[d0:d1 + 1]))
+            # Los bloques acaban en frontera de reseña: ningún n-grama se corta
+            start, codes = packed_ngrams(ids, doc_of, self.ngram, self._v)
+            if self.stop_phrases:
+                keep = ~packed_stop_mask(
+                    ids, doc_of, self.ngram, self._v, corpus.term_index, self.stop_phrases
+                )[start]
+                start, codes = start[keep], codes[keep]
+            if w_docs is not None:
+                sel = w_docs[doc_of[start]] > 0
+                start, codes = start[sel], codes[sel]
+                ss.update(codes, w_docs[doc_of[start]])
+            else:
+                ss.update(codes)
+            if self._hashed:
+                self._remember(ids, start, codes, ss)
+        return ss
+
+    def _remember(self, ids: np.ndarray, start: np.ndarray, codes: np.ndarray, ss: SpaceSaving) -> None:
+        """Guarda los IDs de los n-gramas del bloque que siguen en el resumen."""
+        kept = np.isin(codes, ss.keys)
+        uniq, first = np.unique(codes[kept], return_index=True)
+        pos = start[kept][first]
+        for code, p in zip(uniq.tolist(), pos.tolist()):
+            if code not in self._grams:
+                self._grams[code] = tuple(int(i) for i in ids[p:p + self.ngram])
+        # La tabla no crece más que el resumen
+        if len(self._grams) > 2 * ss.capacity:
+            self._grams = {k: self._grams[k] for k in ss.keys.tolist() if k in self._grams}
+
+    def most_common(self, weights: Optional[Sequence[float]] = None, n: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Como Counter.most_common(n) del corte; conteos con error <= epsilon · N."""
+        ss = self.summary(weights)
+        self.last_error_bound = ss.error_bound
+        return [(self._decode(k), c) for k, c, _ in ss.top(n)]
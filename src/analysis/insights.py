@@ -4,8 +4,10 @@ Puedes extender con: análisis de sentimiento, temas recurrentes, etc.
 """
 import json
 from pathlib import Path
-from collections import Counter
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
+
+from src.analysis.context import AnalysisContext
+from src.analysis.cube import AggregateCube, load_cube
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
@@ -21,56 +23,48 @@ def load_clean_data() -> Dict[str, Any]:
         return json.load(f)
 
 
-def _get_engagement(r: Dict) -> int:
-    """Likes o helpful_votes."""
-    for key in ("likes", "helpful_votes"):
-        v = r.get(key)
-        if v is not None:
-            try:
-                return int(v)
-            except (ValueError, TypeError):
-                pass
-    return 0
-
-
 def basic_insights(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Genera insights básicos: distribución por fuente, longitud media, engagement.
     """
-    reviews = data.get("reviews", [])
-    if not reviews:
-        return {"message": "No hay reseñas para analizar"}
+    return basic_insights_from_cube(AggregateCube.build(data.get("reviews", [])))
 
-    by_source = {}
-    engagement_by_source = {}
-    for r in reviews:
-        src = r.get("source", "Unknown")
-        by_source[src] = by_source.get(src, 0) + 1
-        engagement_by_source[src] = engagement_by_source.get(src, 0) + _get_engagement(r)
 
-    lengths = [len(str(r.get("content", ""))) for r in reviews if r.get("content")]
-    avg_length = sum(lengths) / len(lengths) if lengths else 0
+def basic_insights_from_cube(cube: AggregateCube) -> Dict[str, Any]:
+    """Insights básicos a partir del cubo de agregados (cube.py), sin recorrer las reseñas."""
+    if not cube.total_reviews:
+        return {"message": "No hay reseñas para analizar"}
+
+    sources = cube.by_source()
+    by_source = {src: cell.count for src, cell in sources.items()}
+    engagement_by_source = {src: cell.engagement for src, cell in sources.items()}
+    total = cube.total()
+    avg_length = total.length_sum / total.length_count if total.length_count else 0
     total_likes = sum(engagement_by_source.values())
 
     out = {
-        "total_reviews": len(reviews),
+        "total_reviews": cube.total_reviews,
         "by_source": by_source,
         "avg_content_length": round(avg_length, 1),
-        "min_content_length": min(lengths) if lengths else 0,
-        "max_content_length": max(lengths) if lengths else 0,
+        "min_content_length": total.length_min if total.length_count else 0,
+        "max_content_length": total.length_max if total.length_count else 0,
     }
     if total_likes > 0:
         out["total_likes"] = total_likes
         out["likes_por_fuente"] = engagement_by_source
-        out["avg_likes_por_comentario"] = round(total_likes / len(reviews), 1)
+        out["avg_likes_por_comentario"] = round(total_likes / cube.total_reviews, 1)
     return out
 
 
-def run_insights_analysis() -> Dict[str, Any]:
-    """Ejecuta el análisis y guarda resultados en output/insights/."""
+def run_insights_analysis(ctx: Optional[AnalysisContext] = None) -> Dict[str, Any]:
+    """
+    Ejecuta el análisis y guarda resultados en output/insights/.
+    ctx: contexto compartido de run_analysis.py (context.py), con el cubo ya cargado.
+    """
     OUTPUT_INSIGHTS.mkdir(parents=True, exist_ok=True)
-    data = load_clean_data()
-    insights = basic_insights(data)
+    # Cubo de la etapa de sentimiento; si no está al día, una pasada sobre data/clean/
+    cube = ctx.cube if ctx is not None else load_cube(load_clean_data)
+    insights = basic_insights_from_cube(cube)
     path = OUTPUT_INSIGHTS / "insights_basicos.json"
     with open(path, "w", encoding="utf-8") as f:
         json.dump(insights, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,147 @@
+"""
+Snapshot compilado del léxico de sentimiento.
+
+SentimentIntensityAnalyzer() lee y parsea vader_lexicon.txt y
+emoji_utf8_lexicon.txt en cada proceso, y después hay que añadir
+MOVIE_HYPE_LEXICON y, para el motor vectorizado, precompilar los arrays de
+fast_vader. Aquí se hace una sola vez y se guarda en un pickle versionado:
+
+    .cache/lexicon/lexicon_<versión>.pickle
+
+La versión es sentiment.lexicon_version() (MOVIE_HYPE_LEXICON + versión de
+vaderSentiment) más SNAPSHOT_FORMAT: si cambia cualquiera de las dos, se
+reconstruye. Cargar el snapshot cuesta unos milisegundos.
+
+Los workers del pool de sentiment.py se crean con fork cuando el sistema lo
+permite: heredan el snapshot ya cargado en el proceso padre (páginas de
+memoria compartidas en solo lectura) en lugar de reconstruirlo.
+
+Uso:
+    python -m src.analysis.lexicon_snapshot    # (re)genera el snapshot y mide tiempos
+"""
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SNAPSHOT_DIR = PROJECT_ROOT / ".cache" / "lexicon"
+
+# Subir si cambia el contenido del snapshot o el estado interno de FastVader
+SNAPSHOT_FORMAT = 1
+
+_payload: Optional[Dict[str, Any]] = None
+
+
+def snapshot_version() -> str:
+    from src.analysis.sentiment import lexicon_version
+    return f"{lexicon_version()}-f{SNAPSHOT_FORMAT}"
+
+
+def snapshot_path(version: Optional[str] = None) -> Path:
+    return SNAPSHOT_DIR / f"lexicon_{version or snapshot_version()}.pickle"
+
+
+def build_payload() -> Dict[str, Any]:
+    """Construye léxico, emojis y motor vectorizado desde vaderSentiment."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    from src.analysis.sentiment import MOVIE_HYPE_LEXICON
+
+    analyzer = SentimentIntensityAnalyzer()
+    analyzer.lexicon.update(MOVIE_HYPE_LEXICON)
+    payload: Dict[str, Any] = {
+        "version": snapshot_version(),
+        "lexicon": analyzer.lexicon,
+        "emojis": analyzer.emojis,
+        "engine": None,
+    }
+    try:
+        from src.analysis.fast_vader import FastVader
+    except ImportError:  # sin numpy
+        return payload
+    engine = FastVader.from_analyzer(analyzer)
+    engine._materialize()
+    payload["engine"] = engine
+    return payload
+
+
+def save_snapshot(payload: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """Escribe el snapshot (atómico) y borra los de versiones anteriores."""
+    path = Path(path or snapshot_path(payload["version"]))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    for old in path.parent.glob("lexicon_*.pickle"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+def load_snapshot(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Lee el snapshot; None si no existe, está corrupto o es de otra versión."""
+    path = Path(path or snapshot_path())
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != snapshot_version():
+        return None
+    return payload
+
+
+def get_payload() -> Dict[str, Any]:
+    """
+    Snapshot del proceso actual: en memoria, en disco o recién construido
+    (y guardado). Si la caché no se puede escribir se usa igualmente.
+    """
+    global _payload
+    if _payload is None:
+        payload = load_snapshot()
+        if payload is None:
+            payload = build_payload()
+            try:
+                save_snapshot(payload)
+            except OSError:
+                pass
+        _payload = payload
+    return _payload
+
+
+def load_analyzer():
+    """SentimentIntensityAnalyzer a partir del snapshot, sin releer los .txt."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    payload = get_payload()
+    analyzer = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+    # Copias: quien modifique el léxico del analizador no altera el snapshot
+    analyzer.lexicon = dict(payload["lexicon"])
+    analyzer.emojis = dict(payload["emojis"])
+    return analyzer
+
+
+def load_engine():
+    """Motor vectorizado (fast_vader.FastVader) precompilado, o None."""
+    return get_payload().get("engine")
+
+
+if __name__ == "__main__":
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    t0 = time.perf_counter()
+    payload = build_payload()
+    t1 = time.perf_counter()
+    path = save_snapshot(payload)
+    t2 = time.perf_counter()
+    load_snapshot(path)
+    t3 = time.perf_counter()
+    SentimentIntensityAnalyzer()
+    t4 = time.perf_counter()
+    print(f"✓ Snapshot del léxico en {path} ({path.stat().st_size / 1024:.0f} KB)")
+    print(f"  Construcción completa: {1000 * (t1 - t0):.1f} ms"
+          f" (solo SentimentIntensityAnalyzer(): {1000 * (t4 - t3):.1f} ms)")
+    print(f"  Escritura: {1000 * (t2 - t1):.1f} ms | Carga: {1000 * (t3 - t2):.1f} ms")
@@ -0,0 +1,588 @@
+"""
+Análisis por shards (map-reduce) con resultados parciales mergeables.
+
+Todas las etapas de run_analysis.py trabajan sobre una única lista de
+reseñas en memoria. Para el corpus multi-título, el dataset se reparte en
+shards (por fuente, por vídeo o por día), cada shard se procesa por separado
+(map) y los parciales se combinan (reduce):
+
+  - map: puntúa las reseñas del shard que no traen sentiment y calcula un
+    ShardPartial con el cubo de agregados (cube.py), conteos exactos de
+    palabras y bigramas por etiqueta / fuente, los acumuladores de temas
+    (themes.ThemeStats) y las mejores citas por etiqueta
+  - reduce: ShardPartial.merge() de todos los parciales y, con las mismas
+    funciones que el análisis normal, insights básicos, de sentimiento, por
+    fuente (conteos y top palabras), frecuencias de las word clouds y
+    conteos del análisis temático
+
+Los conteos son sumas exactas. Cada término guarda también su primera
+aparición (posición global de la reseña + posición en el texto), así que
+los top-N desempatan igual que la matriz documento-término (dtm.py) con
+todo el corpus. Los percentiles salen de combinar t-digest (como el cubo)
+y los textos de ejemplo de una celda repartida entre shards pueden ser
+otros. Las partes no aditivas del análisis temático (términos
+distintivos, tópicos NMF, colocaciones) no entran aquí.
+
+Ningún paso tiene el corpus entero en memoria: split lee el dataset limpio
+reseña a reseña (iter_reviews) y las va añadiendo a los shards por bloques
+de SPLIT_BUFFER; map carga un shard y reduce, parciales de tamaño acotado.
+
+Los shards (JSON Lines: cabecera + [seq, reseña] por línea) y los parciales
+(JSON) están en un directorio (SHARDS_DIR): varias máquinas pueden ejecutar
+`map` sobre el mismo directorio compartido; cada shard se reserva con un
+archivo .lock creado en exclusiva.
+
+Uso:
+    python -m src.analysis.mapreduce run --by source --workers 4   # todo en local
+    python -m src.analysis.mapreduce split --by date --max-reviews 50000
+    python -m src.analysis.mapreduce map            # en cada máquina
+    python -m src.analysis.mapreduce reduce [--publish]
+
+reduce escribe output/insights/insights_por_shards.json. Las salidas de
+run_analysis.py (insights_basicos.json, ...) no se tocan: con --publish las
+copias con ese formato van a output/insights/shards/.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis import ngrams
+from src.analysis.corpus import TokenCorpus
+from src.analysis.cube import AggregateCube, CellKey, data_fingerprint
+from src.analysis.dtm import indicator, ngram_matrix, unigram_matrix
+from src.analysis.insights import basic_insights_from_cube
+from src.analysis.sentiment import (
+    _get_engagement,
+    _init_worker,
+    _pool_context,
+    add_sentiment_to_reviews,
+    insights_from_cube,
+    scores_version,
+)
+from src.analysis.sentiment_sources_report import _source_key, source_metrics
+from src.analysis.thematic import (
+    TOP_N_BIGRAMS,
+    TOP_N_QUOTES,
+    TOP_N_WORDS,
+    _by_source_themes,
+    _label_themes,
+    _quote,
+    _quote_key,
+    _summary_counts,
+)
+from src.analysis.themes import ThemeStats
+from src.analysis.timeline import parse_date
+from src.profiling import span
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
+OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
+SHARDS_DIR = Path(os.environ.get("SHARDS_DIR", PROJECT_ROOT / ".cache" / "shards"))
+RESULT_PATH = OUTPUT_INSIGHTS / "insights_por_shards.json"
+# Copias con el formato de las salidas de run_analysis.py (solo con --publish)
+PUBLISH_DIR = OUTPUT_INSIGHTS / "shards"
+
+DEFAULT_BY = os.environ.get("SHARD_BY", "source")
+DEFAULT_WORKERS = int(os.environ.get("SHARD_WORKERS", str(os.cpu_count() or 1)))
+# Un .lock más antiguo se considera de un map que murió y se vuelve a reservar
+LOCK_TIMEOUT = float(os.environ.get("SHARD_LOCK_TIMEOUT", "3600"))
+# Reseñas que split acumula antes de añadirlas a los archivos de shard
+SPLIT_BUFFER = int(os.environ.get("SHARD_SPLIT_BUFFER", "20000"))
+# Caracteres leídos de cada vez al recorrer el dataset limpio
+READ_CHUNK = 1 << 20
+LABELS = ("positive", "neutral", "negative")
+# Primera aparición de un término: seq de la reseña * POS_STRIDE + posición en su texto
+POS_STRIDE = 1 << 32
+
+# nombre -> (n-grama, frases excluidas, grupo de cada reseña, ponderado por 1 + likes)
+TERM_SLICES: Dict[str, Tuple[int, Tuple[str, ...], Callable[[Dict], str], bool]] = {
+    # thematic.py: palabras y bigramas más frecuentes por etiqueta
+    "words_by_label": (1, (), lambda r: (r.get("sentiment") or {}).get("label", "neutral"), False),
+    "bigrams_by_label": (2, ngrams.STOP_PHRASES, lambda r: (r.get("sentiment") or {}).get("label", "neutral"), False),
+    # thematic.py (palabras con más impacto) y word clouds positivo / negativo
+    "weighted_words_by_label": (1, (), lambda r: (r.get("sentiment") or {}).get("label", "neutral"), True),
+    # thematic.py: top palabras por fuente
+    "words_by_source": (1, (), lambda r: r.get("source", "Unknown"), False),
+    # sentiment_sources_report.py: top palabras por fuente (YouTube por vídeo)
+    "weighted_words_by_source_key": (1, (), _source_key, True),
+    # sentiment_sources_report.py: word cloud de bigramas
+    "weighted_bigrams": (2, (), lambda r: "", True),
+}
+
+# Clave de shard de cada reseña
+SHARD_KEYS: Dict[str, Callable[[Dict], str]] = {
+    "source": lambda r: r.get("source", "Unknown"),
+    "video": lambda r: f"{r.get('source', 'Unknown')}:{r.get('video_id') or ''}",
+    "date": lambda r: _day(r.get("date")),
+}
+
+
+def _day(value: Any) -> str:
+    parsed = parse_date(value)
+    return time.strftime("%Y-%m-%d", time.gmtime(parsed[0])) if parsed else "sin_fecha"
+
+
+TermCounts = Dict[str, Dict[str, List[Any]]]  # grupo -> término -> [conteo, primera aparición]
+
+
+class ShardPartial:
+    """Resultado parcial de un shard; merge() combina parciales de shards distintos."""
+
+    def __init__(self):
+        self.cube = AggregateCube()
+        # Primera reseña (seq global) de cada celda, para ordenar las celdas como sin shards
+        self.first_seen: Dict[CellKey, int] = {}
+        self.terms: Dict[str, TermCounts] = {name: {} for name in TERM_SLICES}
+        self.themes = ThemeStats()
+        # Reseñas con texto por etiqueta (denominador de los temas del análisis temático)
+        self.label_docs = {label: 0 for label in LABELS}
+        # etiqueta -> [[likes, longitud, -seq, cita], ...] (las TOP_N_QUOTES mejores)
+        self.quotes: Dict[str, List[List[Any]]] = {label: [] for label in LABELS}
+        self.lexicon = scores_version()
+        self.fingerprint: Optional[str] = None
+
+    @classmethod
+    def build(cls, reviews: List[Dict], seqs: Sequence[int]) -> "ShardPartial":
+        """Map: parcial de reviews (seqs: su posición en el dataset completo)."""
+        out = cls()
+        with_content: List[Tuple[int, Dict]] = []
+        for seq, r in zip(seqs, reviews):
+            out.cube.add(r)
+            out.first_seen.setdefault(out.cube.key(r), seq)
+            if (r.get("content") or "").strip():
+                with_content.append((seq, r))
+                label = (r.get("sentiment") or {}).get("label", "neutral")
+                out.label_docs[label] += 1
+                out.themes.add(r, _get_engagement(r))
+                out.quotes[label].append([*_quote_key(r), -seq, _quote(r)])
+        for label in LABELS:
+            out.quotes[label] = sorted(out.quotes[label], key=lambda q: q[:3], reverse=True)[:TOP_N_QUOTES]
+        if with_content:
+            out._count_terms([r for _, r in with_content], np.array([seq for seq, _ in with_content], dtype=np.int64))
+        return out
+
+    def _count_terms(self, reviews: List[Dict], seqs: np.ndarray) -> None:
+        """Conteos por grupo de cada TERM_SLICES con las matrices de dtm.py sobre el corpus del shard."""
+        corpus = TokenCorpus.build([r.get("content") or "" for r in reviews])
+        weights = 1 + np.array([_get_engagement(r) for r in reviews], dtype=np.float64)
+        for name, (n, stop_phrases, group_fn, weighted) in TERM_SLICES.items():
+            matrix = unigram_matrix(corpus) if n == 1 else ngram_matrix(corpus, n, stop_phrases)
+            groups = [group_fn(r) for r in reviews]
+            for group in dict.fromkeys(groups):
+                mask = indicator(groups, group)
+                w = mask * weights if weighted else mask
+                freqs = matrix.frequencies(w)
+                first = matrix.first_seen(np.asarray(w, dtype=np.float64) > 0)
+                nz = np.flatnonzero(freqs != 0)
+                # Posición en el corpus del shard -> (seq de la reseña, posición en su texto)
+                doc = np.searchsorted(corpus.offsets, first[nz], side="right") - 1
+                has_first = first[nz] != np.iinfo(np.int64).max
+                doc = np.where(has_first, doc, 0)
+                keys = seqs[doc] * POS_STRIDE + (first[nz] - corpus.offsets[doc])
+                counts = self.terms[name].setdefault(group, {})
+                for j, c, k, ok in zip(nz.tolist(), freqs[nz].tolist(), keys.tolist(), has_first.tolist()):
+                    term = matrix.terms[j]
+                    counts[term if n == 1 else " ".join(term)] = [int(round(c)), k if ok else None]
+
+    def merge(self, other: "ShardPartial") -> "ShardPartial":
+        """Reduce: añade otro parcial (in-place) y devuelve self."""
+        if other.lexicon != self.lexicon:
+            raise ValueError(f"Parciales con distinta versión de los scores: {self.lexicon} / {other.lexicon}")
+        self.cube.merge(other.cube)
+        for key, seq in other.first_seen.items():
+            self.first_seen[key] = min(seq, self.first_seen.get(key, seq))
+        for name, groups in other.terms.items():
+            mine = self.terms.setdefault(name, {})
+            for group, counts in groups.items():
+                target = mine.setdefault(group, {})
+                for term, (c, first) in counts.items():
+                    cur = target.get(term)
+                    if cur is None:
+                        target[term] = [c, first]
+                        continue
+                    cur[0] += c
+                    if first is not None and (cur[1] is None or first < cur[1]):
+                        cur[1] = first
+        self.themes.merge(other.themes)
+        for label in LABELS:
+            self.label_docs[label] += other.label_docs[label]
+            self.quotes[label] = sorted(self.quotes[label] + other.quotes[label], key=lambda q: q[:3], reverse=True)[:TOP_N_QUOTES]
+        return self
+
+    def top(self, name: str, group: str, n: int) -> List[Tuple[str, int]]:
+        """Los n términos más frecuentes del grupo; desempate por primera aparición."""
+        counts = self.terms.get(name, {}).get(group, {})
+        ranked = sorted(
+            ((term, c, first) for term, (c, first) in counts.items() if c > 0),
+            key=lambda x: (-x[1], x[2] if x[2] is not None else float("inf")),
+        )
+        return [(term, c) for term, c, _ in ranked[:n]]
+
+    def ordered_cube(self) -> AggregateCube:
+        """El cubo con las celdas en orden de primera aparición en el dataset completo."""
+        self.cube.cells = dict(sorted(self.cube.cells.items(), key=lambda kv: self.first_seen.get(kv[0], 0)))
+        return self.cube
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lexicon": self.lexicon,
+            "fingerprint": self.fingerprint,
+            "cube": self.cube.to_dict(),
+            "first_seen": [[*key, seq] for key, seq in self.first_seen.items()],
+            "terms": self.terms,
+            "themes": self.themes.to_dict(),
+            "label_docs": self.label_docs,
+            "quotes": self.quotes,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ShardPartial":
+        out = cls()
+        out.lexicon = d["lexicon"]
+        out.fingerprint = d.get("fingerprint")
+        out.cube = AggregateCube.from_dict(d["cube"])
+        out.first_seen = {(k[0], k[1], k[2]): k[3] for k in d["first_seen"]}
+        out.terms = d["terms"]
+        out.themes = ThemeStats.from_dict(d["themes"])
+        out.label_docs = d["label_docs"]
+        out.quotes = d["quotes"]
+        return out
+
+
+def finalize(partial: ShardPartial) -> Dict[str, Any]:
+    """Insights a partir del parcial combinado de todos los shards."""
+    cube = partial.ordered_cube()
+    by_source = source_metrics(cube, lambda src: partial.top("weighted_words_by_source_key", src, 25))
+    theme_stats = partial.themes.summary()
+
+    def terms(name: str, label: str, n: int) -> List[Dict[str, Any]]:
+        return [{"term": t, "count": c} for t, c in partial.top(name, label, n)]
+
+    def why(label: str) -> Dict[str, Any]:
+        out = {
+            "palabras_mas_frecuentes": terms("words_by_label", label, TOP_N_WORDS),
+            "palabras_con_mas_impacto": terms("weighted_words_by_label", label, 15),
+            "bigramas_recurrentes": terms("bigrams_by_label", label, TOP_N_BIGRAMS),
+            "citas_representativas": [q[3] for q in partial.quotes[label]],
+            "insight_marketing": _label_themes(theme_stats, label, partial.label_docs[label]),
+        }
+        if label == "neutral":
+            del out["palabras_con_mas_impacto"]
+        return out
+
+    return {
+        "basicos": basic_insights_from_cube(cube),
+        "sentimiento": insights_from_cube(cube),
+        "por_fuente": {
+            "total_reviews": cube.total_reviews,
+            "sources": list(by_source),
+            "by_source": by_source,
+        },
+        "frecuencias_word_clouds": {
+            "positive": dict(partial.top("weighted_words_by_label", "positive", 80)),
+            "negative": dict(partial.top("weighted_words_by_label", "negative", 80)),
+            "bigramas": dict(partial.top("weighted_bigrams", "", 80)),
+        },
+        "tematico": {
+            "resumen": _summary_counts(cube),
+            "por_que_positivo": why("positive"),
+            "por_que_negativo": why("negative"),
+            "por_que_neutral": why("neutral"),
+            "temas": theme_stats,
+            "por_fuente": _by_source_themes(cube, lambda src: partial.top("words_by_source", src, 15)),
+        },
+    }
+
+
+def _write_json(path: Path, obj: Any, indent: Optional[int] = 2) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _JsonStream:
+    """Lector incremental de un archivo JSON: valores de uno en uno con un búfer acotado."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        more = self.f.read(READ_CHUNK)
+        self.eof = not more
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        return bool(more)
+
+    def peek(self) -> str:
+        """Siguiente carácter que no es espacio ("" al final del archivo)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"JSON inesperado: se esperaba {chars!r} y hay {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Valor cortado por el final del búfer
+                if not self._fill():
+                    raise
+                continue
+            # Un número al final del búfer puede seguir en el siguiente bloque
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_reviews(path: Path, key: str = "reviews") -> Iterator[Dict]:
+    """
+    Elementos de la lista `key` del objeto JSON de path, uno a uno, sin
+    cargar el archivo: los demás campos del objeto raíz se leen y descartan.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.expect(":")
+            if name != key:
+                stream.value()
+            else:
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.expect(",]") == "]":
+                            break
+            if stream.expect(",}") == "}":
+                return
+
+
+def _shard_path(shards_dir: Path, name: str) -> Path:
+    return shards_dir / f"{name}.jsonl"
+
+
+def _partial_path(shard_path: Path) -> Path:
+    return shard_path.with_name(shard_path.name.replace("shard_", "partial_")).with_suffix(".json")
+
+
+def split_dataset(
+    by: str = DEFAULT_BY,
+    shards_dir: Path = SHARDS_DIR,
+    max_reviews: Optional[int] = None,
+    path: Path = DATA_CLEAN / "reviews_f1_clean.json",
+) -> Dict[str, Any]:
+    """
+    Reparte el dataset limpio en shards_dir/shard_NNNN.jsonl por clave (by) y,
+    con max_reviews, parte las claves grandes en trozos. Lee las reseñas de
+    una en una y las añade a sus shards cada SPLIT_BUFFER, así que la memoria
+    no depende del tamaño del corpus. Borra los shards y parciales anteriores
+    y escribe manifest.json.
+    """
+    if by not in SHARD_KEYS:
+        raise ValueError(f"Clave de shard desconocida: {by!r} (usa {', '.join(SHARD_KEYS)})")
+    if not path.exists():
+        raise FileNotFoundError(f"Ejecuta primero el pipeline de limpieza. No existe {path}")
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    for old in shards_dir.glob("*_[0-9][0-9][0-9][0-9].*"):
+        old.unlink()
+    fingerprint = data_fingerprint(path)
+    key_fn = SHARD_KEYS[by]
+
+    shards: List[Dict[str, Any]] = []
+    current: Dict[str, Dict[str, Any]] = {}
+    lines: Dict[str, List[str]] = {}
+    buffered = 0
+
+    def flush() -> None:
+        # Hasta el final los shards se escriben como .part: map no los ve a medias
+        for name, rows in lines.items():
+            with open(_shard_path(shards_dir, name).with_suffix(".part"), "a", encoding="utf-8") as f:
+                f.write("\n".join(rows) + "\n")
+        lines.clear()
+
+    with span("write_shards") as sp:
+        total = 0
+        for seq, r in enumerate(iter_reviews(path)):
+            key = key_fn(r)
+            shard = current.get(key)
+            if shard is None or (max_reviews and shard["reviews"] >= max_reviews):
+                shard = current[key] = {"name": f"shard_{len(shards):04d}", "key": key, "reviews": 0}
+                shards.append(shard)
+                lines[shard["name"]] = [json.dumps({"key": key, "fingerprint": fingerprint}, ensure_ascii=False)]
+            lines.setdefault(shard["name"], []).append(json.dumps([seq, r], ensure_ascii=False))
+            shard["reviews"] += 1
+            total += 1
+            buffered += 1
+            if buffered >= SPLIT_BUFFER:
+                flush()
+                buffered = 0
+        flush()
+        for shard in shards:
+            part = _shard_path(shards_dir, shard["name"])
+            os.replace(part.with_suffix(".part"), part)
+        sp.records = total
+    manifest = {"by": by, "fingerprint": fingerprint, "total_reviews": total, "shards": shards}
+    _write_json(shards_dir / "manifest.json", manifest)
+    print(f"✓ {total} reseñas repartidas en {len(shards)} shards por {by} ({shards_dir})")
+    return manifest
+
+
+def _read_shard(shard_path: Path) -> Tuple[Dict[str, Any], List[Dict], List[int]]:
+    """(cabecera, reseñas, seqs) de un shard JSON Lines."""
+    reviews: List[Dict] = []
+    seqs: List[int] = []
+    with open(shard_path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        for line in f:
+            seq, review = json.loads(line)
+            seqs.append(seq)
+            reviews.append(review)
+    return header, reviews, seqs
+
+
+def _claim(lock: Path) -> bool:
+    """Reserva un shard creando su .lock en exclusiva (vale en un directorio compartido)."""
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        try:
+            stale = time.time() - lock.stat().st_mtime > LOCK_TIMEOUT
+        except FileNotFoundError:
+            return False
+        if stale:
+            lock.unlink(missing_ok=True)
+            return _claim(lock)
+        return False
+
+
+def map_shard(shard_path: Path) -> Optional[Path]:
+    """Map de un shard: puntúa lo que falte y escribe partial_NNNN.json. None si otro proceso lo tiene."""
+    out = _partial_path(shard_path)
+    lock = out.with_suffix(".lock")
+    if out.exists() or not _claim(lock):
+        return None
+    try:
+        # Otro proceso pudo terminarlo entre la comprobación y la reserva
+        if out.exists():
+            return None
+        header, reviews, seqs = _read_shard(shard_path)
+        # Las reseñas puntuadas por la etapa de sentimiento no se repuntúan
+        add_sentiment_to_reviews([r for r in reviews if "sentiment" not in r])
+        partial = ShardPartial.build(reviews, seqs)
+        partial.fingerprint = header.get("fingerprint")
+        _write_json(out, partial.to_dict(), indent=None)
+    finally:
+        lock.unlink(missing_ok=True)
+    return out
+
+
+def run_map(shards_dir: Path = SHARDS_DIR, workers: int = DEFAULT_WORKERS) -> Dict[str, int]:
+    """Procesa los shards sin parcial (en un pool con workers > 1)."""
+    pending = [p for p in sorted(shards_dir.glob("shard_*.jsonl")) if not _partial_path(p).exists()]
+    with span("map", records=len(pending)):
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)), mp_context=_pool_context(), initializer=_init_worker
+            ) as pool:
+                done = list(pool.map(map_shard, pending))
+        else:
+            done = [map_shard(p) for p in pending]
+    stats = {"pending": len(pending), "mapped": sum(1 for d in done if d is not None)}
+    print(f"✓ Map: {stats['mapped']} shards procesados ({stats['pending'] - stats['mapped']} en otro proceso)")
+    return stats
+
+
+def reduce_partials(shards_dir: Path = SHARDS_DIR, publish_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Combina los parciales de todos los shards del manifest y escribe
+    insights_por_shards.json. Con publish_dir, además deja ahí los insights
+    básicos, de sentimiento y por fuente con el formato de run_analysis.py
+    (nunca sobre las salidas de las etapas del DAG: no son equivalentes).
+    """
+    manifest = _read_json(shards_dir / "manifest.json")
+    paths = [shards_dir / f"{s['name'].replace('shard_', 'partial_')}.json" for s in manifest["shards"]]
+    missing = [p.name for p in paths if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Faltan {len(missing)} parciales (ejecuta map): {', '.join(missing[:5])}")
+    with span("reduce", records=len(paths)):
+        total = ShardPartial()
+        for path in paths:
+            partial = ShardPartial.from_dict(_read_json(path))
+            if partial.fingerprint != manifest["fingerprint"]:
+                raise ValueError(f"{path.name} es de otro dataset; vuelve a ejecutar split y map")
+            total.merge(partial)
+        result = finalize(total)
+    result["shards"] = {"por": manifest["by"], "n": len(paths), "total_reviews": manifest["total_reviews"]}
+
+    with span("save"):
+        _write_json(RESULT_PATH, result)
+        if publish_dir is not None:
+            publish_dir.mkdir(parents=True, exist_ok=True)
+            _write_json(publish_dir / "insights_basicos.json", result["basicos"])
+            _write_json(publish_dir / "insights_sentimiento.json", result["sentimiento"])
+            _write_json(publish_dir / "sentiment_by_source.json", result["por_fuente"])
+    print(f"✓ Reduce: {len(paths)} parciales combinados en {RESULT_PATH}")
+    if publish_dir is not None:
+        print(f"✓ Copias con el formato de run_analysis.py en {publish_dir}")
+    return result
+
+
+def main(argv: Sequence[str] = ()) -> int:
+    parser = argparse.ArgumentParser(description="Análisis por shards (map-reduce) con parciales mergeables.")
+    parser.add_argument("command", choices=["split", "map", "reduce", "run"])
+    parser.add_argument("--by", choices=sorted(SHARD_KEYS), default=DEFAULT_BY, help="Clave de reparto (split/run)")
+    parser.add_argument("--max-reviews", type=int, help="Máximo de reseñas por shard (split/run)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Procesos para map")
+    parser.add_argument("--dir", type=Path, default=SHARDS_DIR, help="Directorio (compartido) de shards y parciales")
+    parser.add_argument(
+        "--publish", nargs="?", type=Path, const=PUBLISH_DIR, default=None, metavar="DIR",
+        help=f"Escribe también insights básicos/sentimiento/por fuente en DIR (reduce/run; por defecto {PUBLISH_DIR})",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command in ("split", "run"):
+        split_dataset(args.by, args.dir, args.max_reviews)
+    if args.command in ("map", "run"):
+        run_map(args.dir, args.workers)
+    if args.command in ("reduce", "run"):
+        reduce_partials(args.dir, args.publish)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
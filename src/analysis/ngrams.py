@@ -0,0 +1,319 @@
+"""
+Motor de n-gramas (n = 1..4) y colocaciones sobre el corpus pre-tokenizado.
+
+Los n-gramas no se construyen como tuplas ni cadenas: cada uno es un ID
+entero calculado sobre la secuencia de IDs de token (corpus.py). El ID de
+un n-grama se obtiene de forma incremental y sin colisiones:
+
+    id_1(i) = ids[i]
+    id_k(i) = unique(id_{k-1}(i) · V + ids[i + k - 1])     (V = vocabulario)
+
+Tras cada paso np.unique devuelve IDs densos (0..número de n-gramas
+distintos), así que id_{k-1} · V + id cabe siempre en int64 aunque V^4 no
+cupiera. Solo cuentan los n-gramas que no cruzan de una reseña a otra.
+Los conteos salen de np.bincount y el texto de cada n-grama solo se
+reconstruye para los que se devuelven.
+
+Colocaciones (frases como "brad pitt", "hans zimmer score"):
+  - pmi: log( c(w1..wn) · N^(n-1) / (c(w1) ··· c(wn)) )
+  - llr: log-likelihood G² de Dunning entre el prefijo (w1..wn-1) y la
+    última palabra wn, con su tabla de contingencia 2×2
+
+Las frases de STOP_PHRASES (o las de un fichero, una por línea) no se
+cuentan: se descarta cualquier n-grama que las contenga.
+"""
+import os
+import weakref
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.corpus import TokenCorpus
+
+MAX_N = 4
+# Referencias que no aportan sentimiento ni insight por sí mismas
+STOP_PHRASES: Tuple[str, ...] = ("top gun",)
+# Métrica de colocaciones por defecto: "pmi" o "llr"
+DEFAULT_METHOD = os.environ.get("COLLOCATION_METHOD", "llr")
+MIN_COUNT = 5
+TOP_N = 20
+
+# Índices ya construidos por corpus (se liberan con el corpus)
+_INDEXES: "weakref.WeakKeyDictionary[TokenCorpus, NgramIndex]" = weakref.WeakKeyDictionary()
+
+
+def load_stop_phrases(path: Optional[Path] = None) -> Tuple[str, ...]:
+    """STOP_PHRASES o las frases de un fichero de texto (una por línea, # = comentario)."""
+    if path is None:
+        return STOP_PHRASES
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.split("#", 1)[0].strip().lower() for line in f]
+    return tuple(line for line in lines if line)
+
+
+class NgramIndex:
+    """
+    IDs de n-grama por posición para n = 1..max_n. Para cada n: la posición
+    de inicio de cada n-grama válido (dentro de una reseña) y su ID denso,
+    más la tabla (prefijo, última palabra) para reconstruir el texto.
+    """
+
+    def __init__(self, corpus: TokenCorpus, max_n: int = MAX_N):
+        if not 1 <= max_n <= MAX_N:
+            raise ValueError(f"n debe estar entre 1 y {MAX_N}")
+        # Sin referencia al corpus: el índice se cachea con el corpus como clave débil
+        self.vocab = corpus.vocab
+        self.term_index = corpus.term_index
+        self.max_n = max_n
+        self.n_tokens = len(corpus.ids)
+        self.doc_of = np.repeat(np.arange(len(corpus), dtype=np.int64), np.diff(corpus.offsets))
+        v = max(len(corpus.vocab), 1)
+        ids = corpus.ids.astype(np.int64)
+        # ids por posición (-1 donde el n-grama no cabe en la reseña)
+        self._pos_ids: Dict[int, np.ndarray] = {1: corpus.ids.astype(np.int32)}
+        self._parts: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._n_ids: Dict[int, int] = {1: len(corpus.vocab)}
+        prev = ids
+        for n in range(2, max_n + 1):
+            # IDs densos: caben en int32 (hay menos n-gramas que tokens)
+            cur = np.full(self.n_tokens, -1, dtype=np.int32)
+            if self.n_tokens >= n:
+                start = np.arange(self.n_tokens - n + 1)
+                ok = (prev[start] >= 0) & (self.doc_of[start] == self.doc_of[start + n - 1])
+                start = start[ok]
+                packed = prev[start].astype(np.int64) * v + ids[start + n - 1]
+                uniq, dense = np.unique(packed, return_inverse=True)
+                cur[start] = dense
+                self._parts[n] = (uniq // v, uniq % v)
+                self._n_ids[n] = len(uniq)
+            else:
+                self._parts[n] = (np.empty(0, np.int64), np.empty(0, np.int64))
+                self._n_ids[n] = 0
+            self._pos_ids[n] = cur
+            prev = cur
+
+    def ids_at(self, n: int) -> np.ndarray:
+        """ID del n-grama que empieza en cada posición (-1 si no hay)."""
+        return self._pos_ids[n]
+
+    def n_ids(self, n: int) -> int:
+        return self._n_ids[n]
+
+    def decode(self, n: int, gram_id: int) -> Tuple[str, ...]:
+        """Palabras de un n-grama a partir de su ID."""
+        words: List[str] = []
+        while n > 1:
+            prefix, last = self._parts[n]
+            words.append(self.vocab[int(last[gram_id])])
+            gram_id = int(prefix[gram_id])
+            n -= 1
+        words.append(self.vocab[gram_id])
+        return tuple(reversed(words))
+
+    def encode(self, words: Sequence[str]) -> int:
+        """ID de un n-grama dado como palabras (-1 si no aparece en el corpus)."""
+        index = self.term_index
+        if not words or len(words) > self.max_n or any(w not in index for w in words):
+            return -1
+        gram_id = index[words[0]]
+        v = max(len(self.vocab), 1)
+        for n, w in enumerate(words[1:], start=2):
+            prefix, last = self._parts[n]
+            packed = prefix * v + last  # ordenado (salida de np.unique)
+            j = int(np.searchsorted(packed, gram_id * v + index[w]))
+            if j >= len(packed) or packed[j] != gram_id * v + index[w]:
+                return -1
+            gram_id = j
+        return gram_id
+
+    def stop_mask(self, n: int, stop_phrases: Iterable[str]) -> np.ndarray:
+        """Posiciones cuyo n-grama contiene alguna frase de stop_phrases."""
+        mask = np.zeros(self.n_tokens, dtype=bool)
+        for phrase in stop_phrases:
+            words = phrase.lower().split()
+            m = len(words)
+            if not m or m > n:
+                continue
+            gid = self.encode(words)
+            if gid < 0:
+                continue
+            hit = self._pos_ids[m] == gid
+            # El n-grama en i contiene la frase si empieza en i .. i + n - m
+            for shift in range(n - m + 1):
+                mask[: self.n_tokens - shift] |= hit[shift:]
+        return mask
+
+    def counts(
+        self,
+        n: int,
+        weights: Optional[Sequence[float]] = None,
+        stop_phrases: Iterable[str] = (),
+    ) -> np.ndarray:
+        """Frecuencia de cada ID de n-grama (ponderada por documento si hay pesos)."""
+        gid = self._pos_ids[n]
+        valid = gid >= 0
+        if stop_phrases:
+            valid &= ~self.stop_mask(n, stop_phrases)
+        w = None
+        if weights is not None:
+            w = np.asarray(weights, dtype=np.float64)[self.doc_of[valid]]
+        return np.bincount(gid[valid], weights=w, minlength=self._n_ids[n])
+
+
+class NgramTerms:
+    """Secuencia perezosa de las palabras de cada ID de n-grama (solo decodifica las que se piden)."""
+
+    def __init__(self, index: NgramIndex, n: int):
+        self.index = index
+        self.n = n
+
+    def __len__(self) -> int:
+        return self.index.n_ids(self.n)
+
+    def __getitem__(self, gram_id: int) -> Tuple[str, ...]:
+        if not 0 <= gram_id < len(self):
+            raise IndexError(gram_id)
+        return self.index.decode(self.n, int(gram_id))
+
+
+def index_for(corpus: TokenCorpus, max_n: int = MAX_N) -> NgramIndex:
+    """NgramIndex del corpus (se reutiliza mientras el corpus exista)."""
+    index = _INDEXES.get(corpus)
+    if index is None or index.max_n < max_n:
+        index = _INDEXES[corpus] = NgramIndex(corpus, max_n)
+    return index
+
+
+def fits_packed(n: int, v: int) -> bool:
+    """True si los códigos en base V de los n-gramas caben en int64 (V^n < 2^63)."""
+    return v ** n < 2 ** 63
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """Finalizador de splitmix64: biyectivo en uint64 y bien mezclado."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def pack_columns(columns: Sequence[np.ndarray], v: int) -> np.ndarray:
+    """
+    Código int64 de cada fila (w1, ..., wn) de IDs de token. Si V^n cabe en
+    int64 es el número en base V (exacto y decodificable con divmod); si no
+    (n = 4 con más de ~55k palabras), un hash de 63 bits de la secuencia, con
+    colisiones despreciables para millones de n-gramas distintos.
+    """
+    n = len(columns)
+    if fits_packed(n, v):
+        codes = np.zeros(len(columns[0]), dtype=np.int64)
+        for col in columns:
+            codes = codes * v + col
+        return codes
+    h = np.zeros(len(columns[0]), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for col in columns:
+            h = _mix64(h ^ np.asarray(col).astype(np.uint64))
+    return (h >> np.uint64(1)).astype(np.int64)
+
+
+def packed_ngrams(ids: np.ndarray, doc_of: np.ndarray, n: int, v: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Códigos (sin densificar, ver pack_columns) de los n-gramas de un bloque
+    de tokens: (posición de inicio, código). Son estables entre bloques, para
+    resúmenes en streaming (heavy_hitters.py).
+    """
+    m = len(ids) - n + 1
+    if m <= 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    start = np.arange(m)
+    start = start[doc_of[start] == doc_of[start + n - 1]]
+    return start, pack_columns([ids[start + k] for k in range(n)], v)
+
+
+def packed_stop_mask(
+    ids: np.ndarray,
+    doc_of: np.ndarray,
+    n: int,
+    v: int,
+    term_index: Dict[str, int],
+    stop_phrases: Iterable[str],
+) -> np.ndarray:
+    """Como NgramIndex.stop_mask, sobre un bloque de tokens con códigos de packed_ngrams."""
+    mask = np.zeros(len(ids), dtype=bool)
+    for phrase in stop_phrases:
+        words = phrase.lower().split()
+        m = len(words)
+        if not m or m > n or any(w not in term_index for w in words):
+            continue
+        code = int(pack_columns([np.array([term_index[w]], dtype=np.int64) for w in words], v)[0])
+        start, codes = packed_ngrams(ids, doc_of, m, v)
+        hit = np.zeros(len(ids), dtype=bool)
+        hit[start[codes == code]] = True
+        for shift in range(n - m + 1):
+            mask[: len(ids) - shift] |= hit[shift:]
+    return mask
+
+
+def _xlogx(x: np.ndarray) -> np.ndarray:
+    return np.where(x > 0, x * np.log(np.where(x > 0, x, 1.0)), 0.0)
+
+
+def collocation_scores(index: NgramIndex, n: int, counts: np.ndarray, method: Optional[str] = None) -> np.ndarray:
+    """PMI o G² de todos los n-gramas (n >= 2) a la vez."""
+    method = method or DEFAULT_METHOD
+    unigram = index.counts(1).astype(np.float64)
+    total = unigram.sum()
+    prefix, last = index._parts[n]
+    c = counts.astype(np.float64)
+    if method == "pmi":
+        # Producto de las frecuencias de cada palabra del n-grama
+        denom = unigram[last].copy()
+        p = prefix
+        for k in range(n - 1, 1, -1):
+            pp, pl = index._parts[k]
+            denom *= unigram[pl[p]]
+            p = pp[p]
+        denom *= unigram[p]
+        with np.errstate(divide="ignore"):
+            return np.log(c) + (n - 1) * np.log(total) - np.log(denom)
+    if method != "llr":
+        raise ValueError(f"Método desconocido: {method}")
+    # Tabla 2×2: prefijo (n-1 palabras) × última palabra
+    pref_counts = index.counts(n - 1).astype(np.float64)
+    k11 = c
+    k12 = pref_counts[prefix] - c
+    k21 = unigram[last] - c
+    k22 = total - k11 - k12 - k21
+    k12, k21, k22 = (np.maximum(k, 0.0) for k in (k12, k21, k22))
+    n_all = k11 + k12 + k21 + k22
+    g2 = 2 * (
+        _xlogx(k11) + _xlogx(k12) + _xlogx(k21) + _xlogx(k22)
+        - _xlogx(k11 + k12) - _xlogx(k21 + k22) - _xlogx(k11 + k21) - _xlogx(k12 + k22)
+        + _xlogx(n_all)
+    )
+    # Solo colocaciones con asociación positiva
+    expected = (k11 + k12) * (k11 + k21) / np.maximum(n_all, 1)
+    return np.where(k11 > expected, g2, 0.0)
+
+
+def collocations(
+    index: NgramIndex,
+    n: int = 2,
+    method: Optional[str] = None,
+    stop_phrases: Iterable[str] = STOP_PHRASES,
+    min_count: int = MIN_COUNT,
+    top: int = TOP_N,
+) -> List[Dict]:
+    """Las top frases de n palabras por PMI o G², con al menos min_count apariciones."""
+    if n < 2:
+        raise ValueError("Las colocaciones necesitan n >= 2")
+    counts = index.counts(n, stop_phrases=tuple(stop_phrases))
+    scores = collocation_scores(index, n, counts, method)
+    cand = np.flatnonzero((counts >= min_count) & (scores > 0))
+    order = cand[np.lexsort((cand, -scores[cand]))][:top]
+    return [
+        {"phrase": " ".join(index.decode(n, int(g))), "count": int(counts[g]), "score": round(float(scores[g]), 3)}
+        for g in order
+    ]
@@ -0,0 +1,132 @@
+"""
+Caché persistente de scores de sentimiento (SQLite).
+
+Clave: digest del texto normalizado + versión de los scores. La
+normalización solo colapsa espacios (VADER separa por espacios y distingue
+mayúsculas, así que no se pasa a minúsculas). La versión la calcula
+sentiment.scores_version() a partir de MOVIE_HYPE_LEXICON, la versión de
+vaderSentiment y el motor (fast_vader.ENGINE_VERSION o vader): si cambia
+alguno, las entradas antiguas simplemente dejan de coincidir.
+
+Se comparte entre sentiment.py, thematic.py y sentiment_sources_report.py,
+y sobrevive entre ejecuciones (.cache/sentiment_scores.sqlite).
+"""
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_PATH = PROJECT_ROOT / ".cache" / "sentiment_scores.sqlite"
+
+# SQLite limita el número de parámetros por consulta
+_BATCH = 500
+
+Scores = Tuple[float, float, float, float]  # neg, neu, pos, compound
+
+
+def normalize_text(text: str) -> str:
+    """Colapsa espacios en blanco (no cambia el resultado de VADER)."""
+    return " ".join(text.split())
+
+
+def text_digest(text: str) -> bytes:
+    """Digest de 16 bytes del texto normalizado."""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+
+
+class ScoreCache:
+    """Tabla (version, digest) -> (neg, neu, pos, compound)."""
+
+    def __init__(self, version: str, path: Optional[Path] = None):
+        self.version = version
+        self.path = Path(path or CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " version TEXT NOT NULL,"
+            " digest BLOB NOT NULL,"
+            " neg REAL, neu REAL, pos REAL, compound REAL,"
+            " PRIMARY KEY (version, digest)"
+            ") WITHOUT ROWID"
+        )
+
+    def get_many(self, digests: Iterable[bytes]) -> Dict[bytes, Scores]:
+        """Devuelve los scores conocidos para los digests pedidos."""
+        digests = list(digests)
+        found: Dict[bytes, Scores] = {}
+        for i in range(0, len(digests), _BATCH):
+            chunk = digests[i:i + _BATCH]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT digest, neg, neu, pos, compound FROM scores"
+                f" WHERE version = ? AND digest IN ({marks})",
+                [self.version, *chunk],
+            )
+            for d, neg, neu, pos, compound in rows:
+                found[bytes(d)] = (neg, neu, pos, compound)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, Scores]]) -> None:
+        """Guarda (digest, scores); sobrescribe si ya existían."""
+        rows = [(self.version, d, *s) for d, s in items]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (version, digest, neg, neu, pos, compound)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def count(self) -> int:
+        """Número de entradas para la versión actual."""
+        (n,) = self._conn.execute(
+            "SELECT COUNT(*) FROM scores WHERE version = ?", (self.version,)
+        ).fetchone()
+        return n
+
+    def purge_other_versions(self) -> int:
+        """Elimina entradas de versiones antiguas del léxico. Devuelve cuántas."""
+        with self._conn:
+            cur = self._conn.execute("DELETE FROM scores WHERE version != ?", (self.version,))
+        return cur.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def lookup_or_score(
+    texts: List[str],
+    version: str,
+    score_fn,
+    path: Optional[Path] = None,
+) -> List[Scores]:
+    """
+    Scores de una lista de textos usando la caché.
+
+    Los textos repetidos se puntúan una sola vez; solo los ausentes de la caché
+    pasan por score_fn (lista de textos -> lista de Scores), y se guardan.
+    """
+    digests = [text_digest(t) for t in texts]
+    with ScoreCache(version, path) as cache:
+        known = cache.get_many(set(digests))
+        missing: Dict[bytes, str] = {}
+        for d, t in zip(digests, texts):
+            if d not in known and d not in missing:
+                missing[d] = t
+        if missing:
+            new_scores = score_fn(list(missing.values()))
+            fresh = list(zip(missing.keys(), new_scores))
+            cache.put_many(fresh)
+            known.update(fresh)
+    return [known[d] for d in digests]
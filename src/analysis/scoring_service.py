@@ -0,0 +1,464 @@
+"""
+Servicio local de puntuación de sentimiento (HTTP o socket Unix).
+
+Lanzar `python -m src.analysis.sentiment` para puntuar un comentario
+reconstruye el analizador y relee el dataset: segundos por consulta. Este
+servicio se queda en marcha con el analizador (VADER + MOVIE_HYPE_LEXICON,
+desde el snapshot del léxico) y el motor vectorizado ya cargados:
+
+  - cada petición deja sus textos en una cola; un hilo de lotes junta las
+    peticiones concurrentes en micro-lotes (hasta SCORER_MAX_BATCH textos,
+    esperando como mucho SCORER_MAX_WAIT_MS) y los puntúa de una vez
+  - los lotes pequeños se puntúan con polarity_scores (~0,1 ms por texto) y
+    los grandes con fast_vader (coste fijo ~1 ms, mucho más rápido por texto)
+  - con SCORER_WORKERS > 1 los lotes se reparten en un pool de procesos
+    (fork: heredan el analizador ya cargado) y varios lotes van en paralelo;
+    si un proceso muere, los lotes afectados fallan y el pool se recrea
+  - una petición espera como mucho SCORER_TIMEOUT_S segundos; si no, 503
+  - la latencia de cada petición entra en un t-digest (aggregates.py);
+    GET /stats devuelve p50/p90/p99, tamaño medio de lote, etc.
+
+Los scores son los de add_sentiment_to_reviews: neg/neu/pos/compound
+redondeados a 3 decimales y la etiqueta de label_sentiment.
+
+API (JSON):
+    POST /score   {"text": "..."}         -> {"neg", "neu", "pos", "compound", "label"}
+    POST /score   {"texts": ["...", ...]} -> {"results": [...]}
+    GET  /stats                           -> contadores y percentiles de latencia (ms)
+    GET  /health                          -> {"status": "ok"}
+
+Uso:
+    python -m src.analysis.scoring_service                      # http://127.0.0.1:8765
+    python -m src.analysis.scoring_service --unix /tmp/sentiment.sock
+    curl -s localhost:8765/score -d '{"text": "this movie is insane"}'
+    curl -s --unix-socket /tmp/sentiment.sock http://x/stats
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.analysis.aggregates import TDigest
+from src.analysis.sentiment import _get_analyzer, _init_worker, _pool_context, score_batch, sentiment_record
+
+DEFAULT_HOST = os.environ.get("SCORER_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("SCORER_PORT", "8765"))
+DEFAULT_WORKERS = int(os.environ.get("SCORER_WORKERS", "1"))
+DEFAULT_MAX_BATCH = int(os.environ.get("SCORER_MAX_BATCH", "256"))
+# 0 = no esperar: se juntan las peticiones que ya estén en cola
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("SCORER_MAX_WAIT_MS", "0"))
+# Espera máxima de una petición por sus scores (luego responde 503)
+DEFAULT_TIMEOUT_S = float(os.environ.get("SCORER_TIMEOUT_S", "30"))
+# Desde este tamaño de lote compensa el motor vectorizado (ver fast_vader.py)
+FAST_MIN_BATCH = 16
+MAX_BODY_BYTES = 1 << 20
+MAX_TEXTS_PER_REQUEST = 1000
+
+Scores = Tuple[float, float, float, float]
+
+
+def _score_rows(texts: List[str]) -> List[Scores]:
+    """(neg, neu, pos, compound) de cada texto con el motor adecuado al tamaño del lote."""
+    engine = "fast" if len(texts) >= FAST_MIN_BATCH else "vader"
+    return score_batch(texts, workers=1, engine=engine).rows()
+
+
+def warm_up() -> bool:
+    """Carga el analizador y el motor vectorizado (snapshot del léxico). False si no hay VADER."""
+    if _get_analyzer() is None:
+        return False
+    _score_rows(["warm up"])
+    _score_rows(["warm up"] * FAST_MIN_BATCH)
+    return True
+
+
+class LatencyStats:
+    """Latencias (ms) por petición en un t-digest + contadores; seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.digest = TDigest()
+        self.max_ms = 0.0
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.max_batch = 0
+        self.errors = 0
+
+    def record_request(self, ms: float, n_texts: int) -> None:
+        with self._lock:
+            self.digest.add(ms)
+            self.max_ms = max(self.max_ms, ms)
+            self.requests += 1
+            self.texts += n_texts
+
+    def record_batch(self, n_texts: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batched_texts += n_texts
+            self.max_batch = max(self.max_batch, n_texts)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            q = self.digest.quantile
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "texts": self.texts,
+                "errors": self.errors,
+                "batches": self.batches,
+                "avg_batch": round(self.batched_texts / self.batches, 2) if self.batches else 0,
+                "max_batch": self.max_batch,
+                "latency_ms": {
+                    "p50": round(q(0.5) or 0, 3),
+                    "p90": round(q(0.9) or 0, 3),
+                    "p99": round(q(0.99) or 0, 3),
+                    "max": round(self.max_ms, 3),
+                },
+            }
+
+
+class MicroBatcher:
+    """
+    Junta en un lote los textos de las peticiones que llegan mientras se
+    puntúa el anterior y resuelve un Future por petición.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        stats: Optional[LatencyStats] = None,
+        timeout_s: float = DEFAULT_TIMEOUT_S,
+    ):
+        self.workers = workers
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.timeout_s = timeout_s
+        self.stats = stats or LatencyStats()
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._pool = None
+        self._slots = None
+        self._broken = False
+        if workers > 1:
+            self._pool = self._new_pool()
+            # Como mucho un lote en vuelo por proceso; el resto sigue juntándose en cola
+            self._slots = threading.BoundedSemaphore(workers)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        fut: Future = Future()
+        self._queue.put((texts, fut))
+        return fut
+
+    def score(self, texts: List[str], timeout: Optional[float] = None) -> List[Scores]:
+        """Scores de texts; TimeoutError de concurrent.futures si tardan más de timeout (None = timeout_s)."""
+        return self.submit(texts).result(self.timeout_s if timeout is None else timeout)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # fork: los procesos heredan el analizador y el motor ya cargados
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, mp_context=_pool_context())
+
+    def _restart_pool(self) -> None:
+        """Sustituye un pool roto (murió un proceso) por uno nuevo."""
+        old, self._pool = self._pool, self._new_pool()
+        self._broken = False
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> Tuple[List[Tuple[List[str], Future]], bool]:
+        """Lote: first + lo que ya esté en cola (y lo que llegue en max_wait)."""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            size += len(item[0])
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if self._slots is not None:
+                self._slots.acquire()
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[List[str], Future]]) -> None:
+        texts = [t for item, _ in batch for t in item]
+        self.stats.record_batch(len(texts))
+        if self._pool is None:
+            try:
+                self._resolve(batch, _score_rows(texts))
+            except Exception as e:  # noqa: BLE001 - el error se entrega a cada petición
+                self._fail(batch, e)
+            return
+        if self._broken:
+            self._restart_pool()
+        try:
+            pending = self._pool.submit(_score_rows, texts)
+        except Exception as e:  # noqa: BLE001 - BrokenProcessPool: el hilo de lotes no debe morir
+            self._slots.release()
+            self._fail(batch, e)
+            self._restart_pool()
+            return
+
+        def done(f: Future) -> None:
+            self._slots.release()
+            error = f.exception()
+            if error is not None:
+                # El próximo lote ya no se manda a este pool
+                if isinstance(error, BrokenProcessPool):
+                    self._broken = True
+                self._fail(batch, error)
+            else:
+                self._resolve(batch, f.result())
+
+        pending.add_done_callback(done)
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[List[str], Future]], rows: List[Scores]) -> None:
+        i = 0
+        for texts, fut in batch:
+            fut.set_result(rows[i:i + len(texts)])
+            i += len(texts)
+
+    def _fail(self, batch: List[Tuple[List[str], Future]], error: BaseException) -> None:
+        for _, fut in batch:
+            self.stats.record_error()
+            fut.set_exception(error)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """Rutas /score, /stats y /health; el servidor trae el batcher y las estadísticas."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SentimentScoring/1.0"
+
+    def setup(self) -> None:
+        # Sin Nagle (solo TCP): cabeceras y cuerpo van en dos escrituras y el
+        # ACK retardado del cliente añadiría ~40 ms a cada respuesta
+        self.disable_nagle_algorithm = self.request.family != socket.AF_UNIX
+        super().setup()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def address_string(self) -> str:
+        # Con socket Unix client_address es una cadena vacía
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/stats":
+            self._send(200, self.server.stats.summary())
+        elif self.path == "/health":
+            self._send(200, {"status": "ok"})
+        else:
+            self._send(404, {"error": f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self) -> None:
+        t0 = time.perf_counter()
+        if self.path != "/score":
+            self._send(404, {"error": f"Ruta desconocida: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.server.stats.record_error()
+            self.close_connection = True
+            self._send(413, {"error": f"Cuerpo demasiado grande (máx. {MAX_BODY_BYTES} bytes)"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            single = "text" in payload
+            texts = [payload["text"]] if single else payload["texts"]
+            if not isinstance(texts, list) or len(texts) > MAX_TEXTS_PER_REQUEST:
+                raise ValueError(f"'texts' debe ser una lista de hasta {MAX_TEXTS_PER_REQUEST} textos")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.server.stats.record_error()
+            msg = str(e) if isinstance(e, ValueError) else 'Se espera {"text": "..."} o {"texts": [...]}'
+            self._send(400, {"error": msg})
+            return
+
+        # Textos vacíos o no string: scores neutros, como score_texts()
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        try:
+            rows = self.server.batcher.score(texts)
+        except FutureTimeout:
+            self.server.stats.record_error()
+            self._send(503, {"error": f"Sin respuesta en {self.server.batcher.timeout_s:g} s; reintenta más tarde"})
+            return
+        except Exception as e:  # noqa: BLE001
+            self._send(500, {"error": f"Error al puntuar: {e}"})
+            return
+        results = [sentiment_record(*row) for row in rows]
+        self._send(200, results[0] if single else {"results": results})
+        self.server.stats.record_request(1000 * (time.perf_counter() - t0), len(texts))
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], batcher: MicroBatcher, verbose: bool = False):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.verbose = verbose
+        super().__init__(address, ScoringHandler)
+
+
+class ScoringUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, batcher: MicroBatcher, verbose: bool = False):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, ScoringHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_socket: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    max_batch: int = DEFAULT_MAX_BATCH,
+    max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    verbose: bool = False,
+    timeout_s: float = DEFAULT_TIMEOUT_S,
+) -> socketserver.BaseServer:
+    """Servidor listo para serve_forever(), con el analizador ya cargado."""
+    if not warm_up():
+        raise RuntimeError("Instala vaderSentiment: pip install vaderSentiment")
+    batcher = MicroBatcher(workers, max_batch, max_wait_ms, timeout_s=timeout_s)
+    if unix_socket:
+        return ScoringUnixServer(unix_socket, batcher, verbose)
+    return ScoringHTTPServer((host, port), batcher, verbose)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class ScoringClient:
+    """Cliente con conexión persistente (keep-alive) para las herramientas de moderación."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: Optional[str] = None,
+        timeout: float = 10.0,
+    ):
+        if unix_socket:
+            self._conn: http.client.HTTPConnection = _UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self._conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self._conn.request(method, path, body=body, headers=headers)
+        resp = self._conn.getresponse()
+        data = json.loads(resp.read() or b"{}")
+        if resp.status != 200:
+            raise RuntimeError(f"{resp.status}: {data.get('error')}")
+        return data
+
+    def score(self, text: str) -> Dict[str, Any]:
+        return self._request("POST", "/score", {"text": text})
+
+    def score_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        return self._request("POST", "/score", {"texts": list(texts)})["results"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request("GET", "/stats")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servicio local de puntuación de sentimiento.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="RUTA", help="Escuchar en un socket Unix en lugar de TCP")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Procesos para puntuar lotes (1 = en el proceso del servidor)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Textos máximos por micro-lote")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="Espera máxima para juntar peticiones")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_S, help="Segundos máximos por petición (luego 503)")
+    parser.add_argument("--verbose", action="store_true", help="Registrar cada petición")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    server = make_server(
+        args.host, args.port, args.unix, args.workers, args.max_batch, args.max_wait_ms, args.verbose, args.timeout
+    )
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"✓ Analizador cargado en {1000 * (time.perf_counter() - t0):.0f} ms; escuchando en {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+        print(json.dumps(server.stats.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
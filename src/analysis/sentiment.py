@@ -22,22 +22,58 @@ Análisis de sentimiento sobre reseñas y comentarios.
    "not", "don't", "no") porque VADER necesita las negaciones para invertir
    el sentimiento correctamente.
 
-Salida: insights_sentimiento.json (distribución, media por fuente) y
-       reviews_con_sentimiento.json (cada reseña con su score).
+6. Los scores se guardan en una caché persistente (score_cache.py) por digest
+   del texto y versión del léxico: un mismo comentario se puntúa una sola vez
+   aunque lo pidan varios módulos o varias ejecuciones.
+
+7. Los lotes se puntúan por defecto con el motor vectorizado de fast_vader.py,
+   que reproduce polarity_scores con NumPy (mismos scores, ~13x más rápido en
+   lotes grandes). SENTIMENT_ENGINE=vader fuerza el analizador original.
+
+8. El analizador se carga de un snapshot compilado del léxico
+   (lexicon_snapshot.py) en vez de parsear los ficheros de VADER cada vez.
+
+9. Modo incremental (por defecto): las reseñas se identifican por review_id
+   y solo se puntúan las nuevas o modificadas respecto a la ejecución
+   anterior; el cubo de agregados guardado se actualiza in situ.
+
+10. load_scored_reviews() es el cargador compartido para las etapas
+    posteriores (temático, informe por fuente): dataset limpio + scores ya
+    guardados, puntuando solo lo que falte.
+
+Salida: insights_sentimiento.json (distribución, media por fuente),
+       reviews_con_sentimiento.json (cada reseña con su score) y
+       aggregate_cube.json (cubo fuente × vídeo × etiqueta que leen los demás
+       informes y el modo incremental, ver cube.py).
 """
+import gc
+import hashlib
+import importlib.util
 import json
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+from src.analysis.aggregates import SentimentAggregate
+from src.analysis.context import AnalysisContext
+from src.analysis.cube import CUBE_PATH, AggregateCube, data_fingerprint
+from src.analysis.score_cache import lookup_or_score
+from src.cleaning.pipeline import load_raw_data, review_ids
+from src.profiling import span, stop_worker_tracing
 
-try:
-    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-    HAS_VADER = True
-except ImportError:
-    HAS_VADER = False
+# vaderSentiment se importa al crear el analizador (lexicon_snapshot.py), no
+# al importar este módulo: aquí solo se comprueba que esté instalado
+HAS_VADER = importlib.util.find_spec("vaderSentiment") is not None
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
 OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
+INSIGHTS_PATH = OUTPUT_INSIGHTS / "insights_sentimiento.json"
+ENRICHED_PATH = OUTPUT_INSIGHTS / "reviews_con_sentimiento.json"
 
 # Palabras que en contexto de cine/hype suelen ser positivas (VADER las marca neutras/negativas)
 # Valor típico VADER: 2.x = positivo fuerte, 1.x = positivo suave
@@ -53,7 +89,20 @@ SENTIMENT_LABELS = {
     "neutral": ("compound", None),
 }
 
+_NEUTRAL_SCORES = {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+
+# Procesos para puntuar lotes grandes (1 = en el proceso actual)
+DEFAULT_WORKERS = int(os.environ.get("SENTIMENT_WORKERS", "1"))
+# Por debajo de este tamaño no compensa arrancar un pool de procesos
+MIN_PARALLEL_BATCH = 2000
+# Motor para lotes: "fast" (vectorizado, fast_vader.py) o "vader" (polarity_scores)
+DEFAULT_ENGINE = os.environ.get("SENTIMENT_ENGINE", "fast")
+# Reutilizar scores y agregados de la ejecución anterior (SENTIMENT_INCREMENTAL=0 lo desactiva)
+DEFAULT_INCREMENTAL = os.environ.get("SENTIMENT_INCREMENTAL", "1") != "0"
+
 _analyzer_instance = None
+_lexicon_version: Optional[str] = None
+_scores_versions: Dict[str, str] = {}
 
 
 def _get_analyzer():
@@ -62,8 +111,9 @@ def _get_analyzer():
     if not HAS_VADER:
         return None
     if _analyzer_instance is None:
-        _analyzer_instance = SentimentIntensityAnalyzer()
-        _analyzer_instance.lexicon.update(MOVIE_HYPE_LEXICON)
+        # Snapshot compilado (lexicon_snapshot.py): VADER + MOVIE_HYPE_LEXICON
+        from src.analysis.lexicon_snapshot import load_analyzer
+        _analyzer_instance = load_analyzer()
     return _analyzer_instance
 
 
@@ -73,14 +123,220 @@ def analyze_sentiment(text: str, analyzer=None) -> Dict[str, float]:
     Returns: {'neg': 0-1, 'neu': 0-1, 'pos': 0-1, 'compound': -1 a 1}
     """
     if not text or not isinstance(text, str):
-        return {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+        return dict(_NEUTRAL_SCORES)
     if analyzer is None:
         analyzer = _get_analyzer()
     if analyzer is None:
-        return {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+        return dict(_NEUTRAL_SCORES)
     return analyzer.polarity_scores(text)
 
 
+def lexicon_version() -> str:
+    """
+    Versión del léxico efectivo: hash de MOVIE_HYPE_LEXICON + versión de
+    vaderSentiment. Forma parte de la clave de la caché de scores.
+    """
+    global _lexicon_version
+    if _lexicon_version is None:
+        try:
+            vader = metadata.version("vaderSentiment")
+        except metadata.PackageNotFoundError:
+            vader = "none"
+        payload = json.dumps(MOVIE_HYPE_LEXICON, sort_keys=True) + "|" + vader
+        _lexicon_version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    return _lexicon_version
+
+
+def scores_version(engine: Optional[str] = None) -> str:
+    """
+    Versión de los scores: lexicon_version() + motor que puntúa ("fast" con
+    fast_vader.ENGINE_VERSION, o "vader"). Clave de la caché de scores y
+    parte de la huella del cubo: un cambio en fast_vader.py que suba
+    ENGINE_VERSION deja sin efecto los scores guardados.
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in _scores_versions:
+        tag = "vader"
+        if engine == "fast":
+            try:
+                from src.analysis.fast_vader import ENGINE_VERSION
+                tag = f"fast{ENGINE_VERSION}"
+            except ImportError:
+                # Sin numpy, score_batch puntúa con polarity_scores
+                pass
+        _scores_versions[engine] = f"{lexicon_version()}-{tag}"
+    return _scores_versions[engine]
+
+
+class BatchScores(NamedTuple):
+    """Scores de un lote en arrays compactos (float64), en el orden de entrada."""
+
+    neg: array
+    neu: array
+    pos: array
+    compound: array
+
+    def rows(self) -> List[Tuple[float, float, float, float]]:
+        """Lista de tuplas (neg, neu, pos, compound)."""
+        return list(zip(self.neg, self.neu, self.pos, self.compound))
+
+    def as_dicts(self) -> List[Dict[str, float]]:
+        return [
+            {"neg": n, "neu": u, "pos": p, "compound": c}
+            for n, u, p, c in zip(self.neg, self.neu, self.pos, self.compound)
+        ]
+
+
+_worker_analyzer = None
+
+
+def _init_worker() -> None:
+    """
+    Inicializador del pool. Con fork el analizador ya viene heredado del
+    proceso padre; con spawn se carga del snapshot del léxico. Los workers
+    no miden memoria aunque el padre use --trace-memory.
+    """
+    global _worker_analyzer
+    stop_worker_tracing()
+    _worker_analyzer = _get_analyzer()
+
+
+def _pool_context():
+    """fork si está disponible: los workers comparten el léxico ya cargado."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _score_chunk(texts: List[str], analyzer=None) -> array:
+    """Puntúa un trozo; devuelve un array plano neg, neu, pos, compound, neg, ..."""
+    analyzer = analyzer or _worker_analyzer or _get_analyzer()
+    flat = array("d")
+    for t in texts:
+        if not t or not isinstance(t, str) or analyzer is None:
+            flat.extend((0.0, 1.0, 0.0, 0.0))
+            continue
+        sc = analyzer.polarity_scores(t)
+        flat.extend((sc["neg"], sc["neu"], sc["pos"], sc["compound"]))
+    return flat
+
+
+def _score_fast(texts: List[str]) -> Optional[BatchScores]:
+    """Puntúa con el motor vectorizado; None si no está disponible."""
+    try:
+        from src.analysis.fast_vader import get_engine
+    except ImportError:
+        return None
+    engine = get_engine()
+    if engine is None:
+        return None
+    valid = [i for i, t in enumerate(texts) if t and isinstance(t, str)]
+    cols = [array("d", [v] * len(texts)) for v in (0.0, 1.0, 0.0, 0.0)]
+    scored = engine.polarity_scores_batch([texts[i] for i in valid])
+    for col, key in zip(cols, ("neg", "neu", "pos", "compound")):
+        for i, v in zip(valid, scored[key]):
+            col[i] = v
+    return BatchScores(*cols)
+
+
+def score_batch(
+    texts: List[str],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    analyzer=None,
+    engine: Optional[str] = None,
+) -> BatchScores:
+    """
+    Puntúa muchos textos con VADER, opcionalmente en un pool de procesos.
+
+    Args:
+        texts: Textos a puntuar (vacíos -> scores neutros).
+        workers: Procesos (None = DEFAULT_WORKERS; 0 = todos los núcleos).
+            Con 1, con lotes pequeños o con un analyzer propio se puntúa en
+            el proceso actual.
+        chunksize: Textos por tarea enviada a cada proceso.
+        analyzer: Analizador propio (solo en el proceso actual).
+        engine: "fast" o "vader" (None = DEFAULT_ENGINE). El motor "fast"
+            puntúa en el proceso actual y no admite analyzer propio.
+
+    Returns:
+        BatchScores con cuatro arrays alineados con texts.
+    """
+    if (engine or DEFAULT_ENGINE) == "fast" and analyzer is None:
+        fast = _score_fast(texts)
+        if fast is not None:
+            return fast
+
+    n = len(texts)
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n or 1))
+
+    if workers == 1 or analyzer is not None or n < MIN_PARALLEL_BATCH:
+        chunks = [_score_chunk(texts, analyzer)]
+    else:
+        if not chunksize:
+            # ~4 tareas por proceso: reparte bien sin saturar de mensajes
+            chunksize = max(1, -(-n // (workers * 4)))
+        parts = [texts[i:i + chunksize] for i in range(0, n, chunksize)]
+        # Cargar antes de crear el pool para que los workers lo hereden;
+        # gc.freeze evita que el recolector toque (y copie) esas páginas
+        _get_analyzer()
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, mp_context=_pool_context()
+            ) as pool:
+                chunks = list(pool.map(_score_chunk, parts))
+        finally:
+            gc.unfreeze()
+
+    cols = [array("d") for _ in range(4)]
+    for flat in chunks:
+        for k in range(4):
+            cols[k].extend(flat[k::4])
+    return BatchScores(*cols)
+
+
+def score_texts(
+    texts: List[str],
+    analyzer=None,
+    use_cache: bool = True,
+    workers: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """
+    Scores VADER de una lista de textos, pasando por la caché persistente.
+    Los textos vacíos devuelven scores neutros. Si se pasa un analyzer distinto
+    del global (léxico propio), no se usa la caché. Los textos que faltan en la
+    caché se puntúan con score_batch (workers procesos).
+    """
+    default = _get_analyzer()
+    if analyzer is None:
+        analyzer = default
+    if analyzer is None:
+        return [dict(_NEUTRAL_SCORES) for _ in texts]
+
+    valid = [i for i, t in enumerate(texts) if t and isinstance(t, str)]
+    out = [dict(_NEUTRAL_SCORES) for _ in texts]
+    if not valid:
+        return out
+
+    batch_texts = [texts[i] for i in valid]
+    if use_cache and analyzer is default:
+        scores = lookup_or_score(
+            batch_texts,
+            scores_version(),
+            lambda missing: score_batch(missing, workers=workers).rows(),
+        )
+    else:
+        scores = score_batch(batch_texts, workers=1, analyzer=analyzer).rows()
+    for i, (neg, neu, pos, compound) in zip(valid, scores):
+        out[i] = {"neg": neg, "neu": neu, "pos": pos, "compound": compound}
+    return out
+
+
 def label_sentiment(compound: float) -> str:
     """Etiqueta: positive, neutral o negative según compound."""
     if compound >= 0.05:
@@ -90,23 +346,29 @@ def label_sentiment(compound: float) -> str:
     return "neutral"
 
 
-def add_sentiment_to_reviews(reviews: List[Dict], analyzer=None) -> List[Dict]:
+def add_sentiment_to_reviews(
+    reviews: List[Dict],
+    analyzer=None,
+    workers: Optional[int] = None,
+) -> List[Dict]:
     """Añade scores de sentimiento a cada reseña (in-place)."""
-    if analyzer is None:
-        analyzer = _get_analyzer()
-    for r in reviews:
-        content = r.get("content") or ""
-        scores = analyze_sentiment(content, analyzer)
-        r["sentiment"] = {
-            "neg": round(scores["neg"], 3),
-            "neu": round(scores["neu"], 3),
-            "pos": round(scores["pos"], 3),
-            "compound": round(scores["compound"], 3),
-            "label": label_sentiment(scores["compound"]),
-        }
+    all_scores = score_texts([r.get("content") or "" for r in reviews], analyzer, workers=workers)
+    for r, scores in zip(reviews, all_scores):
+        r["sentiment"] = sentiment_record(scores["neg"], scores["neu"], scores["pos"], scores["compound"])
     return reviews
 
 
+def sentiment_record(neg: float, neu: float, pos: float, compound: float) -> Dict[str, Any]:
+    """Scores redondeados a 3 decimales + etiqueta (formato del campo sentiment)."""
+    return {
+        "neg": round(neg, 3),
+        "neu": round(neu, 3),
+        "pos": round(pos, 3),
+        "compound": round(compound, 3),
+        "label": label_sentiment(compound),
+    }
+
+
 def _get_engagement(r: Dict) -> int:
     """Likes o helpful_votes para ponderar por engagement."""
     for key in ("likes", "helpful_votes"):
@@ -119,65 +381,40 @@ def _get_engagement(r: Dict) -> int:
     return 0
 
 
-def sentiment_insights(data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Genera insights de sentimiento: distribución, media por fuente,
-    sentimiento ponderado por engagement (likes).
-    """
-    reviews = data.get("reviews", [])
-    if not reviews:
-        return {"message": "No hay reseñas para analizar"}
-
-    if not HAS_VADER:
-        return {
-            "error": "Instala vaderSentiment: pip install vaderSentiment",
-            "message": "No se pudo ejecutar el análisis de sentimiento.",
-        }
+def _cube_aggregates(cube: AggregateCube) -> Tuple[SentimentAggregate, Dict[str, SentimentAggregate]]:
+    """Agregado global y por fuente a partir de las celdas del cubo."""
+    return cube.total().sentiment, {src: cell.sentiment for src, cell in cube.by_source().items()}
 
-    analyzer = _get_analyzer()
-    add_sentiment_to_reviews(reviews, analyzer)
 
-    by_label = {"positive": 0, "neutral": 0, "negative": 0}
-    compounds = []
+def insights_from_aggregates(
+    total_reviews: int,
+    overall: SentimentAggregate,
+    source_aggs: Dict[str, SentimentAggregate],
+) -> Dict[str, Any]:
+    """Construye insights_sentimiento.json a partir de los agregados."""
     by_source = {}
-    weighted_sum = 0.0
-    weight_total = 0.0
-    engagement_by_label = {"positive": 0, "neutral": 0, "negative": 0}
-
-    for r in reviews:
-        sent = r.get("sentiment", {})
-        label = sent.get("label", "neutral")
-        compound = sent.get("compound", 0.0)
-        wgt = 1 + _get_engagement(r)
-
-        by_label[label] = by_label.get(label, 0) + 1
-        compounds.append(compound)
-        weighted_sum += compound * wgt
-        weight_total += wgt
-        engagement_by_label[label] += _get_engagement(r)
-
-        src = r.get("source", "Unknown")
-        if src not in by_source:
-            by_source[src] = {"count": 0, "compound_sum": 0, "positive": 0, "negative": 0, "neutral": 0}
-        by_source[src]["count"] += 1
-        by_source[src]["compound_sum"] += compound
-        by_source[src][label] = by_source[src].get(label, 0) + 1
-
-    # Media compound por fuente
-    for src, vals in by_source.items():
-        n = vals["count"]
-        vals["avg_compound"] = round(vals["compound_sum"] / n, 3) if n else 0
-        del vals["compound_sum"]
-
-    avg_compound = sum(compounds) / len(compounds) if compounds else 0
-    avg_compound_weighted = weighted_sum / weight_total if weight_total > 0 else avg_compound
+    for src, agg in source_aggs.items():
+        by_source[src] = {
+            "count": agg.count,
+            "positive": agg.labels["positive"],
+            "negative": agg.labels["negative"],
+            "neutral": agg.labels["neutral"],
+            "avg_compound": round(agg.mean, 3),
+            "compound_stats": agg.summary(),
+        }
+
+    by_label = dict(overall.labels)
+    engagement_by_label = dict(overall.engagement_by_label)
+    avg_compound = overall.mean
+    avg_compound_weighted = overall.weighted_mean
     total_engagement = sum(engagement_by_label.values())
     pct_eng_pos = round(100 * engagement_by_label["positive"] / total_engagement, 1) if total_engagement else 0
 
     result = {
-        "total_reviews": len(reviews),
+        "total_reviews": total_reviews,
         "by_label": by_label,
         "avg_compound": round(avg_compound, 3),
+        "compound_stats": overall.summary(),
         "by_source": by_source,
         "overall_label": label_sentiment(avg_compound),
     }
@@ -192,34 +429,199 @@ def sentiment_insights(data: Dict[str, Any]) -> Dict[str, Any]:
     return result
 
 
-def run_sentiment_analysis() -> Dict[str, Any]:
-    """Ejecuta análisis de sentimiento y guarda resultados."""
+def sentiment_insights(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Genera insights de sentimiento: distribución, media por fuente,
+    sentimiento ponderado por engagement (likes).
+    """
+    reviews = data.get("reviews", [])
+    if not reviews:
+        return {"message": "No hay reseñas para analizar"}
+
+    if not HAS_VADER:
+        return {
+            "error": "Instala vaderSentiment: pip install vaderSentiment",
+            "message": "No se pudo ejecutar el análisis de sentimiento.",
+        }
+
+    analyzer = _get_analyzer()
+    add_sentiment_to_reviews(reviews, analyzer)
+    return insights_from_cube(AggregateCube.build(reviews))
+
+
+def insights_from_cube(cube: AggregateCube) -> Dict[str, Any]:
+    """insights_sentimiento.json a partir del cubo de agregados (cube.py)."""
+    return insights_from_aggregates(cube.total_reviews, *_cube_aggregates(cube))
+
+
+def _load_previous_run() -> Optional[Tuple[List[Dict], AggregateCube]]:
+    """
+    Reseñas enriquecidas y cubo de agregados de la ejecución anterior, si
+    existen y son de la misma versión del léxico y del mismo número de reseñas.
+    """
+    if not (ENRICHED_PATH.exists() and CUBE_PATH.exists()):
+        return None
+    try:
+        with open(ENRICHED_PATH, "r", encoding="utf-8") as f:
+            prev_reviews = json.load(f).get("reviews", [])
+    except (OSError, ValueError):
+        return None
+    stored = AggregateCube.load()
+    if stored is None or not (stored.fingerprint or "").endswith(":" + scores_version()):
+        return None
+    if stored.total_reviews != len(prev_reviews):
+        return None
+    return prev_reviews, stored
+
+
+def _reuse_scores(reviews: List[Dict], prev_reviews: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Copia el sentiment de prev_reviews a las reseñas con el mismo review_id
+    y el mismo texto. Devuelve las que quedan por puntuar y cuántas no
+    cambiaron nada (tampoco fuente ni engagement).
+    """
+    prev_by_id = dict(zip(review_ids(prev_reviews), prev_reviews))
+    to_score: List[Dict] = []
+    unchanged = 0
+    for rid, r in zip(review_ids(reviews), reviews):
+        prev = prev_by_id.get(rid)
+        if prev is not None and prev.get("content") == r.get("content") and "sentiment" in prev:
+            r["sentiment"] = prev["sentiment"]
+            if prev.get("source") == r.get("source") and _get_engagement(prev) == _get_engagement(r):
+                unchanged += 1
+        else:
+            to_score.append(r)
+    return to_score, unchanged
+
+
+def load_scored_reviews() -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Cargador compartido de las etapas de análisis: el dataset limpio
+    (data/clean/) con el sentimiento que guardó run_sentiment_analysis()
+    en reviews_con_sentimiento.json. Solo se puntúan las reseñas sin score
+    guardado (nuevas, con texto distinto o sin ejecución previa), así que
+    todas las etapas usan las mismas etiquetas. Sin data/clean/ se usan los
+    datos crudos. Devuelve (data, {"scored": n, "reused": m}).
+    """
+    path_data = DATA_CLEAN / "reviews_f1_clean.json"
+    if path_data.exists():
+        with open(path_data, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = load_raw_data()
+    return data, attach_scores(data)
+
+
+def attach_scores(data: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Añade a data["reviews"] (in-place) los scores guardados en la ejecución
+    anterior y puntúa el resto. Devuelve {"scored": n, "reused": m}.
+    """
+    reviews = data.get("reviews", [])
+    previous = _load_previous_run() if HAS_VADER else None
+    to_score = reviews if previous is None else _reuse_scores(reviews, previous[0])[0]
+    add_sentiment_to_reviews(to_score)
+    return {"scored": len(to_score), "reused": len(reviews) - len(to_score)}
+
+
+def incremental_sentiment(
+    reviews: List[Dict],
+    prev_reviews: List[Dict],
+    stored: AggregateCube,
+) -> Tuple[AggregateCube, Dict[str, int]]:
+    """
+    Puntúa solo las reseñas nuevas o con texto distinto al de la ejecución
+    anterior (por review_id) y reutiliza el resto.
+
+    Si la ejecución anterior sigue entera y sin cambios (solo se añadieron
+    reseñas), el cubo guardado se actualiza in situ con las nuevas. Si
+    alguna reseña desapareció o cambió (texto, fuente o engagement), el cubo
+    se recalcula desde los scores (sin volver a puntuar): el t-digest no
+    admite restar observaciones.
+    """
+    to_score, unchanged = _reuse_scores(reviews, prev_reviews)
+    add_sentiment_to_reviews(to_score)
+
+    stats = {"scored": len(to_score), "reused": len(reviews) - len(to_score), "in_place": 0}
+    if unchanged == len(prev_reviews) and unchanged + len(to_score) == len(reviews):
+        cube = stored.merge(AggregateCube.build(to_score))
+        stats["in_place"] = 1
+    else:
+        cube = AggregateCube.build(reviews)
+    return cube, stats
+
+
+def run_sentiment_analysis(
+    incremental: Optional[bool] = None,
+    ctx: Optional[AnalysisContext] = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta análisis de sentimiento y guarda resultados.
+
+    Args:
+        incremental: Reutiliza los scores de reviews_con_sentimiento.json y
+            el cubo de agregados (aggregate_cube.json) de la ejecución
+            anterior; solo se puntúan reseñas nuevas o modificadas
+            (None = DEFAULT_INCREMENTAL). Sin ejecución previa válida se
+            hace el análisis completo.
+        ctx: Contexto compartido de run_analysis.py (context.py): se usa su
+            dataset y se le dejan los scores y el cubo para las demás etapas.
+    """
     OUTPUT_INSIGHTS.mkdir(parents=True, exist_ok=True)
     path_data = DATA_CLEAN / "reviews_f1_clean.json"
     if not path_data.exists():
         raise FileNotFoundError(f"Ejecuta primero el pipeline de limpieza. No existe {path_data}")
+    if incremental is None:
+        incremental = DEFAULT_INCREMENTAL
+
+    with span("load") as sp:
+        if ctx is not None:
+            data = ctx.data
+        else:
+            with open(path_data, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        sp.records = len(data.get("reviews", []))
+        previous = _load_previous_run() if incremental and HAS_VADER else None
 
-    with open(path_data, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    insights = sentiment_insights(data)
+    reviews = data.get("reviews", [])
+    with span("score_and_aggregate", records=sp.records):
+        if not reviews or not HAS_VADER:
+            insights = sentiment_insights(data)
+            cube = None
+        elif previous is not None:
+            cube, stats = incremental_sentiment(reviews, *previous)
+            insights = insights_from_cube(cube)
+            mode = "agregados actualizados in situ" if stats["in_place"] else "agregados recalculados"
+            print(f"✓ Modo incremental: {stats['scored']} reseñas puntuadas, {stats['reused']} reutilizadas ({mode})")
+        else:
+            add_sentiment_to_reviews(reviews, _get_analyzer())
+            # Una sola pasada: el resto de informes leen este cubo
+            cube = AggregateCube.build(reviews)
+            insights = insights_from_cube(cube)
 
     if "error" in insights:
         print(f"⚠ {insights['error']}")
         return insights
 
-    # Guardar insights de sentimiento
-    path_out = OUTPUT_INSIGHTS / "insights_sentimiento.json"
-    with open(path_out, "w", encoding="utf-8") as f:
-        json.dump(insights, f, ensure_ascii=False, indent=2)
-    print(f"✓ Insights de sentimiento guardados en {path_out}")
-
-    # Opcional: guardar datos enriquecidos con sentimiento
-    path_enriched = OUTPUT_INSIGHTS / "reviews_con_sentimiento.json"
-    with open(path_enriched, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✓ Reviews con sentimiento guardados en {path_enriched}")
-
+    with span("save", records=sp.records):
+        # Guardar insights de sentimiento
+        with open(INSIGHTS_PATH, "w", encoding="utf-8") as f:
+            json.dump(insights, f, ensure_ascii=False, indent=2)
+        print(f"✓ Insights de sentimiento guardados en {INSIGHTS_PATH}")
+
+        # Opcional: guardar datos enriquecidos con sentimiento
+        with open(ENRICHED_PATH, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"✓ Reviews con sentimiento guardados en {ENRICHED_PATH}")
+
+        # Cubo de agregados: lo leen los demás informes y la próxima
+        # ejecución incremental parte de aquí
+        if cube is not None:
+            cube.fingerprint = data_fingerprint(path_data)
+            cube.save()
+
+    if ctx is not None and HAS_VADER:
+        ctx.set_scored(cube)
     return insights
 
 
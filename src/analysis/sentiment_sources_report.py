@@ -4,21 +4,29 @@ para estrategias de marketing: word clouds, distribución de sentimiento,
 palabras clave por fuente, engagement.
 """
 import json
+import os
 import re
 from pathlib import Path
-from collections import Counter
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
 FIGURES_DIR = OUTPUT_INSIGHTS / "figures"
-
-from src.analysis.stopwords_social import SOCIAL_STOP_WORDS
-
-_URL_RE = re.compile(r"https?://\S+|www\.\S+|\b\w+\.(?:com|org|net)\b", re.I)
-_NUMERIC_RE = re.compile(r"^\d+$")
+# Formato de las gráficas: png (matplotlib + wordcloud) o, sin importar
+# ninguna librería de dibujo, svg / vega (Vega-Lite JSON; ver vector_charts.py)
+FIGURE_FORMAT = os.environ.get("FIGURE_FORMAT", "png").lower()
+FIGURE_EXTENSIONS = {"png": ".png", "svg": ".svg", "vega": ".vl.json"}
+
+from src.analysis.aggregates import SentimentAggregate
+from src.analysis.context import AnalysisContext
+from src.analysis.corpus import TokenCorpus, corpus_for_reviews
+from src.analysis.cube import AggregateCube, load_cube
+from src.analysis.dtm import indicator, term_matrix
+from src.analysis.figures import FigureTask, render_figures
+from src.analysis import vector_charts
+from src.profiling import span
 
 # YouTube: cada video se analiza por separado en gráficas e insights
 YOUTUBE_VIDEO_LABELS = {
@@ -27,23 +35,6 @@ YOUTUBE_VIDEO_LABELS = {
 }
 
 
-def _tokenize(text: str) -> List[str]:
-    """Tokeniza texto: palabras ≥3 letras, sin URLs, sin stopwords (EN/ES/cine).
-    Palabras como 'about' están en SOCIAL_STOP_WORDS y no deberían aparecer en wordclouds."""
-    if not text or not isinstance(text, str):
-        return []
-    text = _URL_RE.sub(" ", text)
-    text = re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", text)
-    words = re.findall(r"\b[a-zA-Z]{3,}\b", text.lower())
-    return [w for w in words if w not in SOCIAL_STOP_WORDS and not _NUMERIC_RE.match(w)]
-
-
-def _bigrams(text: str) -> List[str]:
-    """Extrae bigramas (pares de palabras consecutivas) como 'palabra1 palabra2'."""
-    words = _tokenize(text)
-    return [f"{words[i]} {words[i+1]}" for i in range(len(words) - 1)]
-
-
 def _load_data() -> Dict[str, Any]:
     """Carga datos: primero clean, si no existe usa raw combined."""
     clean_path = DATA_CLEAN / "reviews_f1_clean.json"
@@ -78,62 +69,34 @@ def _source_key(r: Dict) -> str:
     return src
 
 
-def run_sentiment_by_source(data: Dict[str, Any]) -> Dict[str, Any]:
+def source_metrics(
+    cube: AggregateCube,
+    top_words: Callable[[str], List[Tuple[str, float]]],
+) -> Dict[str, Dict[str, Any]]:
     """
-    Análisis de sentimiento por fuente: VADER + métricas por fuente.
-    Devuelve dict con by_source, total_reviews, y lista de fuentes con datos.
+    Métricas por fuente (YouTube separado por vídeo) a partir de las celdas
+    del cubo agrupadas por _source_key. top_words(fuente) da sus 25 palabras
+    más frecuentes ponderadas por 1 + likes, como pares (palabra, frecuencia).
     """
-    from src.analysis.sentiment import (
-        _get_analyzer,
-        add_sentiment_to_reviews,
-        label_sentiment,
-    )
-
-    reviews = data.get("reviews", [])
-    if not reviews:
-        return {"error": "No hay reseñas", "by_source": {}}
-
-    analyzer = _get_analyzer()
-    if not analyzer:
-        return {"error": "Instala vaderSentiment: pip install vaderSentiment", "by_source": {}}
-
-    add_sentiment_to_reviews(reviews, analyzer)
-
+    groups: Dict[str, List[Tuple[Tuple[str, str, str], Any]]] = {}
+    for key, cell in cube.cells.items():
+        groups.setdefault(_source_key({"source": key[0], "video_id": key[1]}), []).append((key, cell))
     by_source: Dict[str, Dict[str, Any]] = {}
-    for r in reviews:
-        src = _source_key(r)
-        if src not in by_source:
-            by_source[src] = {
-                "count": 0,
-                "positive": 0,
-                "neutral": 0,
-                "negative": 0,
-                "compound_sum": 0.0,
-                "engagement_sum": 0,
-                "compounds": [],
-                "word_freq": Counter(),
-                "texts_positive": [],
-                "texts_negative": [],
-                "video_id": r.get("video_id") if r.get("source") == "YouTube" else None,
-            }
-        sent = r.get("sentiment", {})
-        label = sent.get("label", "neutral")
-        compound = sent.get("compound", 0.0)
-        content = (r.get("content") or "").strip()
-        engagement = _get_engagement(r)
-
-        by_source[src]["count"] += 1
-        by_source[src][label] = by_source[src].get(label, 0) + 1
-        by_source[src]["compound_sum"] += compound
-        by_source[src]["compounds"].append(compound)
-        by_source[src]["engagement_sum"] += engagement
-        for w in _tokenize(content):
-            by_source[src]["word_freq"][w] += 1 + engagement
-        if content and len(content) > 20:
-            if label == "positive":
-                by_source[src]["texts_positive"].append(content[:300])
-            elif label == "negative":
-                by_source[src]["texts_negative"].append(content[:300])
+    for src, members in groups.items():
+        agg = SentimentAggregate.merged(cell.sentiment for _, cell in members)
+        source, video = members[0][0][:2]
+        by_source[src] = {
+            "count": agg.count,
+            "positive": agg.labels["positive"],
+            "neutral": agg.labels["neutral"],
+            "negative": agg.labels["negative"],
+            "compound_sum": agg.sum,
+            "engagement_sum": agg.engagement_sum,
+            "compound_stats": agg,
+            "texts_positive": [t for (k, cell) in members if k[2] == "positive" for t in cell.samples],
+            "texts_negative": [t for (k, cell) in members if k[2] == "negative" for t in cell.samples],
+            "video_id": (video or None) if source == "YouTube" else None,
+        }
 
     for src, vals in by_source.items():
         n = vals["count"]
@@ -155,16 +118,57 @@ def run_sentiment_by_source(data: Dict[str, Any]) -> Dict[str, Any]:
         vals["top_words"] = [
             {
                 "word": w,
-                "count": c,
+                "count": int(c),
                 "per_100_reviews": round(100 * c / n, 1) if n else 0,
             }
-            for w, c in vals["word_freq"].most_common(25)
+            for w, c in top_words(src)
         ]
+        # Del agregado solo se serializa el resumen (percentiles, caja del boxplot)
+        vals["compound_stats"] = vals["compound_stats"].summary()
         del vals["compound_sum"]
-        del vals["word_freq"]
         # Limitar textos para JSON
         vals["texts_positive"] = vals["texts_positive"][:5]
         vals["texts_negative"] = vals["texts_negative"][:5]
+    return by_source
+
+
+def run_sentiment_by_source(
+    data: Dict[str, Any],
+    corpus: Optional[TokenCorpus] = None,
+    cube: Optional[AggregateCube] = None,
+) -> Dict[str, Any]:
+    """
+    Análisis de sentimiento por fuente: VADER + métricas por fuente.
+    Devuelve dict con by_source, total_reviews, y lista de fuentes con datos.
+    corpus: tokens de data["reviews"] (corpus.py); si no se pasa se carga o construye.
+    cube: cubo de agregados de data["reviews"] (cube.py); si no se pasa se construye.
+    """
+    from src.analysis.sentiment import (
+        _get_analyzer,
+        add_sentiment_to_reviews,
+        label_sentiment,
+    )
+
+    reviews = data.get("reviews", [])
+    if not reviews:
+        return {"error": "No hay reseñas", "by_source": {}}
+
+    analyzer = _get_analyzer()
+    if not analyzer:
+        return {"error": "Instala vaderSentiment: pip install vaderSentiment", "by_source": {}}
+
+    # Las reseñas que ya traen sentiment (load_scored_reviews) no se repuntúan
+    add_sentiment_to_reviews([r for r in reviews if "sentiment" not in r], analyzer)
+    if corpus is None:
+        corpus = corpus_for_reviews(reviews)
+
+    if cube is None:
+        cube = AggregateCube.build(reviews)
+    # Palabras por fuente ponderadas por engagement: Xᵀ·(indicador × (1 + likes))
+    words = term_matrix(corpus, 1)
+    doc_sources = [_source_key(r) for r in reviews]
+    weights = [1 + _get_engagement(r) for r in reviews]
+    by_source = source_metrics(cube, lambda src: words.most_common(indicator(doc_sources, src) * weights, 25))
 
     return {
         "total_reviews": len(reviews),
@@ -177,14 +181,30 @@ def _ensure_figures_dir():
     FIGURES_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def figure_extension(fmt: Optional[str] = None) -> str:
+    """Extensión de los archivos de gráficas para fmt (None = FIGURE_FORMAT)."""
+    fmt = (fmt or FIGURE_FORMAT).lower()
+    if fmt not in FIGURE_EXTENSIONS:
+        raise ValueError(f"Formato de gráficas desconocido: {fmt!r} (usa {', '.join(FIGURE_EXTENSIONS)})")
+    return FIGURE_EXTENSIONS[fmt]
+
+
+def _is_vector(output_path: Path) -> bool:
+    """Las rutas que no son .png se escriben con vector_charts (sin matplotlib)."""
+    return output_path.suffix.lower() != ".png"
+
+
 def plot_sentiment_distribution_by_source(by_source: Dict[str, Dict], output_path: Path) -> None:
     """Gráfica de barras: distribución en % (normalizado por fuente)."""
-    import matplotlib.pyplot as plt
-    import numpy as np
-
     sources = list(by_source.keys())
     if not sources:
         return
+    if _is_vector(output_path):
+        vector_charts.render("sentiment_distribution", output_path, by_source)
+        return
+    import matplotlib.pyplot as plt
+    import numpy as np
+
     pos = [by_source[s].get("pct_positive", 0) for s in sources]
     neu = [by_source[s].get("pct_neutral", 0) for s in sources]
     neg = [by_source[s].get("pct_negative", 0) for s in sources]
@@ -207,12 +227,15 @@ def plot_sentiment_distribution_by_source(by_source: Dict[str, Dict], output_pat
 
 def plot_avg_compound_by_source(by_source: Dict[str, Dict], output_path: Path) -> None:
     """Gráfica de barras: puntuación media compound por fuente (-1 a 1)."""
-    import matplotlib.pyplot as plt
-    import numpy as np
-
     sources = list(by_source.keys())
     if not sources:
         return
+    if _is_vector(output_path):
+        vector_charts.render("avg_compound", output_path, by_source)
+        return
+    import matplotlib.pyplot as plt
+    import numpy as np
+
     avgs = [by_source[s].get("avg_compound", 0) for s in sources]
     colors = ["#2ecc71" if a >= 0.05 else "#e74c3c" if a <= -0.05 else "#95a5a6" for a in avgs]
     fig, ax = plt.subplots(figsize=(10, 5))
@@ -232,11 +255,14 @@ def plot_avg_compound_by_source(by_source: Dict[str, Dict], output_path: Path) -
 
 def plot_engagement_by_source(by_source: Dict[str, Dict], output_path: Path) -> None:
     """Engagement normalizado (medio por reseña) y total."""
-    import matplotlib.pyplot as plt
-
     sources = list(by_source.keys())
     if not sources:
         return
+    if _is_vector(output_path):
+        vector_charts.render("engagement", output_path, by_source)
+        return
+    import matplotlib.pyplot as plt
+
     per_review = [by_source[s].get("engagement_per_review", 0) for s in sources]
     totals = [by_source[s].get("engagement_sum", 0) for s in sources]
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
@@ -255,11 +281,14 @@ def plot_engagement_by_source(by_source: Dict[str, Dict], output_path: Path) ->
 
 def plot_top_words_by_source(by_source: Dict[str, Dict], output_path: Path, top_n: int = 15) -> None:
     """Gráfica horizontal: top palabras por fuente, normalizado (por 100 reseñas)."""
-    import matplotlib.pyplot as plt
-
     sources = list(by_source.keys())
     if not sources:
         return
+    if _is_vector(output_path):
+        vector_charts.render("top_words", output_path, by_source, top_n)
+        return
+    import matplotlib.pyplot as plt
+
     n_sources = len(sources)
     fig, axes = plt.subplots(n_sources, 1, figsize=(10, 4 * n_sources))
     if n_sources == 1:
@@ -281,103 +310,117 @@ def plot_top_words_by_source(by_source: Dict[str, Dict], output_path: Path, top_
     plt.close()
 
 
-def plot_wordcloud_per_source(by_source: Dict[str, Dict], output_dir: Path) -> None:
-    """Genera una word cloud por fuente."""
+def render_wordcloud(freq: Dict[str, float], title: str, max_words: int, colormap: str, output_path: Path) -> None:
+    """Dibuja una word cloud a partir de frecuencias y la guarda en output_path."""
+    if _is_vector(output_path):
+        vector_charts.render("wordcloud", output_path, freq, title, max_words, colormap)
+        return
     try:
         from wordcloud import WordCloud
     except ImportError:
         return
     import matplotlib.pyplot as plt
 
+    wc = WordCloud(
+        width=800,
+        height=400,
+        background_color="white",
+        max_words=max_words,
+        colormap=colormap,
+    ).generate_from_frequencies(freq)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.imshow(wc, interpolation="bilinear")
+    ax.axis("off")
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150, bbox_inches="tight")
+    plt.close()
+
+
+def _source_wordclouds(
+    by_source: Dict[str, Dict],
+    output_dir: Path,
+    ext: str = ".png",
+) -> List[Tuple[Dict[str, float], str, Path]]:
+    """(frecuencias, título, ruta) de la word cloud de cada fuente."""
+    out = []
     for src in by_source:
         top_words = by_source[src].get("top_words", [])
         if not top_words:
             continue
         freq = {t["word"]: t["count"] for t in top_words}
-        wc = WordCloud(
-            width=800,
-            height=400,
-            background_color="white",
-            max_words=80,
-            colormap="viridis",
-        ).generate_from_frequencies(freq)
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.imshow(wc, interpolation="bilinear")
-        ax.axis("off")
-        ax.set_title(f"Palabras más usadas – {src}")
-        fig.tight_layout()
         safe_name = re.sub(r"[^\w\-]", "_", src)
-        fig.savefig(output_dir / f"wordcloud_{safe_name}.png", dpi=150, bbox_inches="tight")
-        plt.close()
+        out.append((freq, f"Palabras más usadas – {src}", output_dir / f"wordcloud_{safe_name}{ext}"))
+    return out
+
 
+def plot_wordcloud_per_source(by_source: Dict[str, Dict], output_dir: Path) -> None:
+    """Genera una word cloud por fuente."""
+    for freq, title, path in _source_wordclouds(by_source, output_dir):
+        render_wordcloud(freq, title, 80, "viridis", path)
 
-def plot_wordcloud_by_sentiment(full_data: Dict[str, Any], output_dir: Path) -> None:
+
+def sentiment_word_frequencies(
+    full_data: Dict[str, Any],
+    corpus: Optional[TokenCorpus] = None,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Top 80 palabras (ponderadas por 1 + likes) de los comentarios positivos y negativos."""
+    import numpy as np
+
+    reviews = full_data.get("reviews", [])
+    if corpus is None:
+        corpus = corpus_for_reviews(reviews)
+    words = term_matrix(corpus, 1)
+    labels = [(r.get("sentiment") or {}).get("label", "neutral") for r in reviews]
+    weights = np.array([1 + _get_engagement(r) for r in reviews], dtype=np.float64)
+    pos_freq = dict(words.most_common(indicator(labels, "positive") * weights, 80))
+    neg_freq = dict(words.most_common(indicator(labels, "negative") * weights, 80))
+    return pos_freq, neg_freq
+
+
+# (etiqueta, título, colormap, archivo) de las word clouds globales por sentimiento
+_SENTIMENT_CLOUDS = [
+    ("positive", "Palabras en comentarios POSITIVOS", "Greens", "wordcloud_global_positive"),
+    ("negative", "Palabras en comentarios NEGATIVOS", "Reds", "wordcloud_global_negative"),
+]
+
+
+def plot_wordcloud_by_sentiment(
+    full_data: Dict[str, Any],
+    output_dir: Path,
+    corpus: Optional[TokenCorpus] = None,
+) -> None:
     """Word clouds globales: palabras en comentarios positivos vs negativos (todas las fuentes).
     Nota: el wordcloud 'negativo' muestra palabras que aparecen en comentarios etiquetados como
     negativos por VADER (compound <= -0.05), no palabras con carga negativa en sí. Por ejemplo
     'leclerc' puede salir en negativos porque aparece en comentarios que critican o discuten algo negativo."""
-    try:
-        from wordcloud import WordCloud
-    except ImportError:
-        return
-    import matplotlib.pyplot as plt
+    freqs = sentiment_word_frequencies(full_data, corpus)
+    for freq, (_, title, colormap, fname) in zip(freqs, _SENTIMENT_CLOUDS):
+        if freq:
+            render_wordcloud(freq, title, 60, colormap, output_dir / f"{fname}.png")
+
 
+def bigram_frequencies(full_data: Dict[str, Any], corpus: Optional[TokenCorpus] = None) -> Dict[str, float]:
+    """Top 80 bigramas ("palabra1 palabra2") ponderados por 1 + likes."""
     reviews = full_data.get("reviews", [])
-    pos_freq: Counter = Counter()
-    neg_freq: Counter = Counter()
-    for r in reviews:
-        content = (r.get("content") or "").strip()
-        if not content:
-            continue
-        label = (r.get("sentiment") or {}).get("label", "neutral")
-        wgt = 1 + _get_engagement(r)
-        for w in _tokenize(content):
-            if label == "positive":
-                pos_freq[w] += wgt
-            elif label == "negative":
-                neg_freq[w] += wgt
-
-    for name, freq, title, fname in [
-        ("positive", pos_freq, "Palabras en comentarios POSITIVOS", "wordcloud_global_positive.png"),
-        ("negative", neg_freq, "Palabras en comentarios NEGATIVOS", "wordcloud_global_negative.png"),
-    ]:
-        if not freq:
-            continue
-        wc = WordCloud(
-            width=800,
-            height=400,
-            background_color="white",
-            max_words=60,
-            colormap="Greens" if name == "positive" else "Reds",
-        ).generate_from_frequencies(dict(freq.most_common(80)))
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.imshow(wc, interpolation="bilinear")
-        ax.axis("off")
-        ax.set_title(title)
-        fig.tight_layout()
-        fig.savefig(output_dir / fname, dpi=150, bbox_inches="tight")
-        plt.close()
+    if corpus is None:
+        corpus = corpus_for_reviews(reviews)
+    bigrams = term_matrix(corpus, 2)
+    weights = [1 + _get_engagement(r) for r in reviews]
+    return {f"{a} {b}": c for (a, b), c in bigrams.most_common(weights, 80)}
 
 
-def plot_wordcloud_bigrams(full_data: Dict[str, Any], output_dir: Path) -> None:
-    """Word cloud global de bigramas (pares de palabras consecutivas) sobre todas las reseñas.
-    Siempre guarda un PNG en output_dir/wordcloud_global_bigrams.png (con mensaje si no hay datos)."""
+def render_bigram_wordcloud(bigram_freq: Dict[str, float], output_path: Path) -> None:
+    """Word cloud de bigramas; si no hay datos guarda una imagen con el aviso."""
+    if _is_vector(output_path):
+        vector_charts.render("wordcloud", output_path, bigram_freq, "Bigramas más frecuentes (todas las fuentes)", 50)
+        return
     try:
         from wordcloud import WordCloud
     except ImportError:
         return
     import matplotlib.pyplot as plt
 
-    reviews = full_data.get("reviews", [])
-    bigram_freq: Counter = Counter()
-    for r in reviews:
-        content = (r.get("content") or "").strip()
-        if not content:
-            continue
-        wgt = 1 + _get_engagement(r)
-        for bg in _bigrams(content):
-            bigram_freq[bg] += wgt
-
     fig, ax = plt.subplots(figsize=(10, 5))
     if not bigram_freq:
         ax.text(0.5, 0.5, "No hay suficientes bigramas\npara mostrar", ha="center", va="center", fontsize=14)
@@ -390,35 +433,60 @@ def plot_wordcloud_bigrams(full_data: Dict[str, Any], output_dir: Path) -> None:
             background_color="white",
             max_words=50,
             colormap="viridis",
-        ).generate_from_frequencies(dict(bigram_freq.most_common(80)))
+        ).generate_from_frequencies(bigram_freq)
         ax.imshow(wc, interpolation="bilinear")
         ax.axis("off")
         ax.set_title("Bigramas más frecuentes (todas las fuentes)")
     fig.tight_layout()
-    fig.savefig(output_dir / "wordcloud_global_bigrams.png", dpi=150, bbox_inches="tight")
+    fig.savefig(output_path, dpi=150, bbox_inches="tight")
     plt.close()
 
 
+def plot_wordcloud_bigrams(
+    full_data: Dict[str, Any],
+    output_dir: Path,
+    corpus: Optional[TokenCorpus] = None,
+) -> None:
+    """Word cloud global de bigramas (pares de palabras consecutivas) sobre todas las reseñas.
+    Siempre guarda un PNG en output_dir/wordcloud_global_bigrams.png (con mensaje si no hay datos)."""
+    render_bigram_wordcloud(bigram_frequencies(full_data, corpus), output_dir / "wordcloud_global_bigrams.png")
+
+
 def plot_compound_boxplot_by_source(by_source: Dict[str, Dict], full_data: Dict[str, Any], output_path: Path) -> None:
-    """Boxplot: distribución del compound por fuente (usa sentimiento ya calculado)."""
+    """
+    Boxplot: distribución del compound por fuente. Las cajas salen de los
+    percentiles del t-digest de cada fuente (compound_stats), sin recorrer
+    las reseñas; full_data solo se usa si by_source no trae compound_stats.
+    """
+    per_source = {}
+    for src, vals in by_source.items():
+        cs = vals.get("compound_stats")
+        if not cs or "median" not in cs:
+            cs = _compound_stats_from_reviews(full_data, src)
+        if cs:
+            per_source[src] = cs
+    if _is_vector(output_path):
+        if per_source:
+            vector_charts.render("compound_boxplot", output_path, {src: {"compound_stats": cs} for src, cs in per_source.items()})
+        return
     import matplotlib.pyplot as plt
 
-    reviews = full_data.get("reviews", [])
-    if not reviews:
-        return
-    by_src_lists: Dict[str, List[float]] = {}
-    for r in reviews:
-        src = _source_key(r)
-        c = r.get("sentiment", {}).get("compound", 0)
-        if src not in by_src_lists:
-            by_src_lists[src] = []
-        by_src_lists[src].append(c)
-    if not by_src_lists:
+    stats = []
+    for src, cs in per_source.items():
+        fliers = [x for x in (cs["min"], cs["max"]) if x < cs["whisker_low"] or x > cs["whisker_high"]]
+        stats.append({
+            "label": src,
+            "med": cs["median"],
+            "q1": cs["p25"],
+            "q3": cs["p75"],
+            "whislo": cs["whisker_low"],
+            "whishi": cs["whisker_high"],
+            "fliers": fliers,
+        })
+    if not stats:
         return
     fig, ax = plt.subplots(figsize=(10, 5))
-    data = [by_src_lists[s] for s in by_src_lists]
-    labels = list(by_src_lists.keys())
-    bp = ax.boxplot(data, tick_labels=labels, patch_artist=True)
+    bp = ax.bxp(stats, patch_artist=True)
     for patch in bp["boxes"]:
         patch.set_facecolor("#ecf0f1")
     ax.axhline(y=0.05, color="green", linestyle="--", alpha=0.5)
@@ -431,8 +499,18 @@ def plot_compound_boxplot_by_source(by_source: Dict[str, Dict], full_data: Dict[
     plt.close()
 
 
-def write_marketing_insights_report(insights: Dict[str, Any], output_path: Path) -> None:
-    """Escribe un reporte en Markdown con insights para marketing."""
+def _compound_stats_from_reviews(full_data: Dict[str, Any], src: str) -> Dict[str, Any]:
+    """compound_stats de una fuente a partir de las reseñas ya puntuadas."""
+    agg = SentimentAggregate()
+    for r in (full_data or {}).get("reviews", []):
+        if _source_key(r) == src:
+            sent = r.get("sentiment", {})
+            agg.add(sent.get("compound", 0), sent.get("label", "neutral"), _get_engagement(r))
+    return agg.summary() if agg.count else {}
+
+
+def write_marketing_insights_report(insights: Dict[str, Any], output_path: Path, ext: str = ".png") -> None:
+    """Escribe un reporte en Markdown con insights para marketing (ext: extensión de las gráficas)."""
     by_source = insights.get("by_source", {})
     if not by_source:
         return
@@ -466,15 +544,15 @@ def write_marketing_insights_report(insights: Dict[str, Any], output_path: Path)
     lines.extend([
         "## Gráficas generadas",
         "",
-        "- `figures/sentiment_distribution_by_source.png` – Distribución en % (normalizado)",
-        "- `figures/avg_compound_by_source.png` – Sentimiento medio por fuente",
-        "- `figures/engagement_by_source.png` – Engagement medio y total (comparación justa)",
-        "- `figures/top_words_by_source.png` – Palabras clave (frecuencia por 100 reseñas)",
-        "- `figures/compound_boxplot_by_source.png` – Boxplot de sentimiento por fuente",
-        "- `figures/wordcloud_*.png` – Nube de palabras por fuente",
-        "- `figures/wordcloud_global_positive.png` – Palabras en comentarios positivos (todas las fuentes)",
-        "- `figures/wordcloud_global_negative.png` – Palabras en comentarios negativos (todas las fuentes)",
-        "- `figures/wordcloud_global_bigrams.png` – Bigramas más frecuentes (pares de palabras)",
+        f"- `figures/sentiment_distribution_by_source{ext}` – Distribución en % (normalizado)",
+        f"- `figures/avg_compound_by_source{ext}` – Sentimiento medio por fuente",
+        f"- `figures/engagement_by_source{ext}` – Engagement medio y total (comparación justa)",
+        f"- `figures/top_words_by_source{ext}` – Palabras clave (frecuencia por 100 reseñas)",
+        f"- `figures/compound_boxplot_by_source{ext}` – Boxplot de sentimiento por fuente",
+        f"- `figures/wordcloud_*{ext}` – Nube de palabras por fuente",
+        f"- `figures/wordcloud_global_positive{ext}` – Palabras en comentarios positivos (todas las fuentes)",
+        f"- `figures/wordcloud_global_negative{ext}` – Palabras en comentarios negativos (todas las fuentes)",
+        f"- `figures/wordcloud_global_bigrams{ext}` – Bigramas más frecuentes (pares de palabras)",
         "",
         "**Notas sobre los wordclouds:**",
         "- Las palabras se filtran con una lista de stopwords (EN/ES + cine); palabras como *about* no deberían aparecer; si ves alguna, puede ser de una ejecución anterior.",
@@ -497,11 +575,97 @@ def write_marketing_insights_report(insights: Dict[str, Any], output_path: Path)
     output_path.write_text("\n".join(lines), encoding="utf-8")
 
 
-def run_full_report() -> Dict[str, Any]:
-    """Carga datos, ejecuta análisis por fuente, genera gráficas y reporte."""
+def _project(by_source: Dict[str, Dict], *fields: str) -> Dict[str, Dict[str, Any]]:
+    """Solo los campos de by_source que lee una gráfica (su clave de caché depende solo de ellos)."""
+    return {src: {f: vals[f] for f in fields if f in vals} for src, vals in by_source.items()}
+
+
+def report_figure_tasks(
+    by_source: Dict[str, Dict],
+    full_data: Dict[str, Any],
+    corpus: Optional[TokenCorpus] = None,
+    with_wordclouds: bool = True,
+    figure_format: Optional[str] = None,
+) -> List[FigureTask]:
+    """Figuras del informe por fuente con los datos (pequeños) que necesita cada una."""
+    ext = figure_extension(figure_format)
+    tasks = [
+        FigureTask(
+            plot_sentiment_distribution_by_source,
+            (_project(by_source, "pct_positive", "pct_neutral", "pct_negative"),),
+            FIGURES_DIR / f"sentiment_distribution_by_source{ext}",
+        ),
+        FigureTask(
+            plot_avg_compound_by_source,
+            (_project(by_source, "avg_compound"),),
+            FIGURES_DIR / f"avg_compound_by_source{ext}",
+        ),
+        FigureTask(
+            plot_engagement_by_source,
+            (_project(by_source, "engagement_per_review", "engagement_sum"),),
+            FIGURES_DIR / f"engagement_by_source{ext}",
+        ),
+        FigureTask(
+            plot_top_words_by_source,
+            (_project(by_source, "top_words", "count"),),
+            FIGURES_DIR / f"top_words_by_source{ext}",
+        ),
+        FigureTask(
+            plot_compound_boxplot_by_source,
+            (_project(by_source, "compound_stats"), None),
+            FIGURES_DIR / f"compound_boxplot_by_source{ext}",
+        ),
+    ]
+    if not with_wordclouds:
+        return tasks
+    for freq, title, path in _source_wordclouds(by_source, FIGURES_DIR, ext):
+        tasks.append(FigureTask(render_wordcloud, (freq, title, 80, "viridis"), path))
+    freqs = sentiment_word_frequencies(full_data, corpus)
+    for freq, (_, title, colormap, fname) in zip(freqs, _SENTIMENT_CLOUDS):
+        if freq:
+            tasks.append(FigureTask(render_wordcloud, (freq, title, 60, colormap), FIGURES_DIR / f"{fname}{ext}"))
+    tasks.append(FigureTask(
+        render_bigram_wordcloud,
+        (bigram_frequencies(full_data, corpus),),
+        FIGURES_DIR / f"wordcloud_global_bigrams{ext}",
+    ))
+    return tasks
+
+
+def run_full_report(
+    figure_format: Optional[str] = None,
+    ctx: Optional[AnalysisContext] = None,
+) -> Dict[str, Any]:
+    """
+    Carga datos, ejecuta análisis por fuente, genera gráficas y reporte.
+
+    figure_format: png, svg o vega (None = FIGURE_FORMAT). Con svg/vega las
+    gráficas se escriben desde los agregados sin importar matplotlib ni wordcloud.
+    ctx: contexto compartido de run_analysis.py (context.py): dataset
+    puntuado, cubo y tokens sin volver a cargarlos.
+    """
+    ext = figure_extension(figure_format)
     _ensure_figures_dir()
-    data = _load_data()
-    insights = run_sentiment_by_source(data)
+    with span("load") as sp:
+        if ctx is not None and ctx.has_clean_data:
+            data, _ = ctx.scored()
+            cube = ctx.cube
+        elif (DATA_CLEAN / "reviews_f1_clean.json").exists():
+            from src.analysis.sentiment import load_scored_reviews
+
+            data, _ = load_scored_reviews()
+            # Cubo de la etapa de sentimiento (o una pasada si no está al día)
+            cube = load_cube(lambda: data)
+        else:
+            data = _load_data()
+            cube = None
+        sp.records = len(data.get("reviews", []))
+    # Tokens de cada reseña una sola vez, compartidos por todos los conteos
+    with span("tokenize", records=sp.records):
+        reviews = data.get("reviews", [])
+        corpus = ctx.corpus_for(reviews) if ctx is not None else corpus_for_reviews(reviews)
+    with span("by_source", records=sp.records):
+        insights = run_sentiment_by_source(data, corpus, cube)
     if "error" in insights:
         print(f"[AVISO] {insights['error']}")
         return insights
@@ -513,30 +677,30 @@ def run_full_report() -> Dict[str, Any]:
 
     # Guardar JSON de insights por fuente
     out_json = OUTPUT_INSIGHTS / "sentiment_by_source.json"
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(insights, f, ensure_ascii=False, indent=2)
+    with span("save_json"):
+        with open(out_json, "w", encoding="utf-8") as f:
+            json.dump(insights, f, ensure_ascii=False, indent=2)
     print(f"[OK] Insights por fuente guardados en {out_json}")
 
-    # Gráficas
-    plot_sentiment_distribution_by_source(by_source, FIGURES_DIR / "sentiment_distribution_by_source.png")
-    plot_avg_compound_by_source(by_source, FIGURES_DIR / "avg_compound_by_source.png")
-    plot_engagement_by_source(by_source, FIGURES_DIR / "engagement_by_source.png")
-    plot_top_words_by_source(by_source, FIGURES_DIR / "top_words_by_source.png")
-    plot_compound_boxplot_by_source(by_source, data, FIGURES_DIR / "compound_boxplot_by_source.png")
-    try:
-        from wordcloud import WordCloud  # noqa: F401
-    except ImportError:
-        print("[AVISO] La librería 'wordcloud' no está instalada. No se generan nubes de palabras.")
-        print("        Instálala con: pip install wordcloud")
-    else:
-        plot_wordcloud_per_source(by_source, FIGURES_DIR)
-        plot_wordcloud_by_sentiment(data, FIGURES_DIR)
-        plot_wordcloud_bigrams(data, FIGURES_DIR)
-    print(f"[OK] Graficas guardadas en {FIGURES_DIR}")
+    # Gráficas: cada figura depende solo de sus agregados; las que no
+    # cambiaron se omiten y el resto se dibuja en un pool (ver figures.py)
+    with_wordclouds = True
+    if ext == ".png":
+        try:
+            from wordcloud import WordCloud  # noqa: F401
+        except ImportError:
+            with_wordclouds = False
+            print("[AVISO] La librería 'wordcloud' no está instalada. No se generan nubes de palabras.")
+            print("        Instálala con: pip install wordcloud")
+    with span("figures", records=sp.records):
+        tasks = report_figure_tasks(by_source, data, corpus, with_wordclouds, figure_format)
+        fig_stats = render_figures(tasks)
+    print(f"[OK] Graficas guardadas en {FIGURES_DIR} ({fig_stats['rendered']} generadas, {fig_stats['cached']} sin cambios)")
 
     # Reporte marketing
     report_path = OUTPUT_INSIGHTS / "reporte_sentimiento_por_fuente.md"
-    write_marketing_insights_report(insights, report_path)
+    with span("report_md"):
+        write_marketing_insights_report(insights, report_path, ext)
     print(f"[OK] Reporte para marketing en {report_path}")
 
     return insights
@@ -3,63 +3,28 @@ Análisis temático en profundidad: por qué del sentimiento, repeticiones y tem
 Orientado a extraer insights para estrategia de marketing.
 """
 import json
-import re
 from pathlib import Path
-from collections import Counter
-from typing import Dict, Any, List, Tuple
 
-from src.cleaning.pipeline import load_raw_data
-from src.analysis.sentiment import analyze_sentiment, label_sentiment, _get_analyzer
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.cleaning.pipeline import review_ids
+from src.analysis.sentiment import load_scored_reviews, _get_analyzer
+from src.analysis.themes import ThemeMatcher, scan_corpus, themes_for_label
+from src.analysis.corpus import corpus_for_reviews
+from src.analysis.context import AnalysisContext
+from src.analysis.cube import AggregateCube, load_cube
+from src.analysis.dtm import indicator, term_matrix, unigram_matrix
+from src.analysis import distinctive, ngrams, topics
+from src.profiling import span
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
 
-from src.analysis.stopwords_social import SOCIAL_STOP_WORDS
-
-# Misma lista que análisis por fuente (word clouds, top words)
-THEMATIC_STOP = SOCIAL_STOP_WORDS
-
-# Bigramas que son referencias a películas/series (no indican sentimiento)
-NEUTRAL_BIGRAMS = {("top", "gun"), ("brad", "pitt"), ("hans", "zimmer")}
-
-MIN_WORD_LEN = 3
 TOP_N_WORDS = 25
 TOP_N_BIGRAMS = 20
 TOP_N_QUOTES = 5
 
-_URL_RE = re.compile(r"https?://\S+|www\.\S+|\b\w+\.(?:com|org|net)\b", re.I)
-_NUMERIC_RE = re.compile(r"^\d+$")
-
-
-def _preprocess_for_tokenize(text: str) -> str:
-    """Quita URLs y fragmentos antes de tokenizar."""
-    if not text or not isinstance(text, str):
-        return ""
-    text = _URL_RE.sub(" ", text)
-    text = re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", text)
-    return text
-
-
-def _tokenize(text: str) -> List[str]:
-    """Extrae palabras relevantes (min 3 chars), filtra ruido y URLs."""
-    if not text or not isinstance(text, str):
-        return []
-    text = _preprocess_for_tokenize(text)
-    words = re.findall(r"\b[a-zA-Z]{3,}\b", text.lower())
-    return [
-        w for w in words
-        if w not in THEMATIC_STOP
-        and not _NUMERIC_RE.match(w)
-        and not w.replace("'", "").isdigit()
-    ]
-
-
-def _bigrams(text: str) -> List[Tuple[str, str]]:
-    """Extrae bigramas del texto (excluye ruido conocido)."""
-    words = _tokenize(text)
-    bigrams = [tuple(words[i:i + 2]) for i in range(len(words) - 1) if len(words) >= 2]
-    return [bg for bg in bigrams if bg not in NEUTRAL_BIGRAMS or bg in {("brad", "pitt"), ("hans", "zimmer")}]
-
 
 def _repr_bigram(bg: Tuple[str, str]) -> str:
     return " ".join(bg)
@@ -82,116 +47,130 @@ def _get_engagement(r: Dict) -> int:
     return 0
 
 
-def run_thematic_analysis() -> Dict[str, Any]:
+def run_thematic_analysis(ctx: Optional[AnalysisContext] = None) -> Dict[str, Any]:
     """
     Análisis en profundidad: temas por categoría de sentimiento,
     repeticiones, citas representativas y recomendaciones para marketing.
+    ctx: contexto compartido de run_analysis.py (context.py): dataset ya
+    puntuado, tokens y cubo sin volver a leerlos.
     """
     analyzer = _get_analyzer()
     if not analyzer:
         return {"error": "vaderSentiment no instalado"}
 
-    data = load_raw_data()
-    reviews = data.get("reviews", [])
+    # Dataset limpio con los scores de la etapa de sentimiento; solo se
+    # puntúan las reseñas que no los tengan
+    with span("load") as sp:
+        data, load_stats = ctx.scored() if ctx is not None else load_scored_reviews()
+        reviews = data.get("reviews", [])
+        sp.records = len(reviews)
     if not reviews:
         return {"error": "No hay reseñas"}
+    print(f"✓ Scores reutilizados: {load_stats['reused']} reseñas ({load_stats['scored']} puntuadas ahora)")
 
-    # Agrupar por sentimiento usando contenido raw (frases completas)
+    # Agrupar por sentimiento (frases completas)
     by_label: Dict[str, List[Dict]] = {"positive": [], "neutral": [], "negative": []}
-    for r in reviews:
-        content = (r.get("content") or "").strip()
-        if not content:
-            continue
-        scores = analyze_sentiment(content, analyzer)
-        label = label_sentiment(scores["compound"])
-        r["sentiment"] = {**scores, "label": label}
-        by_label[label].append(r)
-
-    # Frecuencias por categoría (raw y ponderada por engagement)
-    word_freq: Dict[str, Counter] = {k: Counter() for k in by_label}
-    bigram_freq: Dict[str, Counter] = {k: Counter() for k in by_label}
-    word_freq_weighted: Dict[str, Counter] = {k: Counter() for k in by_label}
-    bigram_freq_weighted: Dict[str, Counter] = {k: Counter() for k in by_label}
-
-    for label, items in by_label.items():
-        for r in items:
-            txt = (r.get("content") or "")
-            wgt = 1 + _get_engagement(r)
-            for w in _tokenize(txt):
-                word_freq[label][w] += 1
-                word_freq_weighted[label][w] += wgt
-            for bg in _bigrams(txt):
-                bigram_freq[label][bg] += 1
-                bigram_freq_weighted[label][bg] += wgt
-
-    def top_items(c: Counter, n: int, format_fn=None):
-        format_fn = format_fn or (lambda x: x)
-        return [{"term": format_fn(k), "count": v} for k, v in c.most_common(n)]
-
-    # Términos distintivos: más frecuentes en positiva vs negativa
-    pos_words = set(w for w, _ in word_freq["positive"].most_common(50))
-    neg_words = set(w for w, _ in word_freq["negative"].most_common(50))
-    distinctive_positive = pos_words - neg_words
-    distinctive_negative = neg_words - pos_words
+    with_content = [r for r in reviews if (r.get("content") or "").strip()]
+    for r in with_content:
+        by_label[r["sentiment"]["label"]].append(r)
+
+    # Cada reseña se tokeniza una vez (artefacto compartido, ver corpus.py) y
+    # las frecuencias salen de la matriz documento-término (ver dtm.py)
+    with span("tokenize", records=len(with_content)):
+        corpus = ctx.corpus_for(with_content) if ctx is not None else corpus_for_reviews(with_content)
+        words = term_matrix(corpus, 1)
+        # Referencias a otras películas (ngrams.STOP_PHRASES) no cuentan
+        bigrams = term_matrix(corpus, 2, ngrams.STOP_PHRASES)
+
+    # Top-N por categoría (raw y ponderado por engagement): los pesos por
+    # documento son el indicador de la etiqueta, o indicador × (1 + likes)
+    with span("frequencies", records=len(reviews)):
+        doc_labels = [r["sentiment"]["label"] for r in with_content]
+        weights = 1 + np.array([_get_engagement(r) for r in with_content], dtype=np.float64)
+        masks = {k: indicator(doc_labels, k) for k in by_label}
+
+        def top_items(terms, label: str, n: int, weighted: bool = False, format_fn=None):
+            format_fn = format_fn or (lambda x: x)
+            w = masks[label] * weights if weighted else masks[label]
+            return [{"term": format_fn(k), "count": int(v)} for k, v in terms.most_common(w, n)]
+
+        tops = {
+            label: {
+                "words": top_items(words, label, TOP_N_WORDS),
+                "weighted": top_items(words, label, 15, weighted=True),
+                "bigrams": top_items(bigrams, label, TOP_N_BIGRAMS, format_fn=_repr_bigram),
+            }
+            for label in by_label
+        }
+
+    # Términos distintivos sobre todo el vocabulario (log-odds con prior de
+    # Dirichlet, ver distinctive.py): positivo vs negativo, fuente y vídeo vs resto
+    with span("distinctive", records=len(with_content)):
+        terms_distinctive = _distinctive_terms(with_content, unigram_matrix(corpus), masks)
+    distinctive_positive = [x["term"] for x in terms_distinctive["positivo_vs_negativo"]]
+    distinctive_negative = [x["term"] for x in terms_distinctive["negativo_vs_positivo"]]
+
+    # Tópicos latentes (NMF online por minibatches, ver topics.py): solo las
+    # reseñas nuevas actualizan el modelo guardado
+    with span("topics", records=len(with_content)):
+        latent_topics = _latent_topics(
+            with_content, unigram_matrix(corpus), retrain=ctx is not None and ctx.retrain_models
+        )
+
+    # Colocaciones (frases de 2 y 3 palabras por PMI/G², ver ngrams.py)
+    with span("collocations", records=len(with_content)):
+        index = ngrams.index_for(corpus, 3)
+        phrases = {
+            "metodo": ngrams.DEFAULT_METHOD,
+            "bigramas": ngrams.collocations(index, 2),
+            "trigramas": ngrams.collocations(index, 3),
+        }
 
     # Citas representativas (ordenadas por engagement/likes)
     def pick_quotes(items: List[Dict], n: int) -> List[Dict]:
-        sorted_items = sorted(items, key=lambda r: (_get_engagement(r), len(str(r.get("content", "")))), reverse=True)
-        return [
-            {"content": (r.get("content") or "")[:200], "source": r.get("source"), "likes": _get_engagement(r)}
-            for r in sorted_items[:n]
-        ]
-
-    # Engagement: total likes por sentimiento
-    engagement_by_label = {k: sum(_get_engagement(r) for r in items) for k, items in by_label.items()}
-    total_engagement = sum(engagement_by_label.values())
+        return [_quote(r) for r in sorted(items, key=_quote_key, reverse=True)[:n]]
 
-    # Interpretación para marketing
-    pos_top = [w for w, _ in word_freq["positive"].most_common(TOP_N_WORDS)]
-    neg_top = [w for w, _ in word_freq["negative"].most_common(TOP_N_WORDS)]
-    neu_top = [w for w, _ in word_freq["neutral"].most_common(TOP_N_WORDS)]
+    # Conteos y engagement por sentimiento y por fuente: cubo de agregados
+    # de la etapa de sentimiento (cube.py), sin recorrer las reseñas
+    cube = ctx.cube if ctx is not None else load_cube(lambda: data)
 
-    def top_weighted(c: Counter, n: int, format_fn=None):
-        format_fn = format_fn or (lambda x: x)
-        return [{"term": format_fn(k), "count": int(v)} for k, v in c.most_common(n)]
+    # Interpretación para marketing: temas del diccionario en todo el corpus
+    # (una pasada del autómata por reseña, ver themes.py)
+    with span("themes", records=len(with_content)):
+        theme_stats = scan_corpus(with_content, ThemeMatcher(), _get_engagement)
 
     result = {
-        "resumen": {
-            "total_analizado": len(reviews),
-            "positive": len(by_label["positive"]),
-            "neutral": len(by_label["neutral"]),
-            "negative": len(by_label["negative"]),
-            "porcentaje_positivo": round(100 * len(by_label["positive"]) / len(reviews), 1) if reviews else 0,
-            "total_likes": total_engagement,
-            "likes_positivo": engagement_by_label["positive"],
-            "likes_negativo": engagement_by_label["negative"],
-            "likes_neutral": engagement_by_label["neutral"],
-            "porcentaje_engagement_positivo": round(100 * engagement_by_label["positive"] / total_engagement, 1) if total_engagement else 0,
-        },
+        "resumen": _summary_counts(cube),
         "por_que_positivo": {
-            "palabras_mas_frecuentes": top_items(word_freq["positive"], TOP_N_WORDS),
-            "palabras_con_mas_impacto": top_weighted(word_freq_weighted["positive"], 15),
-            "bigramas_recurrentes": top_items(bigram_freq["positive"], TOP_N_BIGRAMS, _repr_bigram),
-            "terminos_distintivos_vs_negativo": sorted(distinctive_positive, key=lambda w: word_freq["positive"][w], reverse=True)[:15],
+            "palabras_mas_frecuentes": tops["positive"]["words"],
+            "palabras_con_mas_impacto": tops["positive"]["weighted"],
+            "bigramas_recurrentes": tops["positive"]["bigrams"],
+            "terminos_distintivos_vs_negativo": distinctive_positive[:15],
             "citas_representativas": pick_quotes(by_label["positive"], TOP_N_QUOTES),
-            "insight_marketing": _infer_positive_themes(pos_top, [str(b) for b, _ in bigram_freq["positive"].most_common(15)]),
+            "insight_marketing": _label_themes(theme_stats, "positive", len(by_label["positive"])),
         },
         "por_que_negativo": {
-            "palabras_mas_frecuentes": top_items(word_freq["negative"], TOP_N_WORDS),
-            "palabras_con_mas_impacto": top_weighted(word_freq_weighted["negative"], 15),
-            "bigramas_recurrentes": top_items(bigram_freq["negative"], TOP_N_BIGRAMS, _repr_bigram),
-            "terminos_distintivos_vs_positivo": sorted(distinctive_negative, key=lambda w: word_freq["negative"][w], reverse=True)[:15],
+            "palabras_mas_frecuentes": tops["negative"]["words"],
+            "palabras_con_mas_impacto": tops["negative"]["weighted"],
+            "bigramas_recurrentes": tops["negative"]["bigrams"],
+            "terminos_distintivos_vs_positivo": distinctive_negative[:15],
             "citas_representativas": pick_quotes(by_label["negative"], TOP_N_QUOTES),
-            "insight_marketing": _infer_negative_themes(neg_top, [str(b) for b, _ in bigram_freq["negative"].most_common(15)]),
+            "insight_marketing": _label_themes(theme_stats, "negative", len(by_label["negative"])),
         },
         "por_que_neutral": {
-            "palabras_mas_frecuentes": top_items(word_freq["neutral"], TOP_N_WORDS),
-            "bigramas_recurrentes": top_items(bigram_freq["neutral"], TOP_N_BIGRAMS, _repr_bigram),
+            "palabras_mas_frecuentes": tops["neutral"]["words"],
+            "bigramas_recurrentes": tops["neutral"]["bigrams"],
             "citas_representativas": pick_quotes(by_label["neutral"], TOP_N_QUOTES),
-            "insight_marketing": _infer_neutral_themes(neu_top),
+            "insight_marketing": _label_themes(theme_stats, "neutral", len(by_label["neutral"])),
         },
-        "por_fuente": _by_source_themes(by_label, word_freq, bigram_freq),
+        "temas": theme_stats,
+        "terminos_distintivos": terms_distinctive,
+        "topicos_latentes": latent_topics,
+        "colocaciones": phrases,
     }
+    with span("by_source", records=len(reviews)):
+        doc_sources = [r.get("source", "Unknown") for r in with_content]
+        result["por_fuente"] = _by_source_themes(cube, lambda src: words.most_common(indicator(doc_sources, src), 15))
 
     result["recomendaciones_marketing"] = _marketing_recommendations(
         by_label,
@@ -205,100 +184,111 @@ def run_thematic_analysis() -> Dict[str, Any]:
 
     OUTPUT_INSIGHTS.mkdir(parents=True, exist_ok=True)
     path_out = OUTPUT_INSIGHTS / "analisis_tematico_marketing.json"
-    with open(path_out, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with span("save"):
+        with open(path_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
 
-    # Generar también un reporte legible en Markdown
-    _write_marketing_report(result)
+        # Generar también un reporte legible en Markdown
+        _write_marketing_report(result)
 
     print(f"✓ Análisis temático guardado en {path_out}")
     print(f"✓ Reporte de marketing en {OUTPUT_INSIGHTS / 'reporte_marketing.md'}")
     return result
 
 
-def _infer_positive_themes(words: List[str], bigrams: List[str]) -> List[str]:
-    """Infiere temas/razones detrás del sentimiento positivo."""
-    themes = []
-    w = set(w.lower() for w in words)
-    bg = " ".join(bigrams).lower()
-    if any(x in w or x in bg for x in ["love", "loved", "great", "amazing", "best", "perfect", "phenomenal", "incredible"]):
-        themes.append("Valoración emocional muy alta: amor, grandeza, perfección")
-    if any(x in w or x in bg for x in ["brad", "pitt", "actor", "performance"]):
-        themes.append("Brad Pitt y actuaciones como pilares del éxito")
-    if any(x in w or x in bg for x in ["trailer", "edit", "cut", "raise"]):
-        themes.append("El trailer y la edición generan hype extremo")
-    if any(x in w or x in bg for x in ["hans", "zimmer", "score", "music", "sound"]):
-        themes.append("La banda sonora de Hans Zimmer como gancho emocional")
-    if any(x in w or x in bg for x in ["top", "gun", "maverick", "director"]):
-        themes.append("Asociación con Top Gun: Maverick aumenta expectativas")
-    if any(x in w or x in bg for x in ["race", "racing", "f1", "realistic"]):
-        themes.append("Realismo y acción de carreras como valor diferencial")
-    if any(x in w or x in bg for x in ["theaters", "cinema", "see", "watch"]):
-        themes.append("Intención de ver en cines (no streaming)")
-    if not themes:
-        themes.append("Sentimiento positivo basado en términos genéricos de aprobación")
-    return themes
+# Insight cuando ningún tema de la etiqueta tiene cobertura suficiente
+_FALLBACK_THEMES = {
+    "positive": "Sentimiento positivo basado en términos genéricos de aprobación",
+    "negative": "Comentarios negativos breves o de bajo engagement",
+}
+# Los neutros siempre incluyen esta lectura general
+_NEUTRAL_BASELINE = "Comentarios informativos, memes o referencias sin juicio emocional"
 
 
-def _infer_negative_themes(words: List[str], bigrams: List[str]) -> List[str]:
-    """Infiere temas detrás del sentimiento negativo."""
-    themes = []
-    w = set(w.lower() for w in words)
-    bg = " ".join(bigrams).lower()
-    if any(x in w or x in bg for x in ["bad", "worst", "terrible", "boring", "waste"]):
-        themes.append("Valoración negativa explícita")
-    if any(x in w or x in bg for x in ["quality", "low", "cheap"]):
-        themes.append("Percepción de baja calidad")
-    if any(x in w or x in bg for x in ["expect", "disappoint", "overhype"]):
-        themes.append("Expectativas no cumplidas")
-    if any(x in w or x in bg for x in ["story", "plot", "script"]):
-        themes.append("Críticas al guion o historia")
-    if not themes:
-        themes.append("Comentarios negativos breves o de bajo engagement")
+def _label_themes(theme_stats: Dict[str, Dict[str, Any]], label: str, label_total: int) -> List[str]:
+    """Temas de una etiqueta con cobertura suficiente en sus reseñas."""
+    themes = themes_for_label(theme_stats, label, label_total)
+    if label == "neutral":
+        themes.append(_NEUTRAL_BASELINE)
+    elif not themes:
+        themes.append(_FALLBACK_THEMES[label])
     return themes
 
 
-def _infer_neutral_themes(words: List[str]) -> List[str]:
-    """Infiere temas en comentarios neutros."""
-    themes = []
-    w = set(w.lower() for w in words)
-    if any(x in w for x in ["scene", "moment", "reference", "joke"]):
-        themes.append("Discusión de escenas o referencias específicas")
-    if any(x in w for x in ["character", "sonny", "kate"]):
-        themes.append("Debate sobre personajes o relaciones")
-    themes.append("Comentarios informativos, memes o referencias sin juicio emocional")
-    return themes
+def _latent_topics(reviews: List[Dict], words, retrain: bool = False) -> Dict[str, Any]:
+    """Tópicos NMF de las reseñas (documentos de words), con sentimiento y mezcla por fuente."""
+    keys = topics.doc_keys(reviews, review_ids(reviews))
+    W, terms, nmf, stats = topics.fit_topics(words, keys, retrain=retrain)
+    return {
+        "metodo": "nmf_online",
+        "k": nmf.n_topics,
+        **topics.topics_summary(reviews, W, terms, nmf, _get_engagement),
+        "entrenamiento": stats,
+    }
+
+
+def _distinctive_terms(reviews: List[Dict], words, masks: Dict[str, Any]) -> Dict[str, Any]:
+    """Términos distintivos por etiqueta, fuente y vídeo de YouTube. reviews: documentos de words."""
+    pos, neg = distinctive.contrast(words, masks["positive"], masks["negative"])
+    sources = [r.get("source", "Unknown") for r in reviews]
+    videos = [r.get("video_id") if r.get("source") == "YouTube" else None for r in reviews]
+    return {
+        "metodo": distinctive.DEFAULT_METHOD,
+        "positivo_vs_negativo": pos,
+        "negativo_vs_positivo": neg,
+        "fuente_vs_resto": distinctive.slices_vs_rest(
+            words, {src: indicator(sources, src) for src in dict.fromkeys(sources)}
+        ),
+        "video_vs_resto": distinctive.slices_vs_rest(
+            words, {vid: indicator(videos, vid) for vid in dict.fromkeys(videos) if vid}
+        ),
+    }
+
+
+def _quote_key(r: Dict) -> Tuple[int, int]:
+    """Orden de las citas representativas: engagement y, a igualdad, longitud."""
+    return _get_engagement(r), len(str(r.get("content", "")))
+
+
+def _quote(r: Dict) -> Dict[str, Any]:
+    return {"content": (r.get("content") or "")[:200], "source": r.get("source"), "likes": _get_engagement(r)}
+
+
+def _summary_counts(cube: AggregateCube) -> Dict[str, Any]:
+    """Resumen del análisis temático: reseñas y likes por sentimiento (celdas del cubo)."""
+    label_cells = cube.by_label()
+    engagement_by_label = {k: cell.engagement for k, cell in label_cells.items()}
+    total_engagement = sum(engagement_by_label.values())
+    return {
+        "total_analizado": cube.total_reviews,
+        "positive": label_cells["positive"].count,
+        "neutral": label_cells["neutral"].count,
+        "negative": label_cells["negative"].count,
+        "porcentaje_positivo": round(100 * label_cells["positive"].count / cube.total_reviews, 1) if cube.total_reviews else 0,
+        "total_likes": total_engagement,
+        "likes_positivo": engagement_by_label["positive"],
+        "likes_negativo": engagement_by_label["negative"],
+        "likes_neutral": engagement_by_label["neutral"],
+        "porcentaje_engagement_positivo": round(100 * engagement_by_label["positive"] / total_engagement, 1) if total_engagement else 0,
+    }
 
 
 def _by_source_themes(
-    by_label: Dict[str, List[Dict]],
-    word_freq: Dict[str, Counter],
-    bigram_freq: Dict[str, Counter],
+    cube: AggregateCube,
+    top_words: Callable[[str], List[Tuple[str, float]]],
 ) -> Dict[str, Any]:
-    """Temas por fuente (YouTube, Reddit, etc.)."""
-    by_source: Dict[str, Dict[str, List]] = {}
-    for label, items in by_label.items():
-        for r in items:
-            src = r.get("source", "Unknown")
-            if src not in by_source:
-                by_source[src] = {"positive": [], "neutral": [], "negative": []}
-            by_source[src][label].append(r)
-
+    """Temas por fuente (YouTube, Reddit, etc.). top_words(fuente): sus 15 palabras más frecuentes."""
     result = {}
-    for src, sub in by_source.items():
-        all_items = sub["positive"] + sub["neutral"] + sub["negative"]
-        if not all_items:
+    for src, cell in cube.by_source().items():
+        if not cell.count:
             continue
-        c = Counter()
-        for r in all_items:
-            for w in _tokenize(r.get("content", "")):
-                c[w] += 1
+        labels = cell.sentiment.labels
         result[src] = {
-            "count": len(all_items),
-            "positive": len(sub["positive"]),
-            "neutral": len(sub["neutral"]),
-            "negative": len(sub["negative"]),
-            "top_palabras": [{"term": k, "count": v} for k, v in c.most_common(15)],
+            "count": cell.count,
+            "positive": labels["positive"],
+            "neutral": labels["neutral"],
+            "negative": labels["negative"],
+            "top_palabras": [{"term": k, "count": int(v)} for k, v in top_words(src)],
         }
     return result
 
@@ -439,6 +429,60 @@ def _write_marketing_report(data: Dict) -> None:
         lines.append(f"### [{r['tipo'].upper()}] {r['insight']}")
         lines.append(f"**Acción:** {r['accion']}")
         lines.append("")
+    if data.get("temas"):
+        lines.extend([
+            "",
+            "## Temas en todo el corpus",
+            "",
+            "| Tema | Reseñas | Pos / Neu / Neg | Compound medio | Engagement |",
+            "|------|---------|-----------------|----------------|------------|",
+        ])
+        ranked = sorted(data["temas"].values(), key=lambda t: -t["reviews"])
+        for t in ranked:
+            if not t["reviews"]:
+                continue
+            bl = t["by_label"]
+            lines.append(
+                f"| {t['insight']} | {t['reviews']} | {bl['positive']} / {bl['neutral']} / {bl['negative']}"
+                f" | {t['avg_compound']} | {t['engagement']:,} |"
+            )
+    latent = data.get("topicos_latentes")
+    if latent:
+        lines.extend([
+            "",
+            "## Tópicos latentes (NMF)",
+            "",
+            "| Tópico | Palabras principales | Peso | Reseñas | Pos / Neu / Neg | Compound medio |",
+            "|--------|----------------------|------|---------|-----------------|----------------|",
+        ])
+        for t in latent["topicos"]:
+            bl = t["by_label"]
+            lines.append(
+                f"| {t['id']} | {', '.join(t['top_terms'][:6])} | {t['peso_pct']}% | {t['reviews_dominante']}"
+                f" | {bl['positive']} / {bl['neutral']} / {bl['negative']} | {t['avg_compound']} |"
+            )
+    phrases = data.get("colocaciones")
+    if phrases:
+        lines.extend([
+            "",
+            f"## Colocaciones ({phrases['metodo']})",
+            "",
+            f"- **Bigramas:** {', '.join(x['phrase'] for x in phrases['bigramas'][:12])}",
+            f"- **Trigramas:** {', '.join(x['phrase'] for x in phrases['trigramas'][:12])}",
+        ])
+    dist = data.get("terminos_distintivos")
+    if dist:
+        lines.extend([
+            "",
+            f"## Términos distintivos ({dist['metodo']})",
+            "",
+            f"- **Positivo vs negativo:** {', '.join(x['term'] for x in dist['positivo_vs_negativo'][:10])}",
+            f"- **Negativo vs positivo:** {', '.join(x['term'] for x in dist['negativo_vs_positivo'][:10])}",
+        ])
+        for src, terms in dist["fuente_vs_resto"].items():
+            lines.append(f"- **{src} vs resto:** {', '.join(x['term'] for x in terms[:10])}")
+        for vid, terms in dist["video_vs_resto"].items():
+            lines.append(f"- **Vídeo {vid} vs resto:** {', '.join(x['term'] for x in terms[:10])}")
     lines.extend([
         "",
         "## Por fuente",
@@ -0,0 +1,352 @@
+"""
+Detección de temas con un autómata Aho-Corasick a nivel de token.
+
+Cada tema del diccionario (THEME_DICTIONARY o un JSON con el mismo formato)
+tiene una polaridad, el texto de insight para marketing y sus palabras clave:
+  - palabras sueltas: "trailer"
+  - frases de varias palabras: "top gun", "hans zimmer"
+  - prefijos con '*': "disappoint*" (disappointed, disappointing...)
+
+ThemeMatcher compila todas las claves una sola vez en un autómata cuyas
+transiciones son tokens (no caracteres), así que cada reseña se recorre en
+una única pasada lineal sobre sus tokens, sin importar cuántos temas haya.
+Las claves de un mismo tema que se solapan ("brad pitt", "brad", "pitt")
+cuentan una sola mención: gana la coincidencia más larga que empieza antes.
+scan_corpus() acumula por tema (ThemeStats): reseñas y menciones,
+sentimiento (SentimentAggregate), engagement y reparto por fuente y
+etiqueta, sobre todo el corpus y no solo sobre las palabras más frecuentes.
+"""
+import json
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.analysis.aggregates import SentimentAggregate
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+|\b\w+\.(?:com|org|net)\b", re.I)
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^\)]+\)")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Un tema solo se cita como insight de su etiqueta si aparece en al menos
+# este porcentaje de las reseñas de esa etiqueta (y en THEME_MIN_REVIEWS)
+THEME_MIN_SHARE = 1.0
+THEME_MIN_REVIEWS = 3
+
+THEME_DICTIONARY: List[Dict[str, Any]] = [
+    {
+        "id": "valoracion_emocional",
+        "polarity": "positive",
+        "insight": "Valoración emocional muy alta: amor, grandeza, perfección",
+        "keywords": ["love", "loved", "great", "amazing", "best", "perfect", "phenomenal", "incredible"],
+    },
+    {
+        "id": "brad_pitt_actuaciones",
+        "polarity": "positive",
+        "insight": "Brad Pitt y actuaciones como pilares del éxito",
+        "keywords": ["brad pitt", "brad", "pitt", "actor", "actors", "performance*", "acting"],
+    },
+    {
+        "id": "trailer_edicion",
+        "polarity": "positive",
+        "insight": "El trailer y la edición generan hype extremo",
+        "keywords": ["trailer*", "edit", "editing", "edited", "cut", "raise"],
+    },
+    {
+        "id": "banda_sonora",
+        "polarity": "positive",
+        "insight": "La banda sonora de Hans Zimmer como gancho emocional",
+        "keywords": ["hans zimmer", "hans", "zimmer", "score", "soundtrack", "music", "sound"],
+    },
+    {
+        "id": "top_gun_maverick",
+        "polarity": "positive",
+        "insight": "Asociación con Top Gun: Maverick aumenta expectativas",
+        "keywords": ["top gun maverick", "top gun", "maverick", "director", "kosinski"],
+    },
+    {
+        "id": "realismo_carreras",
+        "polarity": "positive",
+        "insight": "Realismo y acción de carreras como valor diferencial",
+        "keywords": ["race", "races", "racing", "f1", "formula 1", "formula one", "realistic", "real cars"],
+    },
+    {
+        "id": "ver_en_cines",
+        "polarity": "positive",
+        "insight": "Intención de ver en cines (no streaming)",
+        "keywords": ["theaters", "theatres", "theater", "theatre", "cinema*", "imax", "big screen"],
+    },
+    {
+        "id": "valoracion_negativa",
+        "polarity": "negative",
+        "insight": "Valoración negativa explícita",
+        "keywords": ["bad", "worst", "terrible", "boring", "waste"],
+    },
+    {
+        "id": "baja_calidad",
+        "polarity": "negative",
+        "insight": "Percepción de baja calidad",
+        "keywords": ["quality", "low", "cheap"],
+    },
+    {
+        "id": "expectativas",
+        "polarity": "negative",
+        "insight": "Expectativas no cumplidas",
+        "keywords": ["expect*", "disappoint*", "overhype*", "overrated"],
+    },
+    {
+        "id": "guion_historia",
+        "polarity": "negative",
+        "insight": "Críticas al guion o historia",
+        "keywords": ["story", "plot", "script", "writing"],
+    },
+    {
+        "id": "escenas_referencias",
+        "polarity": "neutral",
+        "insight": "Discusión de escenas o referencias específicas",
+        "keywords": ["scene", "scenes", "moment", "reference", "joke"],
+    },
+    {
+        "id": "personajes",
+        "polarity": "neutral",
+        "insight": "Debate sobre personajes o relaciones",
+        "keywords": ["character", "characters", "sonny", "kate"],
+    },
+]
+
+
+def load_theme_dictionary(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Diccionario de temas: THEME_DICTIONARY o una lista JSON con el mismo formato."""
+    if path is None:
+        return THEME_DICTIONARY
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def theme_tokens(text: str) -> List[str]:
+    """Tokens en minúsculas (sin quitar stop words: las frases necesitan el orden)."""
+    if not text or not isinstance(text, str):
+        return []
+    text = _URL_RE.sub(" ", text)
+    text = _MD_LINK_RE.sub(r"\1", text)
+    return _TOKEN_RE.findall(text.lower())
+
+
+class ThemeMatcher:
+    """Autómata Aho-Corasick sobre tokens para todas las claves de todos los temas."""
+
+    def __init__(self, dictionary: Optional[List[Dict[str, Any]]] = None):
+        self.themes = list(dictionary if dictionary is not None else THEME_DICTIONARY)
+        self.theme_ids = [t["id"] for t in self.themes]
+        # Símbolos: cada palabra de una clave, y cada prefijo con '*'
+        self._symbols: Dict[str, int] = {}
+        self._prefixes: List[Tuple[str, int]] = []
+        self._token_symbol: Dict[str, int] = {}  # memo token -> símbolo (-1 = ninguno)
+        # Trie: transiciones por estado, fallos y salidas (índice de tema, nº de palabras)
+        self._goto: List[Dict[int, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[Tuple[int, int]]] = [set()]
+        for ti, theme in enumerate(self.themes):
+            for kw in theme.get("keywords", []):
+                self._add(kw, ti)
+        self._build_failure_links()
+
+    def _symbol(self, word: str) -> int:
+        # Los prefijos se guardan con su '*': ningún token la contiene
+        if word not in self._symbols and word.endswith("*"):
+            self._symbols[word] = len(self._symbols)
+            self._prefixes.append((word[:-1], self._symbols[word]))
+        elif word not in self._symbols:
+            self._symbols[word] = len(self._symbols)
+        return self._symbols[word]
+
+    def _add(self, keyword: str, theme_index: int) -> None:
+        state = 0
+        words = keyword.lower().split()
+        for word in words:
+            sym = self._symbol(word)
+            nxt = self._goto[state].get(sym)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][sym] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            state = nxt
+        self._out[state].add((theme_index, len(words)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque()
+        for nxt in self._goto[0].values():
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for sym, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and sym not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(sym, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def _token_to_symbol(self, token: str) -> int:
+        sym = self._token_symbol.get(token)
+        if sym is None:
+            sym = self._symbols.get(token, -1)
+            if sym < 0:
+                # Prefijo más largo que encaje (p. ej. "disappoint*")
+                best = ""
+                for prefix, psym in self._prefixes:
+                    if token.startswith(prefix) and len(prefix) > len(best):
+                        best, sym = prefix, psym
+            self._token_symbol[token] = sym
+        return sym
+
+    def match_tokens(self, tokens: Iterable[str]) -> Dict[int, int]:
+        """
+        Una pasada sobre los tokens: {índice de tema: nº de menciones}. Dentro
+        de un tema, las coincidencias solapadas cuentan una vez (la más larga
+        de las que empiezan antes).
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        spans: Dict[int, List[Tuple[int, int]]] = {}
+        state = 0
+        for i, tok in enumerate(tokens):
+            sym = self._token_to_symbol(tok)
+            while state and sym not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(sym, 0)
+            for ti, length in out[state]:
+                spans.setdefault(ti, []).append((i - length + 1, i))
+        hits: Dict[int, int] = {}
+        for ti, found in spans.items():
+            n, last_end = 0, -1
+            for start, end in sorted(found, key=lambda s: (s[0], -s[1])):
+                if start > last_end:
+                    n += 1
+                    last_end = end
+            hits[ti] = n
+        return hits
+
+    def match(self, text: str) -> Dict[str, int]:
+        """Temas de un texto: {id de tema: nº de menciones}."""
+        return {self.theme_ids[ti]: n for ti, n in self.match_tokens(theme_tokens(text)).items()}
+
+
+class ThemeStats:
+    """
+    Acumuladores por tema (reseñas, menciones, reparto por etiqueta y fuente,
+    SentimentAggregate). Mergeable: el análisis por shards (mapreduce.py)
+    combina los de cada shard.
+    """
+
+    def __init__(self, matcher: Optional[ThemeMatcher] = None):
+        self.matcher = matcher or ThemeMatcher()
+        self.acc = [
+            {"reviews": 0, "mentions": 0, "by_label": {"positive": 0, "neutral": 0, "negative": 0},
+             "by_source": {}, "sentiment": SentimentAggregate()}
+            for _ in self.matcher.themes
+        ]
+
+    def add(self, r: Dict, engagement: int = 0) -> None:
+        """Suma una reseña (ya con campo sentiment) a los temas que menciona."""
+        hits = self.matcher.match_tokens(theme_tokens(r.get("content") or ""))
+        if not hits:
+            return
+        sent = r.get("sentiment", {})
+        label = sent.get("label", "neutral")
+        compound = sent.get("compound", 0.0)
+        src = r.get("source", "Unknown")
+        for ti, n in hits.items():
+            a = self.acc[ti]
+            a["reviews"] += 1
+            a["mentions"] += n
+            a["by_label"][label] = a["by_label"].get(label, 0) + 1
+            a["by_source"][src] = a["by_source"].get(src, 0) + 1
+            a["sentiment"].add(compound, label, engagement)
+
+    def merge(self, other: "ThemeStats") -> "ThemeStats":
+        """Combina los acumuladores de otro ThemeStats con el mismo diccionario (in-place)."""
+        for a, b in zip(self.acc, other.acc):
+            a["reviews"] += b["reviews"]
+            a["mentions"] += b["mentions"]
+            for key in ("by_label", "by_source"):
+                for k, v in b[key].items():
+                    a[key][k] = a[key].get(k, 0) + v
+            a["sentiment"].merge(b["sentiment"])
+        return self
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Por id de tema: insight, polaridad, conteos, engagement y compound medio."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for theme, a in zip(self.matcher.themes, self.acc):
+            agg: SentimentAggregate = a["sentiment"]
+            out[theme["id"]] = {
+                "insight": theme.get("insight", theme["id"]),
+                "polarity": theme.get("polarity", "neutral"),
+                "reviews": a["reviews"],
+                "mentions": a["mentions"],
+                "by_label": a["by_label"],
+                "by_source": a["by_source"],
+                "engagement": agg.engagement_sum,
+                "avg_compound": round(agg.mean, 3) if agg.count else None,
+                "avg_compound_weighted": round(agg.weighted_mean, 3) if agg.count else None,
+            }
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            theme["id"]: {**a, "sentiment": a["sentiment"].to_dict()}
+            for theme, a in zip(self.matcher.themes, self.acc)
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any], matcher: Optional[ThemeMatcher] = None) -> "ThemeStats":
+        stats = cls(matcher)
+        for theme, a in zip(stats.matcher.themes, stats.acc):
+            saved = d.get(theme["id"])
+            if saved is None:
+                continue
+            a.update({k: v for k, v in saved.items() if k != "sentiment"})
+            a["sentiment"] = SentimentAggregate.from_dict(saved["sentiment"])
+        return stats
+
+
+def scan_corpus(
+    reviews: List[Dict],
+    matcher: Optional[ThemeMatcher] = None,
+    engagement_fn=None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Recorre todas las reseñas (ya con campo sentiment) una vez y devuelve,
+    por tema: reseñas, menciones, reparto por etiqueta y fuente, engagement y
+    resumen del compound. Incluye todos los temas aunque no aparezcan.
+    """
+    engagement_fn = engagement_fn or (lambda r: 0)
+    stats = ThemeStats(matcher)
+    for r in reviews:
+        stats.add(r, engagement_fn(r))
+    return stats.summary()
+
+
+def themes_for_label(
+    theme_stats: Dict[str, Dict[str, Any]],
+    label: str,
+    label_total: int,
+    min_share: float = THEME_MIN_SHARE,
+    min_reviews: int = THEME_MIN_REVIEWS,
+) -> List[str]:
+    """
+    Insights de los temas de una polaridad presentes en suficientes reseñas
+    de esa etiqueta, ordenados por cobertura.
+    """
+    picked = []
+    for stats in theme_stats.values():
+        if stats["polarity"] != label:
+            continue
+        n = stats["by_label"].get(label, 0)
+        share = 100 * n / label_total if label_total else 0
+        if n >= min_reviews and share >= min_share:
+            picked.append((n, stats["insight"]))
+    picked.sort(key=lambda x: -x[0])
+    return [insight for _, insight in picked]
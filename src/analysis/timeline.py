@@ -0,0 +1,361 @@
+"""
+Series temporales de sentimiento y engagement (rollups por hora y por día).
+
+Cada reseña se convierte una vez en un "hecho" con su fecha como epoch
+entero (UTC), su fuente, su vídeo (video_id de YouTube; en Reddit el hilo,
+post_id), su etiqueta, su compound y su engagement. Los hechos se suman en
+dos cubos:
+
+  - hourly: cubos de 1 hora  (solo fechas con hora)
+  - daily:  cubos de 1 día   (todas las fechas)
+
+con una celda por (inicio del cubo, fuente, vídeo, etiqueta) que guarda
+[reseñas, suma de compound, engagement]. Las celdas son sumas, así que se
+pueden restar: el estado guardado en .cache/timeline/ lleva los hechos de
+la ejecución anterior por review_id, y en la siguiente solo se suman las
+reseñas nuevas y se restan/suman las que cambiaron o desaparecieron. Solo
+se tocan los cubos afectados; la fecha de una reseña ya vista no se vuelve
+a parsear.
+
+Formatos de fecha: ISO 8601 de YouTube (publishedAt, "2025-05-12T22:06:04Z"),
+epoch en texto de Reddit/Instagram ("1747064238.0") y fechas de IMDB
+("12 May 2025", "May 12, 2025"). Las horas se dan en UTC.
+
+Salida: output/insights/sentiment_timeline.json (cubos, serie diaria,
+perfil por hora del día y día de la semana, picos) para la estrategia de
+timing (output/strategies/04_estrategia_timing.md).
+"""
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.analysis.context import AnalysisContext
+from src.analysis.sentiment import load_scored_reviews, _get_engagement
+from src.cleaning.pipeline import review_id, review_ids
+from src.profiling import span
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
+TIMELINE_PATH = OUTPUT_INSIGHTS / "sentiment_timeline.json"
+STATE_PATH = PROJECT_ROOT / ".cache" / "timeline" / "rollups.json"
+
+# Granularidad -> segundos por cubo
+GRAINS = {"hourly": 3600, "daily": 86400}
+# Formatos de fecha sin hora (IMDB)
+DATE_FORMATS = ("%d %B %Y", "%B %d, %Y", "%b %d, %Y", "%d %b %Y", "%Y-%m-%d")
+WEEKDAYS = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+TOP_PEAKS = 5
+# Reutilizar el estado de la ejecución anterior (TIMELINE_INCREMENTAL=0 lo desactiva)
+DEFAULT_INCREMENTAL = os.environ.get("TIMELINE_INCREMENTAL", "1") != "0"
+
+# (epoch, fuente, vídeo, etiqueta, compound, engagement, tiene hora)
+Fact = Tuple[int, str, str, str, float, int, bool]
+CellKey = Tuple[int, str, str, str]
+
+
+def parse_date(value: Any) -> Optional[Tuple[int, bool]]:
+    """
+    Fecha de una reseña -> (epoch UTC en segundos, tiene hora). None si no
+    se reconoce el formato.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value), True
+    text = str(value).strip()
+    try:
+        return int(float(text)), True
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp()), "T" in text or " " in text
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            dt = datetime.strptime(text, fmt).replace(tzinfo=timezone.utc)
+            return int(dt.timestamp()), False
+        except ValueError:
+            continue
+    return None
+
+
+def _video_of(r: Dict) -> str:
+    return str(r.get("video_id") or r.get("post_id") or "")
+
+
+class TimeRollup:
+    """Cubo de una granularidad: (inicio, fuente, vídeo, etiqueta) -> [reseñas, suma compound, engagement]."""
+
+    def __init__(self, grain: int):
+        self.grain = grain
+        self.cells: Dict[CellKey, List[float]] = {}
+
+    def key(self, fact: Fact) -> CellKey:
+        ts, source, video, label = fact[:4]
+        return ts - ts % self.grain, source, video, label
+
+    def add(self, fact: Fact, sign: int = 1) -> CellKey:
+        """Suma (sign=1) o resta (sign=-1) un hecho; devuelve la celda tocada."""
+        key = self.key(fact)
+        cell = self.cells.setdefault(key, [0, 0.0, 0])
+        cell[0] += sign
+        cell[1] += sign * fact[4]
+        cell[2] += sign * fact[5]
+        if cell[0] <= 0:
+            del self.cells[key]
+        return key
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Celdas ordenadas por fecha, para JSON."""
+        out = []
+        for (start, source, video, label), (count, compound_sum, engagement) in sorted(self.cells.items()):
+            out.append({
+                "bucket": _iso(start),
+                "source": source,
+                "video_id": video,
+                "label": label,
+                "count": int(count),
+                "compound_sum": round(compound_sum, 4),
+                "engagement": int(engagement),
+            })
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"grain": self.grain, "cells": [[*k, *v] for k, v in self.cells.items()]}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TimeRollup":
+        rollup = cls(d["grain"])
+        rollup.cells = {tuple(c[:4]): list(c[4:]) for c in d.get("cells", [])}
+        return rollup
+
+
+class TimelineRollups:
+    """
+    Cubos hourly y daily más los hechos por review_id con los que se
+    construyeron, para actualizarlos de forma incremental.
+    """
+
+    def __init__(self):
+        self.rollups = {name: TimeRollup(grain) for name, grain in GRAINS.items()}
+        # review_id -> [fecha original, *hecho]
+        self.facts: Dict[str, List[Any]] = {}
+
+    def _apply(self, fact: Fact, sign: int, touched: set) -> None:
+        for name, rollup in self.rollups.items():
+            if name == "hourly" and not fact[6]:
+                continue
+            touched.add((name, rollup.add(fact, sign)[0]))
+
+    def _upsert(self, rid: str, r: Dict, stats: Dict[str, int], touched: set) -> None:
+        """Suma el hecho de r (o corrige el que había para rid)."""
+        raw_date = r.get("date")
+        prev = self.facts.get(rid)
+        if prev is not None and prev[0] == raw_date:
+            parsed = (prev[1], prev[7])
+        else:
+            parsed = parse_date(raw_date)
+        if parsed is None:
+            stats["undated"] += 1
+            if prev is not None:
+                self._apply(tuple(prev[1:]), -1, touched)
+                del self.facts[rid]
+                stats["removed"] += 1
+            return
+        sent = r.get("sentiment") or {}
+        fact: Fact = (
+            parsed[0],
+            r.get("source", "Unknown"),
+            _video_of(r),
+            sent.get("label", "neutral"),
+            float(sent.get("compound", 0.0)),
+            _get_engagement(r),
+            parsed[1],
+        )
+        if prev is not None:
+            if tuple(prev[1:]) == fact:
+                stats["unchanged"] += 1
+                return
+            self._apply(tuple(prev[1:]), -1, touched)
+            stats["changed"] += 1
+        else:
+            stats["added"] += 1
+        self._apply(fact, 1, touched)
+        self.facts[rid] = [raw_date, *fact]
+
+    def update(self, reviews: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Deja los cubos como si se hubieran construido con reviews: suma las
+        nuevas, resta las desaparecidas y corrige las que cambiaron.
+        """
+        reviews = list(reviews)
+        stats = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0, "undated": 0}
+        touched: set = set()
+        seen = set()
+        for rid, r in zip(review_ids(reviews), reviews):
+            seen.add(rid)
+            self._upsert(rid, r, stats, touched)
+        for rid in [rid for rid in self.facts if rid not in seen]:
+            self._apply(tuple(self.facts.pop(rid)[1:]), -1, touched)
+            stats["removed"] += 1
+        stats["buckets_touched"] = len(touched)
+        return stats
+
+    def add(self, reviews: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Suma reseñas nuevas sin tocar el resto (modo continuo, src/live.py).
+        Un review_id ya presente se corrige en lugar de contarse dos veces.
+        """
+        stats = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0, "undated": 0}
+        touched: set = set()
+        for r in reviews:
+            self._upsert(review_id(r), r, stats, touched)
+        stats["buckets_touched"] = len(touched)
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rollups": {name: r.to_dict() for name, r in self.rollups.items()},
+            "facts": self.facts,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TimelineRollups":
+        out = cls()
+        for name, rd in d.get("rollups", {}).items():
+            if name in out.rollups and rd.get("grain") == GRAINS[name]:
+                out.rollups[name] = TimeRollup.from_dict(rd)
+        out.facts = d.get("facts", {})
+        return out
+
+    def save(self, path: Path = STATE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = STATE_PATH) -> Optional["TimelineRollups"]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _totals(cells: Iterable[Tuple[CellKey, List[float]]], key_fn) -> Dict[Any, Dict[str, Any]]:
+    """Suma celdas por key_fn(clave de celda): reseñas, compound medio, engagement y reparto por etiqueta."""
+    acc: Dict[Any, List[Any]] = {}
+    for key, (count, compound_sum, engagement) in cells:
+        k = key_fn(key)
+        a = acc.setdefault(k, [0, 0.0, 0, {"positive": 0, "neutral": 0, "negative": 0}])
+        a[0] += count
+        a[1] += compound_sum
+        a[2] += engagement
+        a[3][key[3]] = a[3].get(key[3], 0) + int(count)
+    return {
+        k: {
+            "reviews": int(count),
+            "avg_compound": round(compound_sum / count, 4) if count else 0.0,
+            "engagement": int(engagement),
+            "by_label": labels,
+        }
+        for k, (count, compound_sum, engagement, labels) in acc.items()
+    }
+
+
+def timeline_summary(state: TimelineRollups) -> Dict[str, Any]:
+    """Serie diaria, perfiles por hora del día y día de la semana, y picos."""
+    daily = state.rollups["daily"].cells
+    hourly = state.rollups["hourly"].cells
+    by_day = _totals(daily.items(), lambda k: k[0])
+    serie = [{"fecha": _iso(day)[:10], **by_day[day]} for day in sorted(by_day)]
+    by_day_source = _totals(daily.items(), lambda k: (k[0], k[1]))
+    per_source: Dict[str, List[Dict[str, Any]]] = {}
+    for day, source in sorted(by_day_source):
+        per_source.setdefault(source, []).append({"fecha": _iso(day)[:10], **by_day_source[(day, source)]})
+
+    by_hour = _totals(hourly.items(), lambda k: k[0] // 3600 % 24)
+    by_weekday = _totals(daily.items(), lambda k: datetime.fromtimestamp(k[0], tz=timezone.utc).weekday())
+    return {
+        "serie_diaria": serie,
+        "serie_diaria_por_fuente": per_source,
+        "perfil_hora_utc": {f"{h:02d}": by_hour[h] for h in sorted(by_hour)},
+        "perfil_dia_semana": {WEEKDAYS[d]: by_weekday[d] for d in sorted(by_weekday)},
+        "picos_reseñas": sorted(serie, key=lambda x: (-x["reviews"], x["fecha"]))[:TOP_PEAKS],
+        "picos_engagement": sorted(serie, key=lambda x: (-x["engagement"], x["fecha"]))[:TOP_PEAKS],
+    }
+
+
+def save_timeline(state: TimelineRollups, total_reviews: int, path: Path = TIMELINE_PATH) -> Dict[str, Any]:
+    """Escribe sentiment_timeline.json a partir de los rollups y devuelve su contenido."""
+    result = {
+        "total_reviews": total_reviews,
+        "reseñas_con_fecha": len(state.facts),
+        "zona_horaria": "UTC",
+        **timeline_summary(state),
+        "cubos": {name: r.rows() for name, r in state.rollups.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return result
+
+
+def run_timeline_analysis(
+    incremental: Optional[bool] = None,
+    ctx: Optional[AnalysisContext] = None,
+) -> Dict[str, Any]:
+    """
+    Actualiza los rollups por hora y por día con las reseñas puntuadas y
+    guarda sentiment_timeline.json.
+
+    Args:
+        incremental: Parte del estado de .cache/timeline/ y solo toca los
+            cubos de las reseñas nuevas, cambiadas o eliminadas
+            (None = DEFAULT_INCREMENTAL).
+        ctx: Contexto compartido de run_analysis.py (context.py) con las
+            reseñas ya puntuadas.
+    """
+    if incremental is None:
+        incremental = DEFAULT_INCREMENTAL
+    with span("load") as sp:
+        data, _ = ctx.scored() if ctx is not None else load_scored_reviews()
+        reviews = data.get("reviews", [])
+        sp.records = len(reviews)
+        state = TimelineRollups.load() if incremental else None
+
+    with span("rollup", records=len(reviews)):
+        state = state or TimelineRollups()
+        stats = state.update(reviews)
+    print(
+        f"✓ Rollups temporales: {stats['added']} nuevas, {stats['changed']} cambiadas, "
+        f"{stats['removed']} eliminadas, {stats['buckets_touched']} cubos actualizados"
+    )
+    if stats["undated"]:
+        print(f"⚠ {stats['undated']} reseñas sin fecha reconocible")
+
+    with span("save", records=len(reviews)):
+        result = save_timeline(state, len(reviews))
+        state.save()
+    print(f"✓ Series temporales guardadas en {TIMELINE_PATH}")
+    return result
+
+
+if __name__ == "__main__":
+    run_timeline_analysis()
@@ -0,0 +1,323 @@
+"""
+Tópicos latentes con NMF online por minibatches sobre la matriz documento-término.
+
+Complementa los temas del diccionario (themes.py): aquí los tópicos salen de
+los propios comentarios. Cada reseña es un vector TF-IDF (normalizado L2)
+sobre las MAX_FEATURES palabras más presentes del corpus, y se factoriza
+X ≈ W·H con W (reseñas × tópicos) y H (tópicos × palabras), ambos >= 0.
+
+Entrenamiento online (Mairal et al., 2010, con actualizaciones
+multiplicativas):
+  - para cada minibatch se calcula W con H fija (X·Hᵀ una sola vez por lote)
+  - se acumulan las estadísticas A = ρ·A + Wᵀ·X y B = ρ·B + Wᵀ·W
+  - H se actualiza solo a partir de A y B: H ← H ∘ A / (B·H)
+La memoria es la de un minibatch denso (BATCH_SIZE × MAX_FEATURES) más
+A, B y H, sea cual sea el número de comentarios.
+
+El modelo (vocabulario, idf, H, A, B y las reseñas ya vistas) se guarda en
+.cache/topics/. En la siguiente ejecución solo los comentarios nuevos o con
+texto cambiado actualizan el modelo; las reseñas que ya no están en el
+dataset se olvidan. Se reentrena desde cero si:
+  - cambia la configuración, el tokenizador o MODEL_VERSION
+  - se pide (retrain=True: run_analysis.py --force, o TOPICS_INCREMENTAL=0)
+  - en los comentarios nuevos, más de OOV_RETRAIN_SHARE de las apariciones
+    de palabras que hoy serían del vocabulario del modelo no lo son (el
+    vocabulario y el idf del modelo se fijan al entrenar desde cero)
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analysis.aggregates import SentimentAggregate
+from src.analysis.corpus import tokenizer_version
+from src.analysis.dtm import DocumentTermMatrix
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+TOPICS_DIR = PROJECT_ROOT / ".cache" / "topics"
+
+N_TOPICS = int(os.environ.get("TOPICS_K", "8"))
+MAX_FEATURES = 2000
+# Palabras en menos de MIN_DF reseñas o en más de MAX_DF_SHARE de ellas no entran
+MIN_DF = 3
+MAX_DF_SHARE = 0.5
+BATCH_SIZE = 2048
+# Pasadas sobre el corpus al entrenar desde cero (más si el corpus es
+# pequeño, hasta al menos MIN_UPDATES minibatches)
+N_EPOCHS = 3
+MIN_UPDATES = 50
+# Peso de las estadísticas anteriores en cada minibatch
+FORGET = 0.98
+# Iteraciones multiplicativas para W (por lote) y para H (por actualización)
+W_ITER = 30
+H_ITER = 5
+TOP_TERMS = 10
+SEED = 0
+# Reutilizar el modelo guardado (TOPICS_INCREMENTAL=0 reentrena siempre)
+DEFAULT_INCREMENTAL = os.environ.get("TOPICS_INCREMENTAL", "1") != "0"
+# Reentrenar si los comentarios nuevos traen más de esta parte de vocabulario desconocido
+OOV_RETRAIN_SHARE = float(os.environ.get("TOPICS_OOV_RETRAIN", "0.15"))
+# Subir al cambiar el entrenamiento: invalida los modelos guardados (y la etapa del DAG)
+MODEL_VERSION = 2
+
+_EPS = 1e-10
+
+
+class OnlineNMF:
+    """NMF por minibatches con estadísticas suficientes acumuladas (A, B)."""
+
+    def __init__(self, n_topics: int, n_features: int, seed: int = SEED, forget: float = FORGET):
+        self.n_topics = n_topics
+        self.n_features = n_features
+        self.forget = forget
+        rng = np.random.default_rng(seed)
+        self.H = rng.random((n_topics, n_features)) + 0.1
+        self.H /= self.H.sum(axis=1, keepdims=True)
+        self.A = np.zeros((n_topics, n_features))
+        self.B = np.zeros((n_topics, n_topics))
+        self.n_batches = 0
+
+    def transform(self, X: np.ndarray, n_iter: int = W_ITER) -> np.ndarray:
+        """W de un lote con H fija."""
+        XHt = X @ self.H.T
+        HHt = self.H @ self.H.T
+        W = np.full((X.shape[0], self.n_topics), 1.0 / self.n_topics)
+        for _ in range(n_iter):
+            W *= XHt / (W @ HHt + _EPS)
+        return W
+
+    def partial_fit(self, X: np.ndarray) -> np.ndarray:
+        """Actualiza H con un minibatch y devuelve su W."""
+        W = self.transform(X)
+        self.A = self.forget * self.A + W.T @ X
+        self.B = self.forget * self.B + W.T @ W
+        for _ in range(H_ITER):
+            self.H *= self.A / (self.B @ self.H + _EPS)
+        self.n_batches += 1
+        return W
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"H": self.H, "A": self.A, "B": self.B, "n_batches": np.array(self.n_batches)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray], forget: float = FORGET) -> "OnlineNMF":
+        model = cls.__new__(cls)
+        model.H, model.A, model.B = state["H"], state["A"], state["B"]
+        model.n_topics, model.n_features = model.H.shape
+        model.forget = forget
+        model.n_batches = int(state["n_batches"])
+        return model
+
+
+def select_features(dtm: DocumentTermMatrix, max_features: int = MAX_FEATURES) -> np.ndarray:
+    """IDs de las palabras con más reseñas, dentro de [MIN_DF, MAX_DF_SHARE · N]."""
+    df = np.bincount(dtm.indices, minlength=dtm.n_terms)
+    ok = np.flatnonzero((df >= MIN_DF) & (df <= MAX_DF_SHARE * max(dtm.n_docs, 1)))
+    order = ok[np.lexsort((ok, -df[ok]))]
+    return np.sort(order[:max_features])
+
+
+def _row_entries(dtm: DocumentTermMatrix, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entradas CSR de las filas dadas, sin bucle por reseña: (fila local, entrada)."""
+    starts = dtm.indptr[rows]
+    lens = dtm.indptr[rows + 1] - starts
+    local = np.repeat(np.arange(len(rows)), lens)
+    entries = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+    return local, entries
+
+
+def oov_share(dtm: DocumentTermMatrix, rows: np.ndarray, feats: np.ndarray, column: np.ndarray) -> float:
+    """
+    Parte de las apariciones (en rows) de las palabras feats que el modelo
+    no conoce (column = -1). feats: select_features() del corpus actual.
+    """
+    if not len(rows):
+        return 0.0
+    _, entries = _row_entries(dtm, rows)
+    terms = dtm.indices[entries]
+    wanted = np.zeros(dtm.n_terms, dtype=bool)
+    wanted[feats] = True
+    sel = wanted[terms]
+    total = float(dtm.data[entries[sel]].sum())
+    unknown = float(dtm.data[entries[sel & (column[terms] < 0)]].sum())
+    return unknown / total if total else 0.0
+
+
+def _batches(
+    dtm: DocumentTermMatrix,
+    rows: np.ndarray,
+    column: np.ndarray,
+    idf: np.ndarray,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Minibatches densos TF-IDF (L2) de las filas dadas: (filas, X)."""
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        local, entries = _row_entries(dtm, batch)
+        cols = column[dtm.indices[entries]]
+        keep = cols >= 0
+        X = np.zeros((len(batch), len(idf)))
+        X[local[keep], cols[keep]] = np.log1p(dtm.data[entries[keep]]) * idf[cols[keep]]
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        X /= np.where(norms > 0, norms, 1.0)
+        yield batch, X
+
+
+def doc_keys(reviews: Sequence[Dict], ids: Sequence[str]) -> List[str]:
+    """Clave por reseña: review_id + hash del texto (un texto editado cuenta como nuevo)."""
+    return [
+        f"{rid}:{hashlib.blake2b((r.get('content') or '').encode('utf-8'), digest_size=6).hexdigest()}"
+        for r, rid in zip(reviews, ids)
+    ]
+
+
+def _config_key(n_topics: int) -> str:
+    payload = json.dumps(
+        [MODEL_VERSION, tokenizer_version(), n_topics, MAX_FEATURES, MIN_DF, MAX_DF_SHARE, FORGET, SEED],
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def model_path(n_topics: int = N_TOPICS) -> Path:
+    return TOPICS_DIR / f"nmf_{_config_key(n_topics)}.npz"
+
+
+def _save_model(path: Path, terms: List[str], idf: np.ndarray, nmf: OnlineNMF, seen: Sequence[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, terms=np.array(terms, dtype=str), idf=idf, seen=np.array(sorted(seen), dtype=str), **nmf.state())
+    tmp.replace(path)
+    for old in path.parent.glob("nmf_*.npz"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def _load_model(path: Path) -> Optional[Tuple[List[str], np.ndarray, OnlineNMF, set]]:
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            state = {k: z[k] for k in ("H", "A", "B", "n_batches")}
+            return z["terms"].tolist(), z["idf"], OnlineNMF.from_state(state), set(z["seen"].tolist())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def fit_topics(
+    dtm: DocumentTermMatrix,
+    keys: Sequence[str],
+    n_topics: int = N_TOPICS,
+    incremental: Optional[bool] = None,
+    retrain: bool = False,
+) -> Tuple[np.ndarray, List[str], OnlineNMF, Dict[str, Any]]:
+    """
+    Entrena (o actualiza) el modelo y devuelve W de todas las reseñas, las
+    palabras del modelo, el NMF y estadísticas del entrenamiento.
+    keys: doc_keys() de las filas de dtm.
+    retrain: ignorar el modelo guardado y entrenar desde cero.
+    """
+    incremental = DEFAULT_INCREMENTAL if incremental is None else incremental
+    path = model_path(n_topics)
+    loaded = _load_model(path) if incremental and not retrain and path.exists() else None
+    all_rows = np.arange(dtm.n_docs)
+    feats = select_features(dtm)
+    oov = None
+
+    if loaded is not None:
+        terms, idf, nmf, seen = loaded
+        term_index = {t: i for i, t in enumerate(terms)}
+        column = np.array([term_index.get(t, -1) for t in dtm.terms], dtype=np.int64)
+        train_rows = np.array([i for i, k in enumerate(keys) if k not in seen], dtype=np.int64)
+        epochs = 1
+        oov = oov_share(dtm, train_rows, feats, column)
+        if oov > OOV_RETRAIN_SHARE:
+            loaded = None
+    if loaded is None:
+        terms = [dtm.terms[j] for j in feats]
+        column = np.full(dtm.n_terms, -1, dtype=np.int64)
+        column[feats] = np.arange(len(feats))
+        df = np.bincount(dtm.indices, minlength=dtm.n_terms)[feats]
+        idf = np.log((1 + dtm.n_docs) / (1 + df)) + 1
+        nmf = OnlineNMF(n_topics, len(feats))
+        seen = set()
+        train_rows = all_rows
+        per_epoch = -(-len(train_rows) // BATCH_SIZE)
+        epochs = max(N_EPOCHS, -(-MIN_UPDATES // max(per_epoch, 1)))
+
+    rng = np.random.default_rng(SEED + nmf.n_batches)
+    for _ in range(epochs if len(train_rows) else 0):
+        for _, X in _batches(dtm, rng.permutation(train_rows), column, idf):
+            nmf.partial_fit(X)
+    # Las reseñas borradas o editadas (otra clave) ya no cuentan como vistas
+    current = set(keys)
+    pruned = len(seen - current)
+    seen &= current
+    seen.update(keys[i] for i in train_rows)
+    if len(train_rows) or pruned or loaded is None:
+        try:
+            _save_model(path, terms, idf, nmf, seen)
+        except OSError:
+            pass
+
+    W = np.zeros((dtm.n_docs, n_topics))
+    for rows, X in _batches(dtm, all_rows, column, idf):
+        W[rows] = nmf.transform(X)
+    stats = {
+        "modelo_version": MODEL_VERSION,
+        "incremental": loaded is not None,
+        "resenas_entrenadas": int(len(train_rows)),
+        "resenas_en_modelo": len(seen),
+        "minibatches_totales": nmf.n_batches,
+        "vocabulario_nuevo_pct": None if oov is None else round(100 * oov, 1),
+    }
+    return W, terms, nmf, stats
+
+
+def topics_summary(
+    reviews: Sequence[Dict],
+    W: np.ndarray,
+    terms: List[str],
+    nmf: OnlineNMF,
+    engagement_fn=None,
+    top_terms: int = TOP_TERMS,
+) -> Dict[str, Any]:
+    """
+    Tópicos para el JSON: palabras principales, peso en el corpus, sentimiento
+    de las reseñas cuyo tópico dominante es ese, y mezcla de tópicos por fuente.
+    """
+    engagement_fn = engagement_fn or (lambda r: 0)
+    totals = W.sum(axis=1, keepdims=True)
+    has_topic = totals[:, 0] > 0
+    mix = np.divide(W, totals, out=np.zeros_like(W), where=totals > 0)
+    dominant = np.where(has_topic, W.argmax(axis=1), -1)
+
+    sentiment = [SentimentAggregate() for _ in range(nmf.n_topics)]
+    for r, t in zip(reviews, dominant.tolist()):
+        if t >= 0:
+            sent = r.get("sentiment", {})
+            sentiment[t].add(sent.get("compound", 0.0), sent.get("label", "neutral"), engagement_fn(r))
+
+    share = mix.sum(axis=0) / max(int(has_topic.sum()), 1)
+    topics = []
+    for t in range(nmf.n_topics):
+        h = nmf.H[t]
+        best = np.argsort(-h, kind="stable")[:top_terms]
+        agg = sentiment[t]
+        topics.append({
+            "id": t,
+            "top_terms": [terms[j] for j in best if h[j] > 0],
+            "peso_pct": round(100 * float(share[t]), 1),
+            "reviews_dominante": agg.count,
+            "by_label": dict(agg.labels),
+            "avg_compound": round(agg.mean, 3) if agg.count else None,
+            "avg_compound_weighted": round(agg.weighted_mean, 3) if agg.count else None,
+        })
+
+    sources = np.array([r.get("source", "Unknown") for r in reviews], dtype=object)
+    by_source = {}
+    for src in dict.fromkeys(sources.tolist()):
+        sel = (sources == src) & has_topic
+        if sel.any():
+            by_source[src] = [round(100 * float(x), 1) for x in mix[sel].mean(axis=0)]
+    return {"topicos": topics, "mezcla_por_fuente": by_source}
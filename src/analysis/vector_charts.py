@@ -0,0 +1,476 @@
+"""
+Gráficas vectoriales (SVG o Vega-Lite) sin matplotlib, numpy ni wordcloud.
+
+Alternativa ligera a los PNG de sentiment_sources_report.py para
+dashboards que se refrescan a menudo: cada gráfica se escribe directamente
+a partir de los agregados (porcentajes, medias, percentiles, frecuencias)
+como texto, sin arrancar ningún motor de dibujo:
+
+  - svg: documento SVG autocontenido (se abre en el navegador o se incrusta)
+  - vega: especificación Vega-Lite v5 en JSON con los datos embebidos
+    (la dibuja el cliente con vega-embed, Observable, Altair...)
+
+Las word clouds usan una colocación sencilla por filas (palabras ordenadas
+por frecuencia, tamaño de letra ∝ raíz de la frecuencia) en lugar del
+empaquetado de WordCloud. La salida PNG sigue disponible en el informe
+(FIGURE_FORMAT=png, por defecto).
+"""
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+FONT = "DejaVu Sans, Arial, sans-serif"
+
+POSITIVE = "#2ecc71"
+NEUTRAL = "#95a5a6"
+NEGATIVE = "#e74c3c"
+# Paletas de las word clouds (de más a menos frecuente)
+PALETTES = {
+    "viridis": ["#440154", "#414487", "#2a788e", "#22a884", "#7ad151", "#bddf26"],
+    "Greens": ["#00441b", "#006d2c", "#238b45", "#41ab5d", "#74c476"],
+    "Reds": ["#67000d", "#a50f15", "#cb181d", "#ef3b2c", "#fb6a4a"],
+}
+
+
+def write_chart(chart: Any, output_path: Path) -> None:
+    """Guarda una gráfica: str (SVG) tal cual, dict (Vega-Lite) como JSON."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(chart, str):
+        output_path.write_text(chart, encoding="utf-8")
+    else:
+        output_path.write_text(json.dumps(chart, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def is_vega(output_path: Path) -> bool:
+    return output_path.name.endswith(".json")
+
+
+# --- SVG ---------------------------------------------------------------------
+
+
+def _fmt(x: float) -> str:
+    return f"{x:.1f}".rstrip("0").rstrip(".")
+
+
+def _text(x: float, y: float, s: Any, size: int = 11, anchor: str = "middle", **attrs: Any) -> str:
+    extra = "".join(f' {k.replace("_", "-")}="{v}"' for k, v in attrs.items())
+    return (
+        f'<text x="{_fmt(x)}" y="{_fmt(y)}" font-size="{size}" text-anchor="{anchor}"{extra}>'
+        f"{escape(str(s))}</text>"
+    )
+
+
+def _rect(x: float, y: float, w: float, h: float, fill: str, **attrs: Any) -> str:
+    extra = "".join(f' {k.replace("_", "-")}="{v}"' for k, v in attrs.items())
+    return f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(max(w, 0))}" height="{_fmt(max(h, 0))}" fill="{fill}"{extra}/>'
+
+
+def _line(x1: float, y1: float, x2: float, y2: float, stroke: str = "#333", **attrs: Any) -> str:
+    extra = "".join(f' {k.replace("_", "-")}="{v}"' for k, v in attrs.items())
+    return f'<line x1="{_fmt(x1)}" y1="{_fmt(y1)}" x2="{_fmt(x2)}" y2="{_fmt(y2)}" stroke="{stroke}"{extra}/>'
+
+
+def _svg(width: int, height: int, parts: Sequence[str]) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="{FONT}">\n'
+        f'<rect width="{width}" height="{height}" fill="white"/>\n' + "\n".join(parts) + "\n</svg>\n"
+    )
+
+
+def _nice_max(v: float) -> float:
+    """Límite superior "redondo" del eje (1, 2, 5 × 10^k)."""
+    if v <= 0:
+        return 1.0
+    exp = 10 ** math.floor(math.log10(v))
+    for m in (1, 2, 5, 10):
+        if v <= m * exp:
+            return m * exp
+    return 10 * exp
+
+
+class _Panel:
+    """Área de dibujo con eje Y lineal [ymin, ymax]."""
+
+    def __init__(self, x: float, y: float, w: float, h: float, ymin: float, ymax: float):
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.ymin, self.ymax = ymin, ymax
+
+    def sy(self, v: float) -> float:
+        return self.y + self.h * (1 - (v - self.ymin) / ((self.ymax - self.ymin) or 1))
+
+    def axes(self, title: str, ylabel: str, ticks: int = 5) -> List[str]:
+        parts = [_text(self.x + self.w / 2, self.y - 12, title, 13, font_weight="bold")]
+        for i in range(ticks + 1):
+            v = self.ymin + (self.ymax - self.ymin) * i / ticks
+            y = self.sy(v)
+            parts.append(_line(self.x, y, self.x + self.w, y, "#e0e0e0"))
+            parts.append(_text(self.x - 6, y + 4, _fmt(v), 10, "end"))
+        parts.append(_line(self.x, self.y, self.x, self.y + self.h))
+        parts.append(_text(self.x - 42, self.y + self.h / 2, ylabel, 11, transform=f"rotate(-90 {_fmt(self.x - 42)} {_fmt(self.y + self.h / 2)})"))
+        return parts
+
+    def hline(self, v: float, color: str, dash: bool = True) -> str:
+        y = self.sy(v)
+        return _line(self.x, y, self.x + self.w, y, color, stroke_dasharray="5,4" if dash else "none", opacity="0.7")
+
+    def bars(
+        self,
+        categories: Sequence[str],
+        series: Sequence[Tuple[str, Sequence[float], Any]],
+    ) -> List[str]:
+        """Barras agrupadas: series = [(nombre, valores, color o lista de colores)]."""
+        parts = []
+        slot = self.w / max(len(categories), 1)
+        bw = slot * 0.75 / max(len(series), 1)
+        base = self.sy(max(self.ymin, 0))
+        for i, cat in enumerate(categories):
+            x0 = self.x + i * slot + slot * 0.125
+            for j, (_, values, color) in enumerate(series):
+                v = values[i]
+                fill = color[i] if isinstance(color, (list, tuple)) else color
+                y = self.sy(v)
+                parts.append(_rect(x0 + j * bw, min(y, base), bw, abs(base - y), fill))
+            parts.append(_text(self.x + (i + 0.5) * slot, self.y + self.h + 16, cat, 10))
+        return parts
+
+
+def _legend(x: float, y: float, items: Sequence[Tuple[str, str]]) -> List[str]:
+    parts = []
+    for k, (name, color) in enumerate(items):
+        parts.append(_rect(x, y + 16 * k, 10, 10, color))
+        parts.append(_text(x + 14, y + 16 * k + 9, name, 10, "start"))
+    return parts
+
+
+def sentiment_distribution_svg(by_source: Dict[str, Dict]) -> str:
+    sources = list(by_source)
+    panel = _Panel(70, 40, 620, 260, 0, 100)
+    series = [
+        ("Positivo", [by_source[s].get("pct_positive", 0) for s in sources], POSITIVE),
+        ("Neutral", [by_source[s].get("pct_neutral", 0) for s in sources], NEUTRAL),
+        ("Negativo", [by_source[s].get("pct_negative", 0) for s in sources], NEGATIVE),
+    ]
+    parts = panel.axes("Distribución de sentimiento por fuente (normalizado %)", "Porcentaje de reseñas (%)")
+    parts += panel.bars(sources, series)
+    parts += _legend(705, 50, [(name, color) for name, _, color in series])
+    return _svg(800, 340, parts)
+
+
+def avg_compound_svg(by_source: Dict[str, Dict]) -> str:
+    sources = list(by_source)
+    avgs = [by_source[s].get("avg_compound", 0) for s in sources]
+    colors = [POSITIVE if a >= 0.05 else NEGATIVE if a <= -0.05 else NEUTRAL for a in avgs]
+    lim = _nice_max(max([abs(a) for a in avgs] + [0.1]))
+    panel = _Panel(70, 40, 620, 260, -lim if min(avgs + [0]) < 0 else 0, lim)
+    parts = panel.axes("Sentimiento medio por fuente (VADER)", "Compound medio (-1 a 1)")
+    parts += panel.bars(sources, [("compound", avgs, colors)])
+    parts += [panel.hline(0, "black", dash=False), panel.hline(0.05, "green"), panel.hline(-0.05, "red")]
+    parts += _legend(705, 50, [("Umbral positivo", "green"), ("Umbral negativo", "red")])
+    return _svg(800, 340, parts)
+
+
+def engagement_svg(by_source: Dict[str, Dict]) -> str:
+    sources = list(by_source)
+    per_review = [by_source[s].get("engagement_per_review", 0) for s in sources]
+    totals = [by_source[s].get("engagement_sum", 0) for s in sources]
+    left = _Panel(70, 40, 380, 260, 0, _nice_max(max(per_review + [0])))
+    right = _Panel(560, 40, 380, 260, 0, _nice_max(max(totals + [0])))
+    parts = left.axes("Engagement medio por reseña (comparación justa)", "Likes/votos por reseña")
+    parts += left.bars(sources, [("por reseña", per_review, "#9b59b6")])
+    parts += right.axes("Engagement total (depende del volumen)", "Total likes/votos")
+    parts += right.bars(sources, [("total", totals, "#3498db")])
+    return _svg(980, 340, parts)
+
+
+def top_words_svg(by_source: Dict[str, Dict], top_n: int = 15) -> str:
+    parts: List[str] = []
+    row_h, panel_gap, label_w, bar_w = 18, 50, 120, 560
+    y = 30
+    for src, vals in by_source.items():
+        top = (vals.get("top_words") or [])[:top_n]
+        parts.append(_text(60 + label_w + bar_w / 2, y, f"Top {top_n} palabras – {src} (n={vals.get('count', 0)})", 13, font_weight="bold"))
+        y += 14
+        if not top:
+            parts.append(_text(60 + label_w + bar_w / 2, y + 20, "Sin datos", 11))
+            y += 40 + panel_gap
+            continue
+        rates = [t.get("per_100_reviews", t["count"]) for t in top]
+        vmax = _nice_max(max(rates))
+        for t, rate in zip(top, rates):
+            parts.append(_text(60 + label_w - 6, y + row_h * 0.7, t["word"], 10, "end"))
+            parts.append(_rect(60 + label_w, y + 2, bar_w * rate / vmax, row_h - 4, "#3498db", opacity="0.8"))
+            parts.append(_text(60 + label_w + bar_w * rate / vmax + 4, y + row_h * 0.7, _fmt(rate), 9, "start"))
+            y += row_h
+        parts.append(_text(60 + label_w + bar_w / 2, y + 16, "Frecuencia por 100 reseñas (normalizado)", 10))
+        y += panel_gap
+    return _svg(820, int(y), parts)
+
+
+def compound_boxplot_svg(by_source: Dict[str, Dict]) -> str:
+    sources = [s for s, v in by_source.items() if (v.get("compound_stats") or {}).get("count")]
+    panel = _Panel(70, 40, 620, 260, -1, 1)
+    parts = panel.axes("Distribución de sentimiento por fuente (boxplot)", "Compound (VADER)", ticks=4)
+    slot = panel.w / max(len(sources), 1)
+    for i, src in enumerate(sources):
+        cs = by_source[src]["compound_stats"]
+        cx = panel.x + (i + 0.5) * slot
+        bw = slot * 0.4
+        parts.append(_line(cx, panel.sy(cs["whisker_low"]), cx, panel.sy(cs["p25"])))
+        parts.append(_line(cx, panel.sy(cs["p75"]), cx, panel.sy(cs["whisker_high"])))
+        for v in (cs["whisker_low"], cs["whisker_high"]):
+            parts.append(_line(cx - bw / 4, panel.sy(v), cx + bw / 4, panel.sy(v)))
+        parts.append(_rect(cx - bw / 2, panel.sy(cs["p75"]), bw, panel.sy(cs["p25"]) - panel.sy(cs["p75"]), "#ecf0f1", stroke="#333"))
+        parts.append(_line(cx - bw / 2, panel.sy(cs["median"]), cx + bw / 2, panel.sy(cs["median"]), "#e67e22", stroke_width="2"))
+        for v in (cs["min"], cs["max"]):
+            if v < cs["whisker_low"] or v > cs["whisker_high"]:
+                parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(panel.sy(v))}" r="3" fill="none" stroke="#333"/>')
+        parts.append(_text(cx, panel.y + panel.h + 16, src, 10))
+    parts += [panel.hline(0.05, "green"), panel.hline(-0.05, "red")]
+    return _svg(760, 340, parts)
+
+
+def _rows(words: List[Dict[str, Any]], width: int, scale: float, pad: int) -> List[List[Dict[str, Any]]]:
+    """Reparte las palabras en filas de ancho <= width (ancho estimado por carácter)."""
+    rows: List[List[Dict[str, Any]]] = [[]]
+    row_w = 0.0
+    for item in words:
+        size = max(8, round(item["weight"] * scale))
+        item_w = 0.58 * size * len(item["word"]) + pad
+        if rows[-1] and row_w + item_w > width - 2 * pad:
+            rows.append([])
+            row_w = 0.0
+        rows[-1].append({**item, "size": size, "w": item_w})
+        row_w += item_w
+    return rows
+
+
+def _cloud_layout(
+    freq: Dict[str, float],
+    width: int,
+    height: int,
+    max_words: int,
+    colormap: str,
+) -> List[Dict[str, Any]]:
+    """
+    Colocación por filas centradas: [{word, x, y, size, color}] (x, y = centro
+    de la línea base). Como WordCloud, reduce el tamaño de letra hasta que
+    caben todas las palabras (o se llega al mínimo legible).
+    """
+    items = sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))[:max_words]
+    if not items:
+        return []
+    fmax = items[0][1] or 1
+    palette = PALETTES.get(colormap, PALETTES["viridis"])
+    words = [
+        {
+            "word": w,
+            "weight": 0.25 + 0.75 * math.sqrt(max(f, 0) / fmax),
+            "color": palette[min(rank * len(palette) // len(items), len(palette) - 1)],
+        }
+        for rank, (w, f) in enumerate(items)
+    ]
+    pad = 10
+    scale = 64.0
+    while True:
+        rows = _rows(words, width, scale, pad)
+        total_h = sum(max(i["size"] for i in row) * 1.15 for row in rows)
+        if total_h <= height - 2 * pad or scale <= 16:
+            break
+        scale *= 0.9
+    out: List[Dict[str, Any]] = []
+    y = pad + max(0.0, (height - 2 * pad - total_h) / 2)
+    for row in rows:
+        line_h = max(i["size"] for i in row) * 1.15
+        if y + line_h > height - pad:
+            break
+        x = (width - sum(i["w"] for i in row)) / 2
+        for item in row:
+            out.append({
+                "word": item["word"],
+                "x": round(x + item["w"] / 2, 1),
+                "y": round(y + line_h * 0.8, 1),
+                "size": item["size"],
+                "color": item["color"],
+            })
+            x += item["w"]
+        y += line_h
+    return out
+
+
+def wordcloud_svg(freq: Dict[str, float], title: str, max_words: int = 80, colormap: str = "viridis") -> str:
+    width, height = 800, 400
+    parts = [_text(width / 2, 24, title, 15, font_weight="bold")]
+    if not freq:
+        parts.append(_text(width / 2, height / 2, "No hay datos para mostrar", 16))
+    for item in _cloud_layout(freq, width, height - 40, max_words, colormap):
+        parts.append(_text(item["x"], item["y"] + 40, item["word"], item["size"], fill=item["color"]))
+    return _svg(width, height, parts)
+
+
+# --- Vega-Lite ---------------------------------------------------------------
+
+
+def _vl(title: str, **spec: Any) -> Dict[str, Any]:
+    return {"$schema": VEGA_LITE_SCHEMA, "title": title, **spec}
+
+
+def sentiment_distribution_vega(by_source: Dict[str, Dict]) -> Dict[str, Any]:
+    rows = [
+        {"source": s, "label": name, "pct": v.get(key, 0)}
+        for s, v in by_source.items()
+        for name, key in (("Positivo", "pct_positive"), ("Neutral", "pct_neutral"), ("Negativo", "pct_negative"))
+    ]
+    return _vl(
+        "Distribución de sentimiento por fuente (normalizado %)",
+        data={"values": rows},
+        mark="bar",
+        width=600,
+        encoding={
+            "x": {"field": "source", "type": "nominal", "sort": None, "title": None},
+            "xOffset": {"field": "label", "sort": ["Positivo", "Neutral", "Negativo"]},
+            "y": {"field": "pct", "type": "quantitative", "scale": {"domain": [0, 100]}, "title": "Porcentaje de reseñas (%)"},
+            "color": {
+                "field": "label",
+                "scale": {"domain": ["Positivo", "Neutral", "Negativo"], "range": [POSITIVE, NEUTRAL, NEGATIVE]},
+                "title": None,
+            },
+        },
+    )
+
+
+def avg_compound_vega(by_source: Dict[str, Dict]) -> Dict[str, Any]:
+    rows = []
+    for s, v in by_source.items():
+        a = v.get("avg_compound", 0)
+        rows.append({"source": s, "avg_compound": a, "color": POSITIVE if a >= 0.05 else NEGATIVE if a <= -0.05 else NEUTRAL})
+    return _vl(
+        "Sentimiento medio por fuente (VADER)",
+        width=600,
+        layer=[
+            {
+                "data": {"values": rows},
+                "mark": "bar",
+                "encoding": {
+                    "x": {"field": "source", "type": "nominal", "sort": None, "title": None},
+                    "y": {"field": "avg_compound", "type": "quantitative", "title": "Compound medio (-1 a 1)"},
+                    "color": {"field": "color", "type": "nominal", "scale": None},
+                },
+            },
+            {
+                "data": {"values": [{"y": 0.05, "c": "green"}, {"y": -0.05, "c": "red"}]},
+                "mark": {"type": "rule", "strokeDash": [5, 4], "opacity": 0.7},
+                "encoding": {"y": {"field": "y", "type": "quantitative"}, "color": {"field": "c", "type": "nominal", "scale": None}},
+            },
+        ],
+    )
+
+
+def engagement_vega(by_source: Dict[str, Dict]) -> Dict[str, Any]:
+    rows = [
+        {"source": s, "per_review": v.get("engagement_per_review", 0), "total": v.get("engagement_sum", 0)}
+        for s, v in by_source.items()
+    ]
+
+    def panel(field: str, title: str, ylabel: str, color: str) -> Dict[str, Any]:
+        return {
+            "title": title,
+            "mark": {"type": "bar", "color": color},
+            "width": 380,
+            "encoding": {
+                "x": {"field": "source", "type": "nominal", "sort": None, "title": None},
+                "y": {"field": field, "type": "quantitative", "title": ylabel},
+            },
+        }
+
+    return _vl(
+        "Engagement por fuente",
+        data={"values": rows},
+        hconcat=[
+            panel("per_review", "Engagement medio por reseña (comparación justa)", "Likes/votos por reseña", "#9b59b6"),
+            panel("total", "Engagement total (depende del volumen)", "Total likes/votos", "#3498db"),
+        ],
+    )
+
+
+def top_words_vega(by_source: Dict[str, Dict], top_n: int = 15) -> Dict[str, Any]:
+    rows = [
+        {"source": f"{s} (n={v.get('count', 0)})", "word": t["word"], "rate": t.get("per_100_reviews", t["count"])}
+        for s, v in by_source.items()
+        for t in (v.get("top_words") or [])[:top_n]
+    ]
+    return _vl(
+        f"Top {top_n} palabras por fuente",
+        data={"values": rows},
+        facet={"row": {"field": "source", "type": "nominal", "sort": None, "title": None}},
+        resolve={"scale": {"y": "independent", "x": "independent"}},
+        spec={
+            "width": 560,
+            "mark": {"type": "bar", "color": "#3498db", "opacity": 0.8},
+            "encoding": {
+                "y": {"field": "word", "type": "nominal", "sort": "-x", "title": None},
+                "x": {"field": "rate", "type": "quantitative", "title": "Frecuencia por 100 reseñas (normalizado)"},
+            },
+        },
+    )
+
+
+def compound_boxplot_vega(by_source: Dict[str, Dict]) -> Dict[str, Any]:
+    rows = [
+        {"source": s, **{k: cs[k] for k in ("whisker_low", "p25", "median", "p75", "whisker_high")}}
+        for s, v in by_source.items()
+        for cs in [v.get("compound_stats") or {}]
+        if cs.get("count")
+    ]
+    x = {"field": "source", "type": "nominal", "sort": None, "title": None}
+    scale = {"domain": [-1, 1]}
+    return _vl(
+        "Distribución de sentimiento por fuente (boxplot)",
+        data={"values": rows},
+        width=600,
+        layer=[
+            {"mark": "rule", "encoding": {"x": x, "y": {"field": "whisker_low", "type": "quantitative", "scale": scale, "title": "Compound (VADER)"}, "y2": {"field": "whisker_high"}}},
+            {"mark": {"type": "bar", "size": 40, "color": "#ecf0f1", "stroke": "#333"}, "encoding": {"x": x, "y": {"field": "p25", "type": "quantitative"}, "y2": {"field": "p75"}}},
+            {"mark": {"type": "tick", "size": 40, "color": "#e67e22", "thickness": 2}, "encoding": {"x": x, "y": {"field": "median", "type": "quantitative"}}},
+        ],
+    )
+
+
+def wordcloud_vega(freq: Dict[str, float], title: str, max_words: int = 80, colormap: str = "viridis") -> Dict[str, Any]:
+    width, height = 800, 360
+    rows = _cloud_layout(freq, width, height, max_words, colormap)
+    return _vl(
+        title,
+        data={"values": rows},
+        width=width,
+        height=height,
+        mark={"type": "text", "baseline": "alphabetic"},
+        encoding={
+            "x": {"field": "x", "type": "quantitative", "scale": {"domain": [0, width]}, "axis": None},
+            "y": {"field": "y", "type": "quantitative", "scale": {"domain": [height, 0]}, "axis": None},
+            "text": {"field": "word"},
+            "size": {"field": "size", "type": "quantitative", "scale": None, "legend": None},
+            "color": {"field": "color", "type": "nominal", "scale": None},
+        },
+        config={"view": {"stroke": None}},
+    )
+
+
+# Gráfica -> (SVG, Vega-Lite)
+CHARTS = {
+    "sentiment_distribution": (sentiment_distribution_svg, sentiment_distribution_vega),
+    "avg_compound": (avg_compound_svg, avg_compound_vega),
+    "engagement": (engagement_svg, engagement_vega),
+    "top_words": (top_words_svg, top_words_vega),
+    "compound_boxplot": (compound_boxplot_svg, compound_boxplot_vega),
+    "wordcloud": (wordcloud_svg, wordcloud_vega),
+}
+
+
+def render(chart: str, output_path: Path, *args: Any, **kwargs: Any) -> None:
+    """Escribe la gráfica chart en SVG o Vega-Lite según la extensión de output_path."""
+    svg_fn, vega_fn = CHARTS[chart]
+    write_chart((vega_fn if is_vega(output_path) else svg_fn)(*args, **kwargs), output_path)
@@ -0,0 +1,135 @@
+"""
+Benchmark y guardia del tiempo de importación de los puntos de entrada.
+
+Cada punto de entrada se importa en un intérprete nuevo con -X importtime
+y se comprueba que no cargue dependencias pesadas que no necesita (p. ej.
+run_cleaning.py no debe importar bs4, requests ni VADER solo para limpiar
+JSON). Los paquetes src.scrapers, src.analysis y src.cleaning importan sus
+módulos bajo demanda (PEP 562); un import eager nuevo rompe la guardia.
+
+Uso:
+    python -m src.bench_imports                  # tabla + comprobación (exit 1 si falla)
+    python -m src.bench_imports --budget-ms 300  # además, límite de tiempo por entrada
+
+IMPORT_BUDGET_MS fija el límite por defecto (0 = sin límite de tiempo; el
+tiempo depende de la máquina, las dependencias prohibidas no).
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "0"))
+SCRAPING = ("requests", "bs4")
+PLOTTING = ("matplotlib", "wordcloud")
+
+
+class EntryPoint(NamedTuple):
+    """Módulo a importar y dependencias que no debe cargar."""
+
+    module: str
+    forbidden: Tuple[str, ...]
+
+
+ENTRY_POINTS = [
+    EntryPoint("run_cleaning", (*SCRAPING, "vaderSentiment", "numpy", *PLOTTING)),
+    EntryPoint("src.cleaning", (*SCRAPING, "vaderSentiment", "numpy", *PLOTTING)),
+    EntryPoint("src.scrapers", SCRAPING),
+    EntryPoint("src.analysis", (*SCRAPING, "vaderSentiment", "numpy", *PLOTTING)),
+    EntryPoint("src.analysis.sentiment", (*SCRAPING, "vaderSentiment", *PLOTTING)),
+    EntryPoint("src.analysis.sentiment_sources_report", (*SCRAPING, "vaderSentiment", *PLOTTING)),
+    EntryPoint("run_analysis", (*SCRAPING, "vaderSentiment", *PLOTTING)),
+]
+
+# Imprime en la última línea los módulos de primer nivel cargados
+_PROBE = "import {module}, sys; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+
+
+def _parse_importtime(stderr: str, module: str) -> Dict[str, int]:
+    """
+    {módulo: microsegundos acumulados} del import de module según -X importtime
+    (solo su subárbol: sin lo que ya cargó el arranque del intérprete).
+    """
+    subtree: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        raw = parts[2].rstrip()
+        name, us = raw.strip(), int(parts[1])
+        # Los hijos se imprimen (indentados) antes que su padre
+        subtree[name] = us
+        if raw == f" {name}":
+            if name == module:
+                return subtree
+            subtree = {}
+    return {}
+
+
+def measure(entry: EntryPoint) -> Dict[str, Any]:
+    """Importa entry.module en un intérprete nuevo: tiempo, módulos pesados y los más lentos."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=entry.module)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return {"module": entry.module, "error": proc.stderr.strip().splitlines()[-1:]}
+    lines = proc.stdout.strip().splitlines()
+    loaded = set(lines[-1].split()) if lines else set()
+    times = _parse_importtime(proc.stderr, entry.module)
+    # Dependencias de primer nivel más costosas (sin contar el propio proyecto)
+    top = sorted(
+        ((name, us) for name, us in times.items() if "." not in name and name not in ("src", entry.module)),
+        key=lambda kv: -kv[1],
+    )[:5]
+    return {
+        "module": entry.module,
+        "ms": round(times.get(entry.module, 0) / 1000, 1),
+        "violations": sorted(m for m in entry.forbidden if m in loaded),
+        "slowest": [(name, round(us / 1000, 1)) for name, us in top],
+    }
+
+
+def run_benchmark(entries: Sequence[EntryPoint] = ENTRY_POINTS, budget_ms: float = DEFAULT_BUDGET_MS) -> List[Dict[str, Any]]:
+    """Mide cada punto de entrada y marca ok=False si carga algo prohibido o supera budget_ms."""
+    results = []
+    for entry in entries:
+        r = measure(entry)
+        r["ok"] = "error" not in r and not r["violations"] and not (budget_ms and r["ms"] > budget_ms)
+        results.append(r)
+    return results
+
+
+def main(argv: Sequence[str] = ()) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de importación de los puntos de entrada.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Límite por entrada (0 = sin límite)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(budget_ms=args.budget_ms)
+    for r in results:
+        mark = "[OK]" if r["ok"] else "[AVISO]"
+        if "error" in r:
+            print(f"{mark} {r['module']}: error al importar: {' '.join(r['error'])}")
+            continue
+        slowest = ", ".join(f"{name} {ms} ms" for name, ms in r["slowest"])
+        print(f"{mark} {r['module']}: {r['ms']} ms (más lentos: {slowest or '-'})")
+        if r["violations"]:
+            print(f"        importa dependencias que no necesita: {', '.join(r['violations'])}")
+    failed = [r["module"] for r in results if not r["ok"]]
+    if failed:
+        print(f"\n[AVISO] {len(failed)} punto(s) de entrada no cumplen la guardia: {', '.join(failed)}")
+        return 1
+    print(f"\n✓ {len(results)} puntos de entrada sin dependencias pesadas innecesarias")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,25 @@
-"""Pipeline de limpieza de datos."""
+"""Pipeline de limpieza de datos (se importa al pedir un nombre, PEP 562)."""
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "run_cleaning_pipeline": ("src.cleaning.pipeline", "run_cleaning_pipeline"),
+    "load_raw_data": ("src.cleaning.pipeline", "load_raw_data"),
+    "save_clean_data": ("src.cleaning.pipeline", "save_clean_data"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(import_module(module), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
-from src.cleaning.pipeline import run_cleaning_pipeline, load_raw_data, save_clean_data
 
 __all__ = ["run_cleaning_pipeline", "load_raw_data", "save_clean_data"]
@@ -5,15 +5,23 @@ Carga datos crudos, aplica transformaciones y guarda datos limpios.
 IMPORTANTE: El contenido NO se le quitan stop words para preservar negaciones
 (not, don't, no) que el análisis de sentimiento (VADER) necesita.
 """
+import hashlib
 import json
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Optional, Set
+
+from src.profiling import span
 
 # Rutas relativas al proyecto
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
+# Comentarios que va añadiendo el modo continuo (src/live.py), uno por línea
+LIVE_LEDGER = DATA_RAW / "reviews_live.jsonl"
+# Hasta qué línea del ledger incluye el dataset limpio (lo lee src/live.py)
+LIVE_OFFSET_PATH = DATA_CLEAN / "live_ledger_offset.json"
+CLEAN_PATH = DATA_CLEAN / "reviews_f1_clean.json"
 
 # Stop words (solo para análisis temático / word frequency, NUNCA para sentimiento)
 STOP_WORDS: Set[str] = {
@@ -40,11 +48,13 @@ TIMESTAMP_PATTERN = re.compile(r"\b\d{1,2}:\d{2}\b")
 NOISE_WORDS = {"lol", "lols", "lmao", "haha", "xd", "omg", "wtf", "idk", "imo", "tbh"}
 
 
-def load_raw_data() -> Dict[str, Any]:
+def load_raw_data(ledger_end: Optional[int] = None) -> Dict[str, Any]:
     """
     Carga todos los JSON crudos de data/raw/.
     Prioridad: archivos individuales por fuente (reviews_youtube.json, etc.).
     Si no hay individuales, usa reviews_f1_combined.json como fallback.
+    Al final se añaden los comentarios del modo continuo (reviews_live.jsonl),
+    hasta la línea ledger_end (None = todas las completas).
     """
     all_reviews = []
     sources = {}
@@ -76,6 +86,12 @@ def load_raw_data() -> Dict[str, Any]:
             all_reviews = data.get("reviews", [])
             sources = data.get("sources", {})
 
+    if ledger_end is None:
+        ledger_end = count_lines(LIVE_LEDGER)
+    for r in read_live_ledger(end=ledger_end):
+        sources[r.get("source", "Unknown")] = sources.get(r.get("source", "Unknown"), 0) + 1
+        all_reviews.append(r)
+
     return {
         "movie": "F1 (2025)",
         "total_reviews": len(all_reviews),
@@ -84,6 +100,55 @@ def load_raw_data() -> Dict[str, Any]:
     }
 
 
+def count_lines(path: Path) -> int:
+    """Líneas completas de un archivo (0 si no existe)."""
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+
+def read_live_ledger(start: int = 0, end: Optional[int] = None, path: Path = LIVE_LEDGER) -> List[Dict]:
+    """Comentarios crudos del modo continuo de las líneas [start, end) (las incompletas se ignoran)."""
+    if not path.exists():
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if end is not None and i >= end:
+                break
+            if i < start or not line.endswith("\n"):
+                continue
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+    return out
+
+
+def save_live_offset(lines: int, clean_path: Path = CLEAN_PATH) -> None:
+    """Guarda junto al dataset limpio hasta qué línea del ledger incluye (con su huella)."""
+    from src.dag import file_digest
+
+    payload = {"lines": lines, "clean_digest": file_digest(clean_path)}
+    with open(LIVE_OFFSET_PATH, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def read_live_offset(clean_path: Path = CLEAN_PATH) -> int:
+    """Líneas del ledger ya incluidas en el dataset limpio (0 si no consta o es de otro dataset)."""
+    from src.dag import file_digest
+
+    try:
+        with open(LIVE_OFFSET_PATH, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if payload.get("clean_digest") != file_digest(clean_path):
+        return 0
+    return int(payload.get("lines", 0))
+
+
 def _light_clean_for_sentiment(text: str) -> str:
     """
     Limpieza ligera para ANÁLISIS DE SENTIMIENTO.
@@ -174,6 +239,33 @@ def deduplicate_reviews(reviews: List[Dict]) -> List[Dict]:
     return out
 
 
+def review_id(review: Dict) -> str:
+    """
+    ID estable de una reseña entre ejecuciones. Usa el ID de la plataforma si
+    existe (comment_id de YouTube); si no, un hash de fuente, post/video,
+    autor y fecha. No depende del texto, así que una reseña editada conserva
+    su ID.
+    """
+    src = review.get("source", "Unknown")
+    for key in ("comment_id", "review_id", "id"):
+        if review.get(key):
+            return f"{src}:{review[key]}"
+    parts = [src] + [str(review.get(k) or "") for k in ("post_id", "video_id", "author", "date")]
+    return f"{src}:" + hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def review_ids(reviews: List[Dict]) -> List[str]:
+    """review_id de cada reseña; las repeticiones llevan sufijo #2, #3..."""
+    seen: Dict[str, int] = {}
+    out = []
+    for r in reviews:
+        rid = review_id(r)
+        n = seen.get(rid, 0) + 1
+        seen[rid] = n
+        out.append(rid if n == 1 else f"{rid}#{n}")
+    return out
+
+
 def run_cleaning_pipeline(
     min_content_length: int = 15,
     min_words: int = 3,
@@ -197,23 +289,31 @@ def run_cleaning_pipeline(
     DATA_RAW.mkdir(parents=True, exist_ok=True)
     DATA_CLEAN.mkdir(parents=True, exist_ok=True)
 
-    data = load_raw_data()
-    reviews = data.get("reviews", [])
+    with span("load") as sp:
+        # El ledger puede crecer mientras tanto (src/live.py): se fija su final
+        live_lines = count_lines(LIVE_LEDGER)
+        data = load_raw_data(ledger_end=live_lines)
+        reviews = data.get("reviews", [])
+        sp.records = len(reviews)
 
     # Limpieza: URLs, timestamps, espacios. NO stop words (sentimiento los necesita)
-    reviews = [clean_review(r, remove_stopwords=remove_stopwords) for r in reviews]
-    reviews = filter_valid_reviews(
-        reviews,
-        min_content_length=min_content_length,
-        min_words=min_words,
-    )
+    with span("clean", records=len(reviews)):
+        reviews = [clean_review(r, remove_stopwords=remove_stopwords) for r in reviews]
+    with span("filter", records=len(reviews)):
+        reviews = filter_valid_reviews(
+            reviews,
+            min_content_length=min_content_length,
+            min_words=min_words,
+        )
     if deduplicate:
-        reviews = deduplicate_reviews(reviews)
+        with span("dedupe", records=len(reviews)):
+            reviews = deduplicate_reviews(reviews)
 
     # Pasos personalizados
     if custom_steps:
         for step in custom_steps:
-            reviews = step(reviews)
+            with span(getattr(step, "__name__", "custom_step"), records=len(reviews)):
+                reviews = step(reviews)
 
     output = {
         "movie": data.get("movie", "F1 (2025)"),
@@ -225,7 +325,9 @@ def run_cleaning_pipeline(
         "reviews": reviews,
     }
 
-    save_clean_data(output)
+    with span("save", records=len(reviews)):
+        save_clean_data(output)
+        save_live_offset(live_lines)
     print(f"✓ Limpieza completada: {len(reviews)} reseñas válidas")
     return output
 
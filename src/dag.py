@@ -0,0 +1,261 @@
+"""
+Runner tipo make para las etapas del pipeline (limpieza y análisis).
+
+Cada etapa declara sus entradas (archivos), salidas, dependencias, el código
+del que depende y su configuración. Tras ejecutarla se guarda en
+.cache/dag_state.json la huella de todo ello (hash de contenido). En la
+siguiente ejecución solo se relanzan las etapas cuya huella cambió o cuyas
+salidas faltan o fueron modificadas; como las salidas de una etapa son
+entradas de la siguiente, los cambios se propagan solos aguas abajo.
+
+Uso desde los scripts:
+    python run_analysis.py                 # solo lo que cambió
+    python run_analysis.py --force         # todo
+    python run_analysis.py --only report   # 'report' (y sus deps si están desfasadas)
+"""
+import argparse
+import hashlib
+import json
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Sequence
+
+from src.profiling import add_profiling_arguments, span
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = PROJECT_ROOT / ".cache"
+STATE_PATH = CACHE_DIR / "dag_state.json"
+
+_CHUNK = 1 << 20
+
+
+class Stage:
+    """
+    Etapa del pipeline.
+
+    Args:
+        name: Identificador corto (se usa en --only y en el estado).
+        func: Función sin argumentos que ejecuta la etapa.
+        title: Texto que se imprime al ejecutarla.
+        inputs: Archivos que lee (rutas absolutas o relativas al proyecto).
+        outputs: Archivos que escribe.
+        deps: Nombres de etapas que deben ir antes.
+        code: Archivos de código cuyo contenido forma parte de la huella.
+        config: Diccionario serializable con parámetros/versiones relevantes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        title: str = "",
+        inputs: Sequence = (),
+        outputs: Sequence = (),
+        deps: Sequence[str] = (),
+        code: Sequence = (),
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.title = title or name
+        self.inputs = [_abs(p) for p in inputs]
+        self.outputs = [_abs(p) for p in outputs]
+        self.deps = list(deps)
+        self.code = [_abs(p) for p in code]
+        self.config = config or {}
+
+
+def _abs(path) -> Path:
+    path = Path(path)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def _rel(path: Path) -> str:
+    try:
+        return path.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """SHA-256 del contenido de un archivo (None si no existe)."""
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def package_version(name: str) -> Optional[str]:
+    """Versión instalada de un paquete (None si no está instalado)."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def stage_fingerprint(stage: Stage) -> Dict[str, Any]:
+    """Huella de una etapa: hash de entradas, código y configuración."""
+    code_hash = hashlib.sha256()
+    for path in stage.code:
+        code_hash.update(_rel(path).encode("utf-8"))
+        code_hash.update((file_digest(path) or "-").encode("ascii"))
+    config_json = json.dumps(stage.config, sort_keys=True, ensure_ascii=False, default=str)
+    return {
+        "inputs": {_rel(p): file_digest(p) for p in stage.inputs},
+        "code": code_hash.hexdigest(),
+        "config": hashlib.sha256(config_json.encode("utf-8")).hexdigest(),
+    }
+
+
+def load_state() -> Dict[str, Any]:
+    if not STATE_PATH.exists():
+        return {}
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    tmp.replace(STATE_PATH)
+
+
+def _outputs_unchanged(stage: Stage, recorded: Dict[str, Optional[str]]) -> bool:
+    """True si todas las salidas existen y coinciden con las registradas."""
+    for path in stage.outputs:
+        digest = file_digest(path)
+        if digest is None or recorded.get(_rel(path)) != digest:
+            return False
+    return True
+
+
+def is_up_to_date(stage: Stage, state: Dict[str, Any]) -> bool:
+    """Una etapa está al día si su huella y sus salidas no cambiaron."""
+    prev = state.get(stage.name)
+    if not prev:
+        return False
+    if prev.get("fingerprint") != stage_fingerprint(stage):
+        return False
+    return _outputs_unchanged(stage, prev.get("outputs", {}))
+
+
+def topological_order(stages: Sequence[Stage]) -> List[Stage]:
+    """Ordena etapas respetando deps (estable respecto al orden declarado)."""
+    by_name = {s.name: s for s in stages}
+    ordered: List[Stage] = []
+    visiting = set()
+    done = set()
+
+    def visit(stage: Stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Ciclo en las dependencias de la etapa '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"La etapa '{stage.name}' depende de '{dep}', que no existe")
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for s in stages:
+        visit(s)
+    return ordered
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    force: bool = False,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, str]:
+    """
+    Ejecuta las etapas en orden topológico, saltando las que están al día.
+
+    Args:
+        stages: Etapas declaradas.
+        force: Si True, ejecuta las etapas seleccionadas aunque estén al día.
+        only: Nombres de etapas a ejecutar. Sus dependencias (transitivas)
+            también se revisan y se relanzan solo si están desfasadas; el
+            resto no se toca.
+
+    Returns:
+        {nombre_etapa: "ejecutada" | "omitida" | "sin salidas"}
+    """
+    ordered = topological_order(stages)
+    if only:
+        unknown = set(only) - {s.name for s in ordered}
+        if unknown:
+            raise ValueError(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+        by_name = {s.name: s for s in ordered}
+        needed = set()
+        pending = list(only)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(by_name[name].deps)
+        ordered = [s for s in ordered if s.name in needed]
+        selected = set(only)
+    else:
+        selected = {s.name for s in ordered}
+
+    state = load_state()
+    status: Dict[str, str] = {}
+    for i, stage in enumerate(ordered, 1):
+        print(f"{i}. {stage.title}...")
+        if not (force and stage.name in selected) and is_up_to_date(stage, state):
+            print(f"  = Sin cambios en '{stage.name}', se omite (usa --force para relanzar)")
+            status[stage.name] = "omitida"
+            print()
+            continue
+
+        with span(stage.name):
+            stage.func()
+        outputs = {_rel(p): file_digest(p) for p in stage.outputs}
+        if all(outputs.values()):
+            # La huella se toma después de ejecutar: si la etapa reescribe una
+            # de sus propias entradas, la siguiente ejecución no la relanza.
+            state[stage.name] = {
+                "fingerprint": stage_fingerprint(stage),
+                "outputs": outputs,
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            save_state(state)
+            status[stage.name] = "ejecutada"
+        else:
+            # Sin todas sus salidas no se registra: se volverá a intentar
+            state.pop(stage.name, None)
+            save_state(state)
+            status[stage.name] = "sin salidas"
+        print()
+    return status
+
+
+def build_arg_parser(stages: Sequence[Stage], description: str = "") -> argparse.ArgumentParser:
+    """Parser con --force, --only y opciones de perfilado para los scripts run_*.py."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ejecuta las etapas aunque sus entradas no hayan cambiado.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="ETAPA",
+        choices=[s.name for s in stages],
+        help="Ejecuta solo estas etapas: " + ", ".join(s.name for s in stages),
+    )
+    add_profiling_arguments(parser)
+    return parser
@@ -0,0 +1,328 @@
+"""
+Modo continuo: sondeo de YouTube y Reddit con agregados que se actualizan en vivo.
+
+El flujo normal (main_scraper.py -> run_cleaning.py -> run_analysis.py) vuelve
+a descargar, limpiar y puntuar todo. Para la semana de estreno este proceso se
+queda en marcha y cada LIVE_INTERVAL segundos:
+
+  1. pide a YouTube (commentThreads por fecha, por vídeo) y a Reddit (/new y
+     /comments del subreddit) solo lo publicado desde la última vez: cada
+     listado se recorre del más nuevo al más antiguo y se corta en el primer
+     id ya visto
+  2. añade los comentarios crudos a data/raw/reviews_live.jsonl (una línea
+     por comentario; load_raw_data() los incluye, así que la próxima
+     ejecución de run_cleaning.py los incorpora al dataset limpio)
+  3. limpia, filtra y puntúa solo esos comentarios (clean_review,
+     filter_valid_reviews, add_sentiment_to_reviews)
+  4. los suma al cubo de agregados (cube.py, merge) y a los rollups por hora
+     y día (timeline.py, add): no se vuelve a recorrer el histórico
+  5. reescribe insights_sentimiento.json, insights_basicos.json,
+     sentiment_timeline.json y live_status.json (escritura atómica)
+
+El estado (cubo, rollups y hasta qué línea del ledger se ha procesado) se
+guarda en .cache/live/state.json en cada pasada. Al arrancar se parte de él
+si corresponde al dataset limpio actual; si no (primera vez, o se ha vuelto
+a ejecutar la limpieza) se construye una vez desde el dataset limpio
+puntuado y se le suman las líneas del ledger posteriores a las que ya
+incorporó run_cleaning.py (data/clean/live_ledger_offset.json). La
+deduplicación por texto solo se aplica dentro de cada pasada; la limpieza
+completa la hace contra todo el histórico, así que tras run_cleaning.py los
+totales pueden bajar en algún duplicado.
+
+Con un intervalo de 30 s el retraso entre que se publica un comentario y
+aparece en los JSON es de ~30-40 s en el peor caso (intervalo + peticiones).
+Cuota de YouTube: 1 unidad por página y vídeo, ~2 por vídeo y minuto con el
+intervalo por defecto (la cuota diaria estándar es de 10.000).
+
+Uso:
+    python -m src.live                        # sondea cada LIVE_INTERVAL s (Ctrl+C para parar)
+    python -m src.live --once                 # una sola pasada
+    python -m src.live --sources reddit --interval 60
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from src.analysis.cube import AggregateCube, data_fingerprint
+from src.analysis.timeline import TimelineRollups, parse_date, save_timeline
+from src.cleaning.pipeline import (
+    LIVE_LEDGER,
+    clean_review,
+    count_lines,
+    deduplicate_reviews,
+    filter_valid_reviews,
+    load_raw_data,
+    read_live_ledger,
+    read_live_offset,
+)
+from src.profiling import span
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_CLEAN = PROJECT_ROOT / "data" / "clean"
+OUTPUT_INSIGHTS = PROJECT_ROOT / "output" / "insights"
+STATE_PATH = PROJECT_ROOT / ".cache" / "live" / "state.json"
+STATUS_PATH = OUTPUT_INSIGHTS / "live_status.json"
+
+DEFAULT_INTERVAL = float(os.environ.get("LIVE_INTERVAL", "30"))
+# Páginas máximas por listado y pasada (al arrancar tras días parado)
+DEFAULT_MAX_PAGES = int(os.environ.get("LIVE_MAX_PAGES", "3"))
+SOURCES = ("youtube", "reddit")
+
+# seen (ids de plataforma ya vistos) -> comentarios nuevos en el formato común
+Fetcher = Callable[[Set[str]], List[Dict]]
+
+
+def platform_id(r: Dict) -> Optional[str]:
+    """Id de la plataforma: comment_id en YouTube, id del post/comentario en Reddit."""
+    return r.get("comment_id") or r.get("post_id")
+
+
+def default_fetchers(
+    sources: Sequence[str] = SOURCES,
+    video_ids: Optional[Sequence[str]] = None,
+    subreddit: Optional[str] = None,
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> Dict[str, Fetcher]:
+    """Sondeos de YouTube (vídeos F1_VIDEO_IDS) y Reddit (F1_SUBREDDIT); los scrapers se importan aquí."""
+    fetchers: Dict[str, Fetcher] = {}
+    if "youtube" in sources:
+        from src.scrapers.youtube import F1_VIDEO_IDS, get_new_youtube_comments
+
+        if not os.environ.get("YOUTUBE_API_KEY"):
+            print("⚠ YouTube omitido: exporta YOUTUBE_API_KEY")
+        else:
+            videos = list(video_ids or F1_VIDEO_IDS)
+
+            def youtube(seen: Set[str]) -> List[Dict]:
+                out: List[Dict] = []
+                for vid in videos:
+                    out.extend(get_new_youtube_comments(vid, seen, max_pages=max_pages))
+                return out
+
+            fetchers["YouTube"] = youtube
+    if "reddit" in sources:
+        import requests
+
+        from src.scrapers.reddit_scraper import F1_SUBREDDIT, get_new_reddit_items
+
+        session = requests.Session()
+        sub = subreddit or F1_SUBREDDIT
+
+        def reddit(seen: Set[str]) -> List[Dict]:
+            return get_new_reddit_items(sub, seen, max_pages=max_pages, session=session)
+
+        fetchers["Reddit"] = reddit
+    return fetchers
+
+
+def _write_json(path: Path, obj: Any, indent: Optional[int] = 2) -> None:
+    """Escritura atómica: quien lea el JSON (dashboard) nunca ve un archivo a medias."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp, path)
+
+
+class LiveState:
+    """Cubo y rollups en vivo + huella del dataset limpio del que parten y líneas del ledger ya sumadas."""
+
+    def __init__(self, fingerprint: Optional[str], cube: AggregateCube, timeline: TimelineRollups, ledger_lines: int = 0):
+        self.fingerprint = fingerprint
+        self.cube = cube
+        self.timeline = timeline
+        self.ledger_lines = ledger_lines
+
+    def save(self, path: Path = STATE_PATH) -> None:
+        state = {
+            "fingerprint": self.fingerprint,
+            "ledger_lines": self.ledger_lines,
+            "cube": self.cube.to_dict(),
+            "timeline": self.timeline.to_dict(),
+        }
+        _write_json(path, state, indent=None)
+
+    @classmethod
+    def load(cls, path: Path = STATE_PATH) -> Optional["LiveState"]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                d = json.load(f)
+            return cls(
+                d.get("fingerprint"),
+                AggregateCube.from_dict(d["cube"]),
+                TimelineRollups.from_dict(d["timeline"]),
+                int(d.get("ledger_lines", 0)),
+            )
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return None
+
+
+class LiveIngestor:
+    """Sondea las fuentes, procesa solo lo nuevo y publica los agregados actualizados."""
+
+    def __init__(
+        self,
+        fetchers: Dict[str, Fetcher],
+        state_path: Path = STATE_PATH,
+        ledger_path: Path = LIVE_LEDGER,
+    ):
+        self.fetchers = fetchers
+        self.state_path = state_path
+        self.ledger_path = ledger_path
+        self.seen: Set[str] = set()
+        self.state: Optional[LiveState] = None
+        self.counts: Dict[str, int] = {name: 0 for name in fetchers}
+        self.last_lag: Dict[str, Optional[float]] = {}
+
+    def start(self) -> None:
+        """Ids ya vistos (datos crudos + ledger) y estado en vivo al día con el dataset limpio."""
+        with span("seen") as sp:
+            self.seen = {pid for pid in map(platform_id, load_raw_data()["reviews"]) if pid}
+            sp.records = len(self.seen)
+        fingerprint = data_fingerprint(DATA_CLEAN / "reviews_f1_clean.json")
+        if fingerprint is None:
+            raise FileNotFoundError(f"Ejecuta primero el pipeline de limpieza. No existe {DATA_CLEAN / 'reviews_f1_clean.json'}")
+        state = LiveState.load(self.state_path)
+        if state is not None and state.fingerprint == fingerprint:
+            pending = read_live_ledger(state.ledger_lines, path=self.ledger_path)
+            print(f"✓ Estado en vivo reutilizado ({state.cube.total_reviews} reseñas, {len(pending)} pendientes del ledger)")
+        else:
+            state, pending = self._seed(fingerprint)
+        self.state = state
+        with span("replay", records=len(pending)):
+            self.process(pending)
+        state.ledger_lines = count_lines(self.ledger_path)
+        self.publish()
+
+    def _seed(self, fingerprint: str):
+        """Estado inicial desde el dataset limpio puntuado (una vez) y comentarios del ledger posteriores."""
+        from src.analysis.context import AnalysisContext
+
+        with span("seed") as sp:
+            ctx = AnalysisContext()
+            data, _ = ctx.scored()
+            reviews = data.get("reviews", [])
+            sp.records = len(reviews)
+            timeline = TimelineRollups.load() or TimelineRollups()
+            timeline.update(reviews)
+            state = LiveState(fingerprint, ctx.cube, timeline)
+            # El dataset limpio ya incluye el ledger hasta esa línea (run_cleaning.py)
+            pending = read_live_ledger(read_live_offset(), path=self.ledger_path)
+        print(f"✓ Estado en vivo creado desde el dataset limpio ({len(reviews)} reseñas, {len(pending)} del ledger)")
+        return state, pending
+
+    def process(self, raw: List[Dict]) -> List[Dict]:
+        """Limpia, filtra, puntúa y suma a los agregados los comentarios crudos raw. Devuelve los válidos."""
+        from src.analysis.sentiment import add_sentiment_to_reviews
+
+        if not raw:
+            return []
+        with span("clean", records=len(raw)):
+            reviews = deduplicate_reviews(filter_valid_reviews([clean_review(r) for r in raw]))
+        with span("score", records=len(reviews)):
+            add_sentiment_to_reviews(reviews)
+        with span("aggregate", records=len(reviews)):
+            self.state.cube.merge(AggregateCube.build(reviews))
+            self.state.timeline.add(reviews)
+        return reviews
+
+    def publish(self) -> None:
+        """Reescribe los JSON de insights a partir del cubo y los rollups, y guarda el estado."""
+        from src.analysis.insights import basic_insights_from_cube
+        from src.analysis.sentiment import INSIGHTS_PATH, insights_from_cube
+
+        state = self.state
+        with span("publish", records=state.cube.total_reviews):
+            _write_json(INSIGHTS_PATH, insights_from_cube(state.cube))
+            _write_json(OUTPUT_INSIGHTS / "insights_basicos.json", basic_insights_from_cube(state.cube))
+            save_timeline(state.timeline, state.cube.total_reviews)
+            state.save(self.state_path)
+            _write_json(STATUS_PATH, {
+                "actualizado": int(time.time()),
+                "total_reviews": state.cube.total_reviews,
+                "nuevos_por_fuente": self.counts,
+                "retraso_s": self.last_lag,
+            })
+
+    def _append_ledger(self, raw: List[Dict]) -> None:
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.ledger_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in raw))
+            f.flush()
+            os.fsync(f.fileno())
+        self.state.ledger_lines += len(raw)
+
+    def tick(self) -> Dict[str, Any]:
+        """Una pasada: sondeo, ledger, limpieza + puntuación de lo nuevo y publicación."""
+        raw: List[Dict] = []
+        for name, fetch in self.fetchers.items():
+            with span(f"poll_{name.lower()}") as sp:
+                try:
+                    items = [r for r in fetch(self.seen) if platform_id(r) not in self.seen]
+                except Exception as e:
+                    print(f"⚠ Error sondeando {name}: {e}")
+                    continue
+                sp.records = len(items)
+            self.seen.update(platform_id(r) for r in items)
+            self.counts[name] = self.counts.get(name, 0) + len(items)
+            raw.extend(items)
+        if not raw:
+            return {"fetched": 0, "valid": 0}
+        # Primero al ledger: si el proceso cae a mitad, se reprocesa al arrancar
+        self._append_ledger(raw)
+        reviews = self.process(raw)
+        dates = [parsed[0] for parsed in (parse_date(r.get("date")) for r in reviews) if parsed and parsed[1]]
+        now = time.time()
+        self.last_lag = {"min": round(now - max(dates), 1), "max": round(now - min(dates), 1)} if dates else {}
+        self.publish()
+        return {"fetched": len(raw), "valid": len(reviews), "lag": self.last_lag}
+
+    def run(self, interval: float = DEFAULT_INTERVAL, once: bool = False) -> None:
+        self.start()
+        print(f"✓ Modo continuo: {', '.join(self.fetchers) or 'sin fuentes'}, cada {interval:g} s")
+        while True:
+            t0 = time.monotonic()
+            stats = self.tick()
+            if stats["fetched"]:
+                lag = stats["lag"]
+                lag_txt = f", retraso {lag['min']}-{lag['max']} s" if lag else ""
+                print(
+                    f"[OK] {time.strftime('%H:%M:%S')} {stats['fetched']} nuevos, {stats['valid']} válidos, "
+                    f"total {self.state.cube.total_reviews}{lag_txt}"
+                )
+            if once:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - t0)))
+
+
+def main(argv: Sequence[str] = ()) -> int:
+    parser = argparse.ArgumentParser(description="Ingesta continua de YouTube y Reddit con agregados en vivo.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Segundos entre sondeos")
+    parser.add_argument("--once", action="store_true", help="Una sola pasada y salir")
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+    parser.add_argument("--videos", nargs="+", help="IDs de vídeo de YouTube (por defecto F1_VIDEO_IDS)")
+    parser.add_argument("--subreddit", help="Subreddit (por defecto F1_SUBREDDIT)")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help="Páginas por listado y pasada")
+    args = parser.parse_args(argv)
+
+    from src.analysis.sentiment import HAS_VADER
+
+    if not HAS_VADER:
+        print("⚠ Instala vaderSentiment: pip install vaderSentiment")
+        return 1
+    ingestor = LiveIngestor(default_fetchers(args.sources, args.videos, args.subreddit, args.max_pages))
+    try:
+        ingestor.run(args.interval, once=args.once)
+    except KeyboardInterrupt:
+        print("\n✓ Modo continuo detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,218 @@
+"""
+Instrumentación del pipeline: tiempos, memoria y throughput por etapa.
+
+- span(nombre, records=n): mide un bloque (wall, CPU, registros/segundo y,
+  con trace_memory=True, pico de memoria con tracemalloc). Los spans se
+  anidan: "report/plots".
+- profiled_run(nombre): agrupa los spans de una ejecución y al terminar
+  escribe output/profiles/<nombre>_<fecha>.json.
+- Con cprofile=True se perfila cada etapa de primer nivel con cProfile y se
+  vuelcan a .prof las estadísticas de la más lenta (la etapa "caliente").
+
+Fuera de profiled_run() los spans no registran nada, así que las funciones
+instrumentadas se pueden llamar sueltas sin coste apreciable. tracemalloc
+ralentiza cada asignación de memoria, así que solo se activa a petición
+(--trace-memory) y los pools de procesos lo apagan en sus workers
+(stop_worker_tracing).
+"""
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROFILES_DIR = PROJECT_ROOT / "output" / "profiles"
+
+_current_run: Optional["ProfileRun"] = None
+
+
+class SpanHandle:
+    """Se entrega dentro del with: permite fijar records cuando ya se conocen."""
+
+    def __init__(self, name: str, records: Optional[int] = None):
+        self.name = name
+        self.records = records
+
+
+class ProfileRun:
+    """Estado de una ejecución instrumentada."""
+
+    def __init__(self, name: str, cprofile: bool = False, trace_memory: bool = False):
+        self.name = name
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.t0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+        self.spans: List[Dict[str, Any]] = []
+        self.stack: List[Dict[str, Any]] = []
+        self.hot_stage: Optional[str] = None
+        self.hot_wall = -1.0
+        self.hot_profile: Optional[cProfile.Profile] = None
+        self.prof_path: Optional[Path] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+
+def stop_worker_tracing() -> None:
+    """Para los inicializadores de pools: con fork el worker hereda tracemalloc."""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _memory_enter(frame: Dict[str, Any]) -> None:
+    if not tracemalloc.is_tracing():
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    # El pico que lleva el span padre no se pierde al reiniciar para el hijo
+    run = _current_run
+    if run and run.stack:
+        parent = run.stack[-1]
+        parent["_peak"] = max(parent.get("_peak", 0), peak)
+    frame["_mem0"] = current
+    frame["_peak"] = current
+    tracemalloc.reset_peak()
+
+
+def _memory_exit(frame: Dict[str, Any]) -> Optional[int]:
+    if not tracemalloc.is_tracing() or "_mem0" not in frame:
+        return None
+    _, peak = tracemalloc.get_traced_memory()
+    peak = max(peak, frame.get("_peak", 0))
+    run = _current_run
+    if run and len(run.stack) > 1:
+        parent = run.stack[-2]
+        parent["_peak"] = max(parent.get("_peak", 0), peak)
+    return peak - frame["_mem0"]
+
+
+@contextmanager
+def span(name: str, records: Optional[int] = None):
+    """
+    Mide un bloque de código dentro de la ejecución activa.
+
+    Args:
+        name: Nombre del paso (se antepone el del span padre).
+        records: Registros procesados (para registros/segundo). Se puede
+            fijar después con handle.records = n.
+    """
+    handle = SpanHandle(name, records)
+    run = _current_run
+    if run is None:
+        yield handle
+        return
+
+    path = "/".join([f["name"] for f in run.stack] + [name])
+    frame: Dict[str, Any] = {"name": name, "path": path}
+    run.stack.append(frame)
+    _memory_enter(frame)
+    profiler = None
+    if run.cprofile and len(run.stack) == 1:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield handle
+    finally:
+        wall = time.perf_counter() - t0
+        cpu = time.process_time() - cpu0
+        if profiler is not None:
+            profiler.disable()
+            if wall > run.hot_wall:
+                run.hot_wall = wall
+                run.hot_stage = path
+                run.hot_profile = profiler
+        mem_peak = _memory_exit(frame)
+        run.stack.pop()
+        entry: Dict[str, Any] = {
+            "span": path,
+            "depth": len(run.stack),
+            "start_s": round(t0 - run.t0, 4),
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+        }
+        if handle.records is not None:
+            entry["records"] = handle.records
+            entry["records_per_s"] = round(handle.records / wall, 1) if wall > 0 else None
+        if mem_peak is not None:
+            entry["mem_peak_kb"] = round(mem_peak / 1024, 1)
+        run.spans.append(entry)
+
+
+def _write_profile(run: ProfileRun) -> Path:
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = run.started_at.strftime("%Y%m%d_%H%M%S")
+    out = {
+        "run": run.name,
+        "started_at": run.started_at.isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "wall_s": round(time.perf_counter() - run.t0, 4),
+        "cpu_s": round(time.process_time() - run.cpu0, 4),
+        "trace_memory": run.trace_memory,
+        # Orden de inicio: más fácil de leer que el de finalización
+        "spans": sorted(run.spans, key=lambda s: (s["start_s"], s["depth"])),
+    }
+    if run.hot_profile is not None:
+        prof_path = PROFILES_DIR / f"{run.name}_{stamp}_{run.hot_stage.replace('/', '_')}.prof"
+        run.hot_profile.dump_stats(str(prof_path))
+        run.prof_path = prof_path
+        out["hot_stage"] = run.hot_stage
+        out["cprofile_stats"] = str(prof_path)
+    path = PROFILES_DIR / f"{run.name}_{stamp}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    return path
+
+
+@contextmanager
+def profiled_run(name: str, cprofile: bool = False, trace_memory: bool = False):
+    """
+    Ejecución instrumentada: activa los spans y escribe el perfil JSON al salir.
+
+    Args:
+        name: Nombre de la ejecución (prefijo del archivo de perfil).
+        cprofile: Si True, vuelca cProfile de la etapa de primer nivel más lenta.
+        trace_memory: Si True, mide picos de memoria con tracemalloc (más lento).
+    """
+    global _current_run
+    run = ProfileRun(name, cprofile=cprofile, trace_memory=trace_memory)
+    previous = _current_run
+    _current_run = run
+    run.start()
+    try:
+        yield run
+    finally:
+        run.stop()
+        _current_run = previous
+        path = _write_profile(run)
+        print(f"✓ Perfil de ejecución guardado en {path}")
+        if run.prof_path:
+            print(f"  Etapa más lenta: {run.hot_stage} ({run.hot_wall:.2f}s) → python -m pstats {run.prof_path}")
+
+
+def add_profiling_arguments(parser) -> None:
+    """Añade --profile y --trace-memory a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Vuelca estadísticas cProfile de la etapa más lenta en output/profiles/.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Mide picos de memoria por etapa con tracemalloc (ralentiza la ejecución).",
+    )
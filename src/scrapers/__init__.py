@@ -1,32 +1,54 @@
-"""Scrapers para IMDB, Rotten Tomatoes, Instagram, Reddit y YouTube."""
-
-from src.scrapers.imdb import get_imdb_reviews, save_reviews_to_json as save_imdb
-from src.scrapers.rottentomatoes import (
-    get_rottentomatoes_reviews,
-    save_reviews_to_json as save_rt,
-)
-from src.scrapers.instagram_steady import (
-    get_instagram_comments,
-    save_comments_to_json as save_instagram,
-    F1_POST_SHORTCODE,
-)
-from src.scrapers.reddit_steady import save_comments_to_json as save_reddit
-from src.scrapers.reddit_scraper import (
-    get_reddit_comments_scraper,
-    F1_SUBREDDIT,
-)
-
-
-def get_reddit_comments(subreddit: str = F1_SUBREDDIT, **kwargs) -> list:
+"""
+Scrapers para IMDB, Rotten Tomatoes, Instagram, Reddit y YouTube.
+
+Los módulos de cada fuente (y requests / bs4) se importan al pedir el
+nombre por primera vez (PEP 562), no al importar el paquete: así
+`python -m src.scrapers.youtube` o los scripts de limpieza y análisis no
+cargan todos los scrapers.
+"""
+from importlib import import_module
+from typing import Any, Optional
+
+# Nombre exportado -> (módulo, atributo)
+_EXPORTS = {
+    "get_imdb_reviews": ("src.scrapers.imdb", "get_imdb_reviews"),
+    "save_imdb": ("src.scrapers.imdb", "save_reviews_to_json"),
+    "get_rottentomatoes_reviews": ("src.scrapers.rottentomatoes", "get_rottentomatoes_reviews"),
+    "save_rt": ("src.scrapers.rottentomatoes", "save_reviews_to_json"),
+    "get_instagram_comments": ("src.scrapers.instagram_steady", "get_instagram_comments"),
+    "save_instagram": ("src.scrapers.instagram_steady", "save_comments_to_json"),
+    "F1_POST_SHORTCODE": ("src.scrapers.instagram_steady", "F1_POST_SHORTCODE"),
+    "save_reddit": ("src.scrapers.reddit_steady", "save_comments_to_json"),
+    "F1_SUBREDDIT": ("src.scrapers.reddit_scraper", "F1_SUBREDDIT"),
+    "get_new_reddit_items": ("src.scrapers.reddit_scraper", "get_new_reddit_items"),
+    "get_youtube_comments": ("src.scrapers.youtube", "get_youtube_comments"),
+    "get_youtube_comments_from_videos": ("src.scrapers.youtube", "get_youtube_comments_from_videos"),
+    "get_new_youtube_comments": ("src.scrapers.youtube", "get_new_youtube_comments"),
+    "save_youtube": ("src.scrapers.youtube", "save_comments_to_json"),
+    "F1_VIDEO_ID": ("src.scrapers.youtube", "F1_VIDEO_ID"),
+    "F1_VIDEO_IDS": ("src.scrapers.youtube", "F1_VIDEO_IDS"),
+}
+
+
+def get_reddit_comments(subreddit: Optional[str] = None, **kwargs) -> list:
     """Obtiene comentarios de Reddit por scraping (URLs .json). No requiere API key."""
-    return get_reddit_comments_scraper(subreddit=subreddit, **kwargs)
-from src.scrapers.youtube import (
-    get_youtube_comments,
-    get_youtube_comments_from_videos,
-    save_comments_to_json as save_youtube,
-    F1_VIDEO_ID,
-    F1_VIDEO_IDS,
-)
+    from src.scrapers.reddit_scraper import F1_SUBREDDIT, get_reddit_comments_scraper
+
+    return get_reddit_comments_scraper(subreddit=subreddit or F1_SUBREDDIT, **kwargs)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(import_module(module), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     "get_imdb_reviews",
@@ -39,8 +61,10 @@ __all__ = [
     "get_reddit_comments",
     "save_reddit",
     "F1_SUBREDDIT",
+    "get_new_reddit_items",
     "get_youtube_comments",
     "get_youtube_comments_from_videos",
+    "get_new_youtube_comments",
     "save_youtube",
     "F1_VIDEO_ID",
     "F1_VIDEO_IDS",
@@ -5,7 +5,7 @@ No requiere API key ni PRAW. Usa requests + User-Agent.
 import json
 import time
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 
 F1_SUBREDDIT = "F1movie"
 
@@ -85,6 +85,52 @@ def get_reddit_comments_scraper(
     return items
 
 
+def get_new_reddit_items(
+    subreddit: str = F1_SUBREDDIT,
+    seen: Optional[Set[str]] = None,
+    max_pages: int = 3,
+    session: Optional[requests.Session] = None,
+) -> List[Dict]:
+    """
+    Posts y comentarios nuevos del subreddit cuyo id no está en seen, para el
+    modo continuo (src/live.py). Usa los listados por fecha del subreddit
+    entero (/new.json y /comments.json): una petición cubre todos los hilos,
+    y se deja de paginar al llegar a un id ya visto.
+    """
+    seen = seen or set()
+    session = session or requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    items: List[Dict] = []
+    for listing, is_post in (("new", True), ("comments", False)):
+        after = None
+        for page in range(max_pages):
+            if page or listing == "comments":
+                time.sleep(REQUEST_DELAY)
+            params = {"limit": 100, "raw_json": 1}
+            if after:
+                params["after"] = after
+            r = session.get(f"https://www.reddit.com/r/{subreddit}/{listing}.json", params=params, timeout=15)
+            r.raise_for_status()
+            data = r.json().get("data") or {}
+            reached_seen = False
+            for child in data.get("children") or []:
+                d = (child.get("data") or {}) if isinstance(child, dict) else {}
+                if not d.get("id"):
+                    continue
+                if d["id"] in seen:
+                    reached_seen = True
+                    break
+                if is_post and not ((d.get("selftext") or "").strip() or (d.get("title") or "").strip()):
+                    continue
+                if not is_post and not (d.get("body") or "").strip():
+                    continue
+                items.append(_thing_to_review(d, subreddit, is_post=is_post))
+            after = data.get("after")
+            if reached_seen or not after:
+                break
+    return items
+
+
 def _flatten_comments(children: List[Any], limit: int) -> List[Dict]:
     """Extrae comentarios de forma recursiva (solo primer nivel de replies para no hacer más requests)."""
     out: List[Dict] = []
@@ -2,7 +2,7 @@
 import os
 import json
 import requests
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Set, Union
 
 F1_VIDEO_ID = "8yh9BPUBbbQ"
 # Vídeos F1 (2025) para análisis unificado
@@ -88,6 +88,56 @@ def get_youtube_comments_from_videos(
     return all_comments
 
 
+def get_new_youtube_comments(
+    video_id: str,
+    seen: Set[str],
+    api_key: Optional[str] = None,
+    max_pages: int = 5,
+) -> List[Dict]:
+    """
+    Comentarios de video_id que no están en seen (comment_id), del más nuevo
+    al más antiguo. Pide los hilos por fecha (order=time) y deja de paginar en
+    la primera página con un hilo ya visto: el resto es más antiguo. Para el
+    modo continuo (src/live.py); cada página cuesta 1 unidad de cuota.
+    """
+    key = api_key or os.environ.get("YOUTUBE_API_KEY")
+    if not key:
+        return []
+    url = "https://www.googleapis.com/youtube/v3/commentThreads"
+    comments = []
+    page_token = None
+    for _ in range(max_pages):
+        params = {
+            "part": "snippet,replies",
+            "videoId": video_id,
+            "key": key,
+            "maxResults": 100,
+            "textFormat": "plainText",
+            "order": "time",
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = requests.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        reached_seen = False
+        for thread in data.get("items", []):
+            snippet = thread.get("snippet", {})
+            top = snippet.get("topLevelComment", {})
+            if top.get("id") in seen:
+                reached_seen = True
+            else:
+                comments.append(_fmt(top.get("snippet", {}), video_id, top.get("id")))
+            # Respuestas nuevas a hilos recientes (la API incluye hasta 5 por hilo)
+            for reply in snippet.get("replies", {}).get("comments", []):
+                if reply.get("id") not in seen:
+                    comments.append(_fmt(reply.get("snippet", {}), video_id, reply.get("id")))
+        page_token = data.get("nextPageToken")
+        if reached_seen or not page_token:
+            break
+    return comments
+
+
 def _fmt(snippet: dict, video_id: str, comment_id: Optional[str]) -> Dict:
     """Formatea comentario según YouTube Data API v3 (snippet.likeCount)."""
     like_count = int(snippet.get("likeCount", 0) or 0)
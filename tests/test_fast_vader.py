@@ -0,0 +1,120 @@
+"""
+Conformidad del motor vectorizado (src/analysis/fast_vader.py) con
+vaderSentiment: mismos scores que polarity_scores (con MOVIE_HYPE_LEXICON)
+y misma etiqueta, sobre textos con cada regla de VADER y sobre data/clean/.
+
+    python -m pytest tests/
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("vaderSentiment")
+
+from src.analysis.fast_vader import check_conformance, get_engine  # noqa: E402
+from src.analysis.sentiment import _get_analyzer, label_sentiment, score_batch  # noqa: E402
+
+CLEAN_PATH = Path(__file__).resolve().parent.parent / "data" / "clean" / "reviews_f1_clean.json"
+TOLERANCE = 1e-3
+
+TRICKY_TEXTS = [
+    # Negaciones (también a dos y tres palabras) y "never so"
+    "This movie is not good",
+    "It isn't really that bad at all",
+    "I don't think it was not fun",
+    "never so good, never this boring",
+    "without doubt the best racing film",
+    "not only good but amazing",
+    # "but": pesa más lo que va después
+    "The plot was dumb but the racing scenes were incredible",
+    "Great cast, but a boring and predictable story",
+    "but",
+    # Mayúsculas (con y sin texto en minúsculas)
+    "This is AMAZING",
+    "THIS IS AMAZING",
+    "BEST MOVIE EVER but kinda long",
+    # Boosters y atenuadores, exclamaciones e interrogaciones
+    "extremely good",
+    "kind of good",
+    "sort of terrible honestly",
+    "incredibly boring!!!",
+    "Is this good??",
+    "good!!!!!!",
+    "wow?? really??? ok",
+    # Idioms, "kind of" y "least"
+    "the bomb, cut the mustard, yeah right",
+    "at least it was fun",
+    "the least good part",
+    # Emojis y emoticonos
+    "🔥🔥🔥",
+    "Brad Pitt 😍😍 can't wait",
+    "meh :( not for me",
+    "lol :) :D <3",
+    "🏎️💨 F1 🏁",
+    # Léxico de cine/redes (MOVIE_HYPE_LEXICON)
+    "this trailer goes hard, absolute banger",
+    "mid movie, kinda cringe",
+    # Puntuación, espacios y textos raros
+    "",
+    "   ",
+    "!!!",
+    "...",
+    "good.bad,ugly;nice",
+    "GOOD good GoOd",
+    "a" * 300,
+    "no",
+    "No no NO never!!",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    analyzer = _get_analyzer()
+    if analyzer is None or get_engine() is None:
+        pytest.skip("vaderSentiment no disponible")
+    return analyzer
+
+
+def _assert_conforms(texts):
+    report = check_conformance(texts, tolerance=TOLERANCE)
+    assert report["within_tolerance"], json.dumps(report["failures"], ensure_ascii=False, indent=2)
+    assert report["label_agreement_pct"] == 100.0
+
+
+def test_tricky_texts(analyzer):
+    _assert_conforms(TRICKY_TEXTS)
+
+
+@pytest.mark.parametrize("text", TRICKY_TEXTS)
+def test_single_text_matches_vader(analyzer, text):
+    fast = get_engine().polarity_scores_batch([text])
+    ref = analyzer.polarity_scores(text)
+    for key in ("neg", "neu", "pos", "compound"):
+        assert fast[key][0] == pytest.approx(ref[key], abs=TOLERANCE), key
+    assert label_sentiment(fast["compound"][0]) == label_sentiment(ref["compound"])
+
+
+def test_batch_does_not_mix_texts(analyzer):
+    # Un texto no debe influir en los vecinos del lote (separador, "but", mayúsculas)
+    texts = ["NOT GOOD", "but", "great", "", "terrible but fine", "😍"]
+    batch = get_engine().polarity_scores_batch(texts)
+    for i, text in enumerate(texts):
+        alone = get_engine().polarity_scores_batch([text])
+        assert {k: batch[k][i] for k in batch} == {k: alone[k][0] for k in alone}
+
+
+def test_non_str_input_is_neutral(analyzer):
+    rows = score_batch(["", None, 5, "good"], engine="fast").rows()
+    assert rows[:3] == [(0.0, 1.0, 0.0, 0.0)] * 3
+    assert rows[3] == score_batch(["good"], engine="vader").rows()[0]
+
+
+def test_clean_corpus(analyzer):
+    if not CLEAN_PATH.exists():
+        pytest.skip("No hay data/clean/ (ejecuta run_cleaning.py)")
+    with open(CLEAN_PATH, "r", encoding="utf-8") as f:
+        reviews = json.load(f).get("reviews", [])
+    texts = [r.get("content") for r in reviews if isinstance(r.get("content"), str)]
+    _assert_conforms(texts)